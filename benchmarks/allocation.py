@@ -0,0 +1,117 @@
+"""
+Compares the table-packing engine with the previous exhaustive search,
+and times the search over connected groups of a floor plan.
+
+Run with:
+
+    python -m benchmarks.allocation
+
+Each floor plan is timed for a small party, a party needing most of the
+room and a party too large to seat (a miss). The exhaustive search is
+stopped after ``--legacy-timeout`` seconds, as a miss on 50 tables would
+never finish. The connected search runs on the same tables laid out in
+rows of ``--row`` tables, each joinable with the ones beside it.
+"""
+import argparse
+import itertools
+import random
+import time
+from types import SimpleNamespace
+
+from bookings.allocation import find_connected_table_group, find_table_group
+
+
+FLOOR_PLANS = (10, 50, 200)
+
+
+class Timeout(Exception):
+    pass
+
+
+def legacy_allocate(tables, guests, deadline):
+    """
+    The ``itertools.combinations`` search the table allocation used before.
+    """
+    tables = sorted(tables, key=lambda table: table.seats)
+    checked = 0
+    for num_tables in range(1, len(tables) + 1):
+        for table_group in itertools.combinations(tables, num_tables):
+            checked += 1
+            if checked % 10000 == 0 and time.monotonic() > deadline:
+                raise Timeout
+            if sum(table.seats for table in table_group) >= guests:
+                return list(table_group)
+    return None
+
+
+def make_floor_plan(size, rng):
+    return [SimpleNamespace(id=number, number=number,
+                            seats=rng.choice([2, 2, 4, 4, 6]))
+            for number in range(1, size + 1)]
+
+
+def make_rows(tables, row):
+    """
+    Makes every table adjacent to the ones beside it in its row.
+    """
+    neighbours = {table.id: set() for table in tables}
+    for index in range(1, len(tables)):
+        if index % row:
+            neighbours[tables[index].id].add(tables[index - 1].id)
+            neighbours[tables[index - 1].id].add(tables[index].id)
+    return neighbours
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def describe(result):
+    if result is None:
+        return "no tables"
+    return (f"{len(result)} tables, "
+            f"{sum(table.seats for table in result)} seats")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--legacy-timeout', type=float, default=5.0)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--row', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'tables':>6} {'party':>6} {'engine':>12} {'legacy':>12}"
+          f" {'connected':>12}  result")
+    for size in FLOOR_PLANS:
+        tables = make_floor_plan(size, rng)
+        neighbours = make_rows(tables, args.row)
+        capacity = sum(table.seats for table in tables)
+        for guests in (min(10, capacity), capacity * 3 // 4, capacity + 1):
+            engine_time, engine_result = timed(
+                lambda: find_table_group(tables, guests), args.repeat)
+            deadline = time.monotonic() + args.legacy_timeout
+            try:
+                legacy_time, legacy_result = timed(
+                    lambda: legacy_allocate(tables, guests, deadline), 1)
+                legacy = f"{legacy_time * 1000:10.2f}ms"
+                legacy_result = describe(legacy_result)
+            except Timeout:
+                legacy = f">{args.legacy_timeout:g}s".rjust(12)
+                legacy_result = "timed out"
+            connected_time, connected_result = timed(
+                lambda: find_connected_table_group(
+                    tables, guests, neighbours), args.repeat)
+            print(f"{size:>6} {guests:>6} {engine_time * 1000:10.2f}ms "
+                  f"{legacy} {connected_time * 1000:10.2f}ms  "
+                  f"engine: {describe(engine_result)}; "
+                  f"legacy: {legacy_result}; "
+                  f"connected: {describe(connected_result)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Measures allocation latency with a large booking history, before and
+after it is moved to the archive.
+
+Run with:
+
+    python -m benchmarks.archive
+
+A local SQLite database is filled with ``--history`` past bookings (one
+million by default, a few minutes to generate) and a month of upcoming
+ones. Booking a table through ``place_booking`` for the guest with the
+long history, which checks their other bookings that day before the
+tables are allocated, and the availability search are then timed for
+an upcoming date, with the in-memory availability index cleared before
+every run, once with the history in ``Booking`` and once after
+``archive_bookings`` has moved it out.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, time as clock_time, timedelta
+
+from benchmarks.database import setup_database
+
+
+def fill(history, upcoming, tables, rng, chunk_size=10000):
+    """
+    Bulk-inserts the bookings and returns the user with the history.
+    """
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from bookings.models import Booking, Table
+
+    user = User.objects.create(username='regular')
+    floor = Table.objects.bulk_create(
+        Table(number=number, seats=rng.choice([2, 4, 6]))
+        for number in range(1, tables + 1))
+    Through = Booking.tables.through
+    today = date.today()
+    now = timezone.now()
+
+    def insert(count, first_day, days):
+        for start in range(0, count, chunk_size):
+            bookings = Booking.objects.bulk_create(
+                Booking(
+                    user=user, guests=2, duration=60, created_at=now,
+                    status='completed' if first_day < today else 'pending',
+                    date=first_day + timedelta(days=rng.randrange(days)),
+                    time=clock_time(rng.randint(11, 21),
+                                    rng.choice([0, 15, 30, 45])))
+                for _ in range(min(chunk_size, count - start)))
+            Through.objects.bulk_create(
+                Through(booking_id=booking.id,
+                        table_id=rng.choice(floor).id)
+                for booking in bookings)
+
+    insert(history, today - timedelta(days=3 * 365), 2 * 365)
+    insert(upcoming, today + timedelta(days=1), 30)
+    return user
+
+
+def timed(function, repeat, undo=None):
+    from bookings.availability import availability_index
+    samples = []
+    for _ in range(repeat):
+        availability_index.clear()
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+        if undo:
+            undo()
+    return statistics.median(samples)
+
+
+def measure(user, day, repeat):
+    from bookings.availability import bookable_times
+    from bookings.intervals import booking_duration
+    from bookings.models import Booking
+    from bookings.services.booking import place_booking
+    # After every upcoming booking of the guest, which end by 22:45, so
+    # the overlap check passes and the tables are allocated too.
+    late = clock_time(23, 0)
+    return {
+        'place_booking': timed(
+            lambda: place_booking(Booking(
+                user=user, guests=6, date=day, time=late,
+                duration=booking_duration(6))),
+            repeat,
+            undo=lambda: Booking.objects.filter(
+                user=user, date=day, time=late).delete()),
+        'availability search': timed(
+            lambda: bookable_times(day, 4), repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--history', type=int, default=1_000_000)
+    parser.add_argument('--upcoming', type=int, default=3000)
+    parser.add_argument('--tables', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_database()
+    from bookings.archive import archive_bookings, months_before
+    from bookings.models import Booking
+
+    started = time.perf_counter()
+    user = fill(args.history, args.upcoming, args.tables, random.Random(1))
+    print(f"Inserted {Booking.objects.count()} bookings in "
+          f"{time.perf_counter() - started:.1f}s")
+
+    day = date.today() + timedelta(days=10)
+    before = measure(user, day, args.repeat)
+
+    started = time.perf_counter()
+    archived = sum(archive_bookings(
+        months_before(date.today(), 6), args.batch_size))
+    elapsed = time.perf_counter() - started
+    print(f"Archived {archived} bookings in {elapsed:.1f}s "
+          f"({archived / elapsed:.0f} rows/s), "
+          f"{Booking.objects.count()} left live")
+
+    after = measure(user, day, args.repeat)
+
+    print(f"{'query':>20} {'before':>10} {'after':>10}")
+    for name in before:
+        print(f"{name:>20} {before[name] * 1000:8.2f}ms "
+              f"{after[name] * 1000:8.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
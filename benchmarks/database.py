@@ -0,0 +1,42 @@
+"""
+The database the benchmarks run against.
+"""
+import os
+import tempfile
+
+
+def setup_database(database_url=None, scratch=False):
+    """
+    Points Django at the benchmark database and migrates it.
+
+    Without ``database_url`` a throwaway SQLite file is created. Any
+    other database must have no bookings or tables yet, unless
+    ``scratch`` says it may be emptied, so a benchmark never wipes a
+    database that is in use.
+    """
+    if database_url is None:
+        database_url = 'sqlite:///' + os.path.join(
+            tempfile.mkdtemp(), 'benchmark.sqlite3')
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'book_my_table.settings')
+    # Nothing here is shared between processes, so no cache table.
+    os.environ.setdefault(
+        'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from bookings.models import ArchivedBooking, Booking, Table
+
+    call_command('migrate', verbosity=0)
+    models = (Booking, ArchivedBooking, Table)
+    if any(model.objects.exists() for model in models):
+        if not scratch:
+            raise SystemExit(
+                'The benchmark database already has bookings or tables. '
+                'Pass --scratch to delete them, if it is only used for '
+                'benchmarks.')
+        for model in models:
+            model.objects.all().delete()
+    return database_url
@@ -0,0 +1,325 @@
+"""
+Replays a trace of booking operations against a synthetic restaurant.
+
+Run with:
+
+    python -m benchmarks.replay --output results.json
+    python -m benchmarks.replay --compare results.json
+
+A local SQLite database is filled with ``--tables`` tables, ``--users``
+users and ``--per-day`` bookings on each of the next ``--days`` dates
+(see ``benchmarks.synthetic``). A seeded trace of ``--operations``
+bookings, edits, cancellations, availability searches and My Bookings
+visits is then replayed twice: through the Django test client, which
+includes middleware, forms and templates, and through the service
+functions behind the views. Both replays start from the same data:
+each runs in a transaction that is rolled back afterwards.
+
+The latency (p50/p95/p99) and the SQL queries of every operation are
+printed, and saved as JSON with ``--output``. ``--compare`` prints the
+change from an earlier run, e.g. one saved on another commit. Query
+capture adds a little to every latency, in both runs alike.
+"""
+import argparse
+import json
+import math
+import random
+import subprocess
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from benchmarks.database import setup_database
+from benchmarks.synthetic import (
+    PARTY_SIZES, make_bookings, make_tables, make_users, random_time)
+
+
+# Operation name to its share of the trace.
+OPERATIONS = {
+    'book': 40,
+    'availability': 20,
+    'my_bookings': 20,
+    'edit': 10,
+    'cancel': 10,
+}
+
+
+def make_trace(users, days, operations, rng):
+    """
+    Returns ``operations`` operations as dicts. Edits and cancellations
+    pick existing bookings at least two days ahead, so the views accept
+    them, and each booking is cancelled at most once.
+    """
+    from bookings.models import Booking
+
+    first_day = date.today() + timedelta(days=2)
+    editable = list(Booking.objects.filter(
+        status='pending', date__gte=first_day
+    ).order_by('id').values_list('id', 'user_id'))
+    rng.shuffle(editable)
+    user_ids = [user.id for user in users]
+    names = list(OPERATIONS)
+    weights = list(OPERATIONS.values())
+
+    trace = []
+    for _ in range(operations):
+        name = rng.choices(names, weights)[0]
+        if name in ('edit', 'cancel'):
+            if not editable:
+                continue
+            booking_id, user_id = (editable.pop() if name == 'cancel'
+                                   else rng.choice(editable))
+            trace.append({'op': name, 'user': user_id,
+                          'booking': booking_id,
+                          'guests': rng.choice(PARTY_SIZES)})
+            continue
+        operation = {
+            'op': name, 'user': rng.choice(user_ids),
+            'date': first_day + timedelta(days=rng.randrange(days - 1)),
+            'guests': rng.choice(PARTY_SIZES),
+        }
+        if name == 'book':
+            operation['time'] = random_time(rng)
+        trace.append(operation)
+    return trace
+
+
+class ClientReplay:
+    """
+    Sends every operation through the test client, logged in as its
+    user.
+    """
+
+    def __init__(self):
+        self.clients = {}
+
+    def client(self, user_id):
+        from django.contrib.auth.models import User
+        from django.test import Client
+        if user_id not in self.clients:
+            client = Client()
+            client.force_login(User.objects.get(id=user_id))
+            self.clients[user_id] = client
+        return self.clients[user_id]
+
+    def prepare(self, operation):
+        self.client(operation['user'])
+
+    def run(self, operation):
+        from django.urls import reverse
+        client = self.client(operation['user'])
+        name = operation['op']
+        if name == 'book':
+            response = client.post(reverse('booking'), {
+                'date': operation['date'], 'time': operation['time'],
+                'guests': operation['guests']})
+        elif name == 'availability':
+            response = client.get(reverse('availability'), {
+                'date': operation['date'], 'guests': operation['guests']})
+        elif name == 'my_bookings':
+            response = client.get(reverse('my_bookings'))
+        elif name == 'edit':
+            response = client.post(
+                reverse('edit_guests', args=[operation['booking']]),
+                {'guests': operation['guests']})
+        else:
+            response = client.get(
+                reverse('cancel_booking', args=[operation['booking']]))
+        if response.status_code >= 400:
+            raise RuntimeError(f'{name} answered {response.status_code}')
+
+
+class ServiceReplay:
+    """
+    Calls the functions behind the views directly, without HTTP,
+    sessions or templates.
+    """
+
+    def __init__(self):
+        self.users = {}
+
+    def user(self, user_id):
+        from django.contrib.auth.models import User
+        if user_id not in self.users:
+            self.users[user_id] = User.objects.get(id=user_id)
+        return self.users[user_id]
+
+    def prepare(self, operation):
+        self.user(operation['user'])
+
+    def run(self, operation):
+        from bookings.availability import bookable_times
+        from bookings.intervals import booking_duration
+        from bookings.models import Booking
+        from bookings.services.booking import (
+            book_tables, cancel, change_guests)
+        from bookings.views import user_bookings_context, user_bookings_queries
+
+        user = self.user(operation['user'])
+        name = operation['op']
+        if name == 'book':
+            book_tables(Booking(
+                user=user, date=operation['date'], time=operation['time'],
+                guests=operation['guests'],
+                duration=booking_duration(operation['guests'])))
+        elif name == 'availability':
+            bookable_times(operation['date'], operation['guests'])
+        elif name == 'my_bookings':
+            user_bookings_context(*user_bookings_queries(user))
+        elif name == 'edit':
+            change_guests(Booking.objects.get(id=operation['booking']),
+                          operation['guests'])
+        else:
+            cancel(Booking.objects.get(id=operation['booking']))
+
+
+def reset_caches():
+    from django.core.cache import cache
+    from bookings.availability import availability_index
+    from bookings.floorplan import floor_plans
+    cache.clear()
+    availability_index.clear()
+    floor_plans.clear()
+
+
+def replay(runner, trace):
+    """
+    Runs the trace in a transaction that is rolled back afterwards.
+
+    Returns:
+    dict: operation name to its (seconds, queries) samples.
+    """
+    from django.db import connection, reset_queries, transaction
+    from django.test.utils import CaptureQueriesContext
+
+    samples = {name: [] for name in OPERATIONS}
+    reset_caches()
+    with transaction.atomic():
+        for operation in trace:
+            runner.prepare(operation)
+            # The query log keeps 9000 queries; start each one empty.
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                runner.run(operation)
+                elapsed = time.perf_counter() - started
+            samples[operation['op']].append((elapsed, len(queries)))
+        transaction.set_rollback(True)
+    reset_caches()
+    return samples
+
+
+def percentile(values, percent):
+    """
+    The nearest-rank percentile of a sorted list.
+    """
+    return values[max(0, math.ceil(len(values) * percent / 100) - 1)]
+
+
+def summarise(samples):
+    summary = {}
+    for name, measured in samples.items():
+        if not measured:
+            continue
+        latencies = sorted(seconds * 1000 for seconds, queries in measured)
+        queries = [count for seconds, count in measured]
+        summary[name] = {
+            'count': len(measured),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'queries_mean': round(sum(queries) / len(queries), 2),
+            'queries_max': max(queries),
+        }
+    return summary
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    print(f"{'replay':>8} {'operation':>12} {'count':>6} {'p50':>9} "
+          f"{'p95':>9} {'p99':>9} {'queries':>8} {'max':>4}")
+    for mode, summary in results.items():
+        for name, row in summary.items():
+            print(f"{mode:>8} {name:>12} {row['count']:>6} "
+                  f"{row['p50_ms']:7.2f}ms {row['p95_ms']:7.2f}ms "
+                  f"{row['p99_ms']:7.2f}ms {row['queries_mean']:>8.1f} "
+                  f"{row['queries_max']:>4}")
+
+
+def print_comparison(before, results):
+    print(f"\nChange from {before.get('commit') or 'the earlier run'}:")
+    print(f"{'replay':>8} {'operation':>12} {'p95':>22} {'queries':>16}")
+    for mode, summary in results.items():
+        for name, row in summary.items():
+            old = before['results'].get(mode, {}).get(name)
+            if not old:
+                continue
+            change = (row['p95_ms'] / old['p95_ms'] - 1) * 100 \
+                if old['p95_ms'] else 0
+            print(f"{mode:>8} {name:>12} "
+                  f"{old['p95_ms']:7.2f} -> {row['p95_ms']:7.2f}ms "
+                  f"{change:+5.0f}% "
+                  f"{old['queries_mean']:6.1f} -> {row['queries_mean']:5.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tables', type=int, default=40)
+    parser.add_argument('--row', type=int, default=0,
+                        help='Tables per row of joinable tables; by '
+                             'default every table can be joined.')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--days', type=int, default=14)
+    parser.add_argument('--per-day', type=int, default=150)
+    parser.add_argument('--operations', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='File to save the results to.')
+    parser.add_argument('--compare', help='Results of an earlier run.')
+    args = parser.parse_args()
+
+    setup_database()
+    from django.test.utils import override_settings, setup_test_environment
+    # Lets the test client in and keeps emails in memory.
+    setup_test_environment()
+
+    rng = random.Random(args.seed)
+    tables = make_tables(args.tables, rng, row=args.row)
+    users = make_users(args.users)
+    bookings = make_bookings(tables, users, args.days, args.per_day, rng)
+    trace = make_trace(users, args.days, args.operations, rng)
+    print(f"{len(tables)} tables, {len(users)} users, {bookings} bookings; "
+          f"replaying {len(trace)} operations")
+
+    # The waitlist is promoted in line rather than on background threads.
+    with override_settings(WAITLIST_PROMOTER_THREADS=0):
+        results = {
+            'client': summarise(replay(ClientReplay(), trace)),
+            'service': summarise(replay(ServiceReplay(), trace)),
+        }
+    print_results(results)
+
+    if args.compare:
+        with open(args.compare) as file:
+            print_comparison(json.load(file), results)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'commit': current_commit(),
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'parameters': vars(args),
+                'restaurant': {'tables': len(tables), 'users': len(users),
+                               'bookings': bookings},
+                'results': results,
+            }, file, indent=2)
+        print(f"Saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
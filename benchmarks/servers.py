@@ -0,0 +1,164 @@
+"""
+Compares requests per second of the WSGI and ASGI deployments.
+
+Run with:
+
+    python -m benchmarks.servers
+
+A local SQLite database is migrated and filled with tables, bookings
+and a logged-in user, then each server is started with gunicorn (sync
+workers for WSGI, uvicorn workers for ASGI) and hit by ``--concurrency``
+clients requesting the availability search and My Bookings pages.
+
+SQLite answers in microseconds; pass ``--database-url`` to measure
+against a PostgreSQL server, where the round trips the async views
+wait on are longer. Use a database of its own: one that already has
+bookings or tables is refused, unless ``--scratch`` is given to
+delete them.
+"""
+import argparse
+import http.client
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time as clock_time, timedelta
+
+from benchmarks.database import setup_database
+
+
+SERVERS = {
+    'wsgi': ['book_my_table.wsgi'],
+    'asgi': ['book_my_table.asgi:application',
+             '-k', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+def fill_database(tables, bookings):
+    """
+    Fills the benchmark database, and returns a session cookie of the
+    benchmark user and the date that was booked.
+    """
+    from django.conf import settings
+    from django.contrib.auth import (
+        BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY)
+    from django.contrib.auth.models import User
+    from django.contrib.sessions.backends.db import SessionStore
+    from bookings.models import Booking, Table
+
+    user, _ = User.objects.get_or_create(username='benchmark')
+
+    rng = random.Random(1)
+    floor = Table.objects.bulk_create(
+        Table(number=number, seats=rng.choice([2, 4, 6]))
+        for number in range(1, tables + 1))
+    day = date.today() + timedelta(days=7)
+    for number in range(bookings):
+        booking = Booking.objects.create(
+            user=user, guests=rng.randint(1, 6), date=day,
+            time=clock_time(rng.randint(11, 21), rng.choice([0, 15, 30])))
+        booking.tables.add(floor[number % len(floor)])
+
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return f'{settings.SESSION_COOKIE_NAME}={session.session_key}', day
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+def request(port, path, cookie):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    started = time.perf_counter()
+    try:
+        connection.request('GET', path, headers={'Cookie': cookie})
+        response = connection.getresponse()
+        response.read()
+        ok = response.status == 200
+    except OSError:
+        ok = False
+    finally:
+        connection.close()
+    return ok, time.perf_counter() - started
+
+
+def load(port, paths, cookie, requests, concurrency):
+    """
+    Sends ``requests`` GETs over ``concurrency`` clients. Returns the
+    requests per second, the latencies and the number of failures.
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(
+            lambda number: request(
+                port, paths[number % len(paths)], cookie),
+            range(requests)))
+    elapsed = time.perf_counter() - started
+    return (len(results) / elapsed,
+            [latency for ok, latency in results],
+            sum(not ok for ok, latency in results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--database-url')
+    parser.add_argument(
+        '--scratch', action='store_true',
+        help='Delete the bookings and tables already in --database-url.')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--tables', type=int, default=30)
+    parser.add_argument('--bookings', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_database(args.database_url, args.scratch)
+    cookie, day = fill_database(args.tables, args.bookings)
+    paths = [f'/availability/?date={day}&guests={guests}'
+             for guests in range(1, 9)] + ['/my-bookings/']
+
+    print(f"{'server':>6} {'req/s':>8} {'p50':>9} {'p95':>9} {'failed':>6}")
+    for name, server in SERVERS.items():
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', *server,
+             '--bind', f'127.0.0.1:{port}',
+             '--workers', str(args.workers), '--log-level', 'warning'],
+            env=dict(os.environ, CACHE_BACKEND=(
+                'django.core.cache.backends.dummy.DummyCache')))
+        try:
+            wait_until_up(port)
+            load(port, paths, cookie, args.concurrency, args.concurrency)
+            rate, latencies, failed = load(
+                port, paths, cookie, args.requests, args.concurrency)
+        finally:
+            process.terminate()
+            process.wait()
+        percentiles = statistics.quantiles(latencies, n=100)
+        print(f"{name:>6} {rate:8.1f} {percentiles[49] * 1000:7.1f}ms "
+              f"{percentiles[94] * 1000:7.1f}ms {failed:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Generates synthetic restaurants for the benchmarks: tables laid out in
+zones, users, and days of bookings packed onto the tables.
+"""
+from datetime import date, time as clock_time, timedelta
+
+
+PARTY_SIZES = (1, 2, 2, 2, 2, 3, 4, 4, 4, 5, 6, 8)
+TABLE_SEATS = (2, 2, 2, 4, 4, 4, 6, 8)
+
+
+def random_time(rng):
+    return clock_time(rng.randint(11, 21), rng.choice([0, 15, 30, 45]))
+
+
+def make_tables(count, rng, row=0):
+    """
+    Creates ``count`` tables. With ``row``, the tables stand in rows of
+    that many, each row its own zone, and every table can be pushed
+    together with the ones beside it.
+    """
+    from bookings.models import Table
+
+    tables = Table.objects.bulk_create(
+        Table(number=number, seats=rng.choice(TABLE_SEATS),
+              turnover=rng.choice([0, 0, 10, 15]),
+              zone=f'Row {(number - 1) // row + 1}' if row else '')
+        for number in range(1, count + 1))
+    if row:
+        Adjacent = Table.adjacent.through
+        Adjacent.objects.bulk_create(
+            Adjacent(from_table_id=table.id, to_table_id=other.id)
+            for index in range(1, len(tables)) if index % row
+            for table, other in ((tables[index], tables[index - 1]),
+                                 (tables[index - 1], tables[index])))
+    return tables
+
+
+def make_users(count):
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+
+    password = make_password('benchmark')
+    return User.objects.bulk_create(
+        User(username=f'guest{number}', email=f'guest{number}@example.com',
+             password=password)
+        for number in range(count))
+
+
+def make_bookings(tables, users, days, per_day, rng, first_day=None):
+    """
+    Books ``per_day`` random parties on each of ``days`` dates from
+    ``first_day`` (tomorrow by default), each on the smallest single
+    table free at its time. Parties that do not fit are dropped.
+
+    Returns:
+    int: The number of bookings created.
+    """
+    from bookings.intervals import booking_duration, interval, overlaps
+    from bookings.models import Booking
+
+    first_day = first_day or date.today() + timedelta(days=1)
+    by_seats = sorted(tables, key=lambda table: table.seats)
+    Through = Booking.tables.through
+    created = 0
+    for day in range(days):
+        booking_date = first_day + timedelta(days=day)
+        taken = {table.id: [] for table in tables}
+        bookings = []
+        chosen = []
+        for _ in range(per_day):
+            guests = rng.choice(PARTY_SIZES)
+            start_time = random_time(rng)
+            duration = booking_duration(guests)
+            for table in by_seats:
+                if table.seats < guests:
+                    continue
+                held = interval(start_time, duration, table.turnover)
+                if not any(overlaps(held, other)
+                           for other in taken[table.id]):
+                    taken[table.id].append(held)
+                    break
+            else:
+                continue
+            bookings.append(Booking(
+                user=rng.choice(users), guests=guests, date=booking_date,
+                time=start_time, duration=duration,
+                status=rng.choice(['pending', 'pending', 'confirmed']),
+                table_numbers=str(table.number), total_seats=table.seats))
+            chosen.append(table)
+        bookings = Booking.objects.bulk_create(bookings)
+        Through.objects.bulk_create(
+            Through(booking_id=booking.id, table_id=table.id)
+            for booking, table in zip(bookings, chosen))
+        created += len(bookings)
+    return created
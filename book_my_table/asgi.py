@@ -3,6 +3,14 @@ ASGI config for book_my_table project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Its requests are routed to the async versions of the booking views by
+``book_my_table.middleware.AsyncURLConfMiddleware``.
+
+The Procfile serves WSGI by default. To serve ASGI instead, set
+WEB_APPLICATION=book_my_table.asgi:application and
+GUNICORN_CMD_ARGS="-k uvicorn.workers.UvicornWorker". Measure it with
+benchmarks/servers.py first: it has been slower than WSGI so far.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -0,0 +1,23 @@
+"""
+URL configuration used by ``asgi.py``.
+
+The same URLs as ``book_my_table.urls``, with the booking views that
+wait on the database replaced by their async versions.
+"""
+from django.urls import path, include
+
+from bookings import urls as bookings_urls
+from .urls import urlpatterns as wsgi_urlpatterns
+
+
+def _async_bookings(pattern):
+    """
+    Swaps the include of ``bookings.urls`` for ``bookings.async_urls``,
+    leaving every other pattern, and the order, as it is.
+    """
+    if getattr(pattern, 'urlconf_module', None) is bookings_urls:
+        return path("", include("bookings.async_urls"), name="bookings-urls")
+    return pattern
+
+
+urlpatterns = [_async_bookings(pattern) for pattern in wsgi_urlpatterns]
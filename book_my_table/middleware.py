@@ -0,0 +1,67 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.handlers.asgi import ASGIRequest
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+# URLs of the requests served by asgi.py.
+ASGI_URLCONF = 'book_my_table.asgi_urls'
+
+
+class AsyncURLConfMiddleware:
+    """
+    Routes the requests served over ASGI by ``ASGI_URLCONF``, which
+    has the async versions of the booking views. WSGI requests, and
+    ``reverse`` outside a request, keep ``settings.ROOT_URLCONF``.
+
+    Must come first, before anything resolves the URL.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if isinstance(request, ASGIRequest):
+            request.urlconf = ASGI_URLCONF
+        return self.get_response(request)
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    ``WhiteNoiseMiddleware`` that also runs in an async middleware chain.
+
+    A sync-only middleware makes Django hand every request to a thread
+    and back under ASGI, so async views would still hold a thread each.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    def _static_response(self, request):
+        # The same lookup as WhiteNoise's own __call__, using only the
+        # attributes that whitenoise 5.x and 6.x both have.
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return None
+
+    async def __acall__(self, request):
+        response = self._static_response(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
+import tempfile
 import dj_database_url
 from django.contrib.messages import constants as messages
 if os.path.isfile('env.py'):
@@ -71,8 +73,10 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 MIDDLEWARE = [
+    'book_my_table.middleware.AsyncURLConfMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'book_my_table.middleware.StaticFilesMiddleware',
+    'bookings.middleware.PerformanceMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -82,11 +86,14 @@ MIDDLEWARE = [
     'allauth.account.middleware.AccountMiddleware',
 ]
 
+# Requests served by asgi.py are routed by book_my_table.asgi_urls
+# instead, see book_my_table.middleware.AsyncURLConfMiddleware.
 ROOT_URLCONF = 'book_my_table.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django templates, with render times recorded per request.
+        'BACKEND': 'bookings.perf.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -110,6 +117,37 @@ DATABASES = {
     'default': dj_database_url.parse(os.environ.get("DATABASE_URL"))
 }
 
+# SQLite tests run on a file rather than in memory, so the threaded
+# booking tests can share the test database between connections, and
+# a connection waits up to 20 seconds for another one's write lock.
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default'].setdefault('OPTIONS', {}).setdefault('timeout', 20)
+    DATABASES['default'].setdefault('TEST', {
+        'NAME': os.path.join(tempfile.gettempdir(),
+                             f'test_book_my_table_{os.getpid()}.sqlite3'),
+    })
+
+# Cache
+# Shared by every process through the database table created by
+# createcachetable (the release step of the Procfile), so every web
+# worker sees the same menu, page and floor plan invalidations, and
+# manage.py perf_report sees the requests of every worker. Tests run
+# on local memory. CACHE_BACKEND and CACHE_LOCATION override either.
+
+TESTING = sys.argv[1:2] == ['test']
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache' if TESTING
+            else 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION',
+            'book-my-table' if TESTING else 'bookings_cache'),
+    }
+}
+
 CSRF_TRUSTED_ORIGINS = [
     "https://*.codeinstitute-ide.net/",
     "https://*.herokuapp.com"
@@ -181,3 +219,64 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Booking availability
+# Seconds before a cached day of table occupancy is reloaded, and whether
+# every load is checked against the database.
+
+BOOKING_AVAILABILITY_TTL = 60
+BOOKING_AVAILABILITY_CHECK = False
+
+# Seconds a process keeps the floor plan (tables and adjacency) when no
+# change to it is seen in the shared cache.
+
+FLOOR_PLAN_TTL = 300
+
+# How free tables are chosen for a party (see bookings.policies), and the
+# past weeks of the same weekday the look-ahead policy expects demand from.
+
+BOOKING_ALLOCATION_POLICY = 'best-fit'
+BOOKING_DEMAND_WEEKS = 4
+
+# Minutes between the start times offered by the availability search.
+
+BOOKING_SEARCH_STEP = 15
+
+# Threads promoting the waitlist after a cancellation (0 leaves it to
+# manage.py promote_waitlist) and entries handled per lock of a date.
+
+WAITLIST_PROMOTER_THREADS = 2
+WAITLIST_BATCH_SIZE = 50
+
+# Background tasks run by manage.py run_worker: threads, tasks claimed at
+# a time, seconds between polls, attempts before giving up, the first
+# retry delay in seconds (doubled on every attempt), seconds before a
+# claimed task is considered lost and days a done task is kept.
+
+TASK_WORKER_THREADS = 4
+TASK_BATCH_SIZE = 50
+TASK_POLL_INTERVAL = 5
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = 30
+TASK_TIMEOUT = 300
+TASK_KEEP_DAYS = 7
+
+# Months of past bookings kept live by manage.py archive_bookings.
+
+BOOKING_ARCHIVE_MONTHS = 6
+
+# Minutes a booking holds its tables, as (largest party, minutes) pairs.
+
+BOOKING_DURATIONS = (
+    (2, 60),
+    (4, 90),
+    (None, 120),
+)
+
+# Requests kept per process by bookings.middleware.PerformanceMiddleware,
+# seconds between copies of them to the cache for manage.py perf_report,
+# and whether staff can read them as JSON at /perf/.
+
+BOOKING_PERF_BUFFER_SIZE = 2000
+BOOKING_PERF_PUBLISH_SECONDS = 30
+BOOKING_PERF_ENDPOINT = os.environ.get('BOOKING_PERF_ENDPOINT') == '1'
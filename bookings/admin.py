@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django_summernote.admin import SummernoteModelAdmin
-from django.core.exceptions import ValidationError
-from .models import Table, Booking, Menu
+from .models import (
+    ArchivedBooking, Table, Booking, Menu, Task, WaitlistEntry)
+from .forms import BookingAdminForm
 
 
 @admin.register(Booking)
@@ -13,11 +14,13 @@ class BookingAdmin(SummernoteModelAdmin):
     - Display of booking details including tables and capacity.
     - Support for manually assigning multiple tables to each booking.
     - Validation to prevent assigning tables that are already booked
-    at the same date and time.
+    at an overlapping time, including each table's turnover.
     """
+    form = BookingAdminForm
     list_display = ('user',
                     'date',
                     'time',
+                    'duration',
                     'guests',
                     'status',
                     'created_at',
@@ -25,37 +28,84 @@ class BookingAdmin(SummernoteModelAdmin):
                     'table_seats')
     search_fields = ['user__username', 'user__first_name', 'user__last_name', ]
     list_filter = ('status', 'created_at',)
+    list_max_show_all = 1000
     filter_horizontal = ['tables']
 
-    def save_model(self, request, obj, form, change):
-        if obj.date and obj.time:
+    def get_queryset(self, request):
+        """
+        Loads the user with each booking. The tables are shown from the
+        booking's own ``table_numbers`` and ``total_seats``.
+        """
+        return super().get_queryset(request).select_related('user')
 
-            for table in form.cleaned_data.get('tables', []):
-                overlapping = Booking.objects.filter(
-                    date=obj.date,
-                    time=obj.time,
-                    tables=table
-                ).exclude(id=obj.id).exclude(status='cancelled')
+    def table_number(self, obj):
+        return obj.table_numbers
+
+    table_number.short_description = 'Table Number'
 
-                if overlapping.exists():
-                    raise ValidationError(
-                        (
-                            f'The table "{table.number}" is already reserved '
-                            f'at this time.'
-                        )
-                    )
+    def table_seats(self, obj):
+        return obj.total_seats
+
+    table_seats.short_description = 'Total seats'
 
-        super().save_model(request, obj, form, change)
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    """
+    Read-only admin interface for the ArchivedBooking model, to look
+    up the booking history moved out of the live table.
+    """
+    list_display = ('id', 'user', 'date', 'time', 'guests', 'status',
+                    'table_number', 'archived_at')
+    list_filter = ('status',)
+    search_fields = ['user__username', 'user__first_name', 'user__last_name', ]
+    date_hierarchy = 'date'
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'user').prefetch_related('tables')
 
     def table_number(self, obj):
-        return ",".join(str(int(table.number)) for table in obj.tables.all())
+        return ",".join(str(table.number) for table in obj.tables.all())
 
     table_number.short_description = 'Table Number'
 
-    def table_seats(self, obj):
-        return ",".join(str(int(table.seats)) for table in obj.tables.all())
+    def has_add_permission(self, request):
+        return False
 
-    table_seats.short_description = 'Capacity'
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    """
+    Admin interface for the WaitlistEntry model.
+
+    Lists the waiting requests in the order they are promoted.
+    """
+    list_display = ('user', 'date', 'time', 'guests', 'status',
+                    'created_at', 'booking')
+    list_filter = ('status', 'date',)
+    search_fields = ['user__username', ]
+    raw_id_fields = ('booking',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'booking')
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """
+    Admin interface for the Task model.
+
+    Shows the queued side effects, with the error of the last failed
+    attempt.
+    """
+    list_display = ('name', 'status', 'attempts', 'run_after',
+                    'created_at', 'last_error')
+    list_filter = ('status', 'name',)
 
 
 @admin.register(Menu)
@@ -79,11 +129,13 @@ class TableAdmin(SummernoteModelAdmin):
     """
     Admin interface for the Table model.
 
-    Lists table_number and seats for display in admin,
-    and enables filtering by number of seats.
+    Lists table_number, seats, turnover and zone for display in admin,
+    enables filtering by number of seats and zone, and lets staff pick
+    the adjacent tables that can be pushed together.
     """
-    list_display = ('table_number', 'seats',)
-    list_filter = ('seats',)
+    list_display = ('table_number', 'seats', 'turnover', 'zone',)
+    list_filter = ('seats', 'zone',)
+    filter_horizontal = ('adjacent',)
 
     def table_number(self, obj):
         return obj.number
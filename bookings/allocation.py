@@ -0,0 +1,225 @@
+import time
+
+
+# Upper bound, in seconds, for a single allocation search.
+DEFAULT_TIME_BUDGET = 0.05
+
+
+def find_table_group(tables, guests, time_budget=DEFAULT_TIME_BUDGET,
+                     least_waste=False):
+    """
+    Choose the tables to seat a party of ``guests``.
+
+    The best group uses the fewest tables and, among those, wastes
+    the fewest seats; with ``least_waste`` it wastes the fewest seats
+    and, among those, uses the fewest tables. It is found with a
+    subset-sum dynamic program over the seat counts, so the cost grows
+    with ``len(tables) * guests`` instead of with every combination of
+    tables.
+
+    tables: tables ordered by preference (e.g. by seats). Each one
+    only needs a ``seats`` attribute.
+
+    time_budget: seconds the search may take. If it runs out, the
+    tables are filled greedily, largest first, instead.
+
+    Returns:
+    list or None: The chosen tables, otherwise None.
+    """
+    tables = list(tables)
+    if guests < 1:
+        guests = 1
+    if sum(table.seats for table in tables) < guests:
+        return None
+
+    deadline = time.monotonic() + time_budget
+
+    # With the fewest possible tables, the total never exceeds
+    # guests + biggest table - 1, otherwise a table could be dropped.
+    limit = guests + max(table.seats for table in tables) - 1
+
+    # fewest[s] is the fewest tables adding up to exactly s seats.
+    fewest = [0] + [None] * limit
+    taken = []
+    for index, table in enumerate(tables):
+        if time.monotonic() > deadline:
+            return _greedy_table_group(tables, guests)
+
+        seats = table.seats
+        took = set()
+        for total in range(limit, seats - 1, -1):
+            previous = fewest[total - seats]
+            if previous is None:
+                continue
+            if fewest[total] is None or previous + 1 < fewest[total]:
+                fewest[total] = previous + 1
+                took.add(total)
+        taken.append(took)
+
+    best_total = None
+    for total in range(guests, limit + 1):
+        if fewest[total] is None:
+            continue
+        if best_total is None or fewest[total] < fewest[best_total]:
+            best_total = total
+            if least_waste:
+                break
+
+    group = []
+    total = best_total
+    for index in range(len(tables) - 1, -1, -1):
+        if total in taken[index]:
+            group.append(tables[index])
+            total -= tables[index].seats
+    group.reverse()
+    return group
+
+
+def _greedy_table_group(tables, guests):
+    """
+    Fill the party with the largest tables first.
+    Used when the search runs out of time.
+    """
+    group = []
+    seated = 0
+    for table in sorted(tables, key=lambda table: table.seats, reverse=True):
+        group.append(table)
+        seated += table.seats
+        if seated >= guests:
+            break
+    # Swap the last table for the smallest one that still fits.
+    needed = guests - (seated - group[-1].seats)
+    for table in sorted(tables, key=lambda table: table.seats):
+        if table.seats >= needed and table not in group[:-1]:
+            group[-1] = table
+            break
+    return sorted(group, key=lambda table: table.seats)
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+def connected_components(neighbours):
+    """
+    Splits a graph, given as node to neighbours, into its connected
+    components.
+    """
+    components = []
+    seen = set()
+    for node in neighbours:
+        if node in seen:
+            continue
+        seen.add(node)
+        component = [node]
+        for member in component:
+            for neighbour in neighbours[member]:
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    component.append(neighbour)
+        components.append(component)
+    return components
+
+
+def find_connected_table_group(tables, guests, neighbours,
+                               time_budget=DEFAULT_TIME_BUDGET,
+                               least_waste=False):
+    """
+    Choose tables that can be pushed together to seat ``guests``.
+
+    Like ``find_table_group``, the best group uses the fewest tables
+    and then wastes the fewest seats (the other way round with
+    ``least_waste``), but only groups that are connected in the
+    adjacency graph are considered. The free tables are first split
+    into connected components, and components without enough seats
+    are skipped. In the others, every connected group is visited once
+    (the ESU enumeration), growing groups only until they seat the
+    party and only while they could still beat the best one.
+
+    tables: the free tables, ordered by preference. Each one needs
+    ``id`` and ``seats`` attributes.
+
+    neighbours: a dict of table id to the ids of its adjacent tables.
+
+    time_budget: seconds the search may take. If it runs out, the
+    largest component is filled greedily instead.
+
+    Returns:
+    list or None: The chosen tables, otherwise None.
+    """
+    if guests < 1:
+        guests = 1
+    by_id = {table.id: table for table in tables}
+    order = {table_id: index for index, table_id in enumerate(by_id)}
+    free = {
+        table_id: [other for other in neighbours.get(table_id, ())
+                   if other in by_id]
+        for table_id in by_id
+    }
+    components = [
+        component for component in connected_components(free)
+        if sum(by_id[table_id].seats for table_id in component) >= guests
+    ]
+    if not components:
+        return None
+
+    deadline = time.monotonic() + time_budget
+    most_seats = max(table.seats for table in tables)
+    best = None
+
+    def extend(group, seats, extension, closed, root):
+        nonlocal best
+        if seats >= guests:
+            key = (seats, len(group)) if least_waste else (len(group), seats)
+            if best is None or key < best[0]:
+                best = (key, group)
+            return
+        # Adding tables only helps while the missing seats could still
+        # fit and, unless wasted seats come first, the group stays
+        # smaller than the best one.
+        if best is None or least_waste:
+            room = len(by_id) - len(group)
+        else:
+            room = best[0][0] - len(group)
+        if room < 1 or seats + room * most_seats < guests:
+            return
+        extension = list(extension)
+        while extension:
+            if time.monotonic() > deadline:
+                raise _OutOfTime
+            table_id = extension.pop()
+            added = [other for other in free[table_id]
+                     if other not in closed and order[other] > order[root]]
+            extend(group + [table_id], seats + by_id[table_id].seats,
+                   extension + added, closed | set(added), root)
+
+    try:
+        for component in components:
+            for root in sorted(component, key=order.get):
+                later = [other for other in free[root]
+                         if order[other] > order[root]]
+                extend([root], by_id[root].seats, later,
+                       {root, *free[root]}, root)
+    except _OutOfTime:
+        return _greedy_connected_group(by_id, free, components, guests)
+
+    return [by_id[table_id] for table_id in sorted(best[1], key=order.get)]
+
+
+def _greedy_connected_group(by_id, free, components, guests):
+    """
+    Grow a group from the largest table of the component with the
+    most seats, adding the largest adjacent table until the party
+    fits. Used when the search runs out of time.
+    """
+    component = max(components, key=lambda component: sum(
+        by_id[table_id].seats for table_id in component))
+    group = [max(component, key=lambda table_id: by_id[table_id].seats)]
+    seated = by_id[group[0]].seats
+    while seated < guests:
+        frontier = {other for table_id in group for other in free[table_id]
+                    if other not in group}
+        table_id = max(frontier, key=lambda table_id: by_id[table_id].seats)
+        group.append(table_id)
+        seated += by_id[table_id].seats
+    return [by_id[table_id] for table_id in group]
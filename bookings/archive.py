@@ -0,0 +1,54 @@
+import calendar
+from django.db import transaction
+from .models import ArchivedBooking, Booking
+
+
+def months_before(day, months):
+    """
+    Returns the date ``months`` months before ``day``, moved back to
+    the end of the month when that month is shorter.
+    """
+    year, month = divmod(day.year * 12 + day.month - 1 - months, 12)
+    month += 1
+    return day.replace(
+        year=year, month=month,
+        day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def archive_bookings(before, batch_size=1000):
+    """
+    Moves the bookings dated before ``before``, with their tables,
+    to ``ArchivedBooking``.
+
+    Each batch of ``batch_size`` bookings is copied and deleted in one
+    transaction, so an interrupted run leaves every booking in exactly
+    one of the two tables and can simply be run again.
+
+    Yields the number of bookings moved by each batch.
+    """
+    Through = Booking.tables.through
+    ArchivedThrough = ArchivedBooking.tables.through
+    while True:
+        with transaction.atomic():
+            bookings = list(Booking.objects.filter(
+                date__lt=before).order_by('id')[:batch_size])
+            if not bookings:
+                return
+            ids = [booking.id for booking in bookings]
+
+            ArchivedBooking.objects.bulk_create([
+                ArchivedBooking(
+                    id=booking.id, user_id=booking.user_id,
+                    guests=booking.guests, date=booking.date,
+                    time=booking.time, duration=booking.duration,
+                    status=booking.status, created_at=booking.created_at)
+                for booking in bookings
+            ])
+            ArchivedThrough.objects.bulk_create([
+                ArchivedThrough(archivedbooking_id=booking_id,
+                                table_id=table_id)
+                for booking_id, table_id in Through.objects.filter(
+                    booking_id__in=ids).values_list('booking_id', 'table_id')
+            ])
+            Booking.objects.filter(id__in=ids).delete()
+        yield len(bookings)
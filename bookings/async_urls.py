@@ -0,0 +1,18 @@
+from django.urls import path
+from . import views
+from .urls import urlpatterns as sync_urlpatterns
+
+# URL name to the async version of its view.
+ASYNC_VIEWS = {
+    'booking': views.create_booking_async,
+    'availability': views.availability_async,
+    'my_bookings': views.my_bookings_async,
+    'cancel_booking': views.cancel_booking_async,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern),
+         ASYNC_VIEWS.get(pattern.name, pattern.callback),
+         name=pattern.name)
+    for pattern in sync_urlpatterns
+]
@@ -0,0 +1,428 @@
+import logging
+import threading
+import time as clock
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import transaction
+from datetime import timedelta
+from django.db.models import F, Sum
+from .models import Booking, BookingLock, Table
+from .floorplan import floor_plan
+from .intervals import (
+    LAST_BOOKING_TIME, MAX_BOOKING_DURATION, MINUTES_PER_DAY, OPENING_TIME,
+    bookable_starts, booking_duration, interval, overlaps, to_minutes,
+    to_time)
+from .services import core
+
+
+logger = logging.getLogger(__name__)
+
+# Hours of the day shown by the capacity heatmap.
+HEATMAP_HOURS = range(OPENING_TIME.hour, LAST_BOOKING_TIME.hour + 1)
+
+# The day is split into slots of this many minutes.
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = MINUTES_PER_DAY // SLOT_MINUTES
+
+
+def slot_mask(start, end):
+    """
+    Returns a bitmap with one bit set for every slot between
+    the ``start`` and ``end`` minutes of the day.
+
+    Partial slots are rounded outwards, so the mask never
+    under-reports occupancy.
+    """
+    first = max(start, 0) // SLOT_MINUTES
+    last = min(-(-end // SLOT_MINUTES), SLOTS_PER_DAY)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def table_conflicts(date, time, duration, table_ids, exclude_booking_id=None):
+    """
+    Finds which of ``table_ids`` are held by another booking that
+    overlaps with a booking of ``duration`` minutes at the given date
+    and time, allowing for each table's turnover.
+
+    All the tables are checked with a single query.
+
+    Returns:
+    list: (table number, booking id, booking time) for every conflict,
+    ordered by table number.
+    """
+    start, end = interval(time, duration)
+    rows = Booking.tables.through.objects.filter(
+        table_id__in=table_ids, booking__date=date
+    ).exclude(booking__status='cancelled')
+    if exclude_booking_id:
+        rows = rows.exclude(booking_id=exclude_booking_id)
+    if start > MAX_BOOKING_DURATION:
+        rows = rows.filter(
+            booking__time__gt=to_time(start - MAX_BOOKING_DURATION))
+
+    conflicts = []
+    for number, turnover, booking_id, booking_time, booking_length in (
+        rows.values_list(
+            'table__number', 'table__turnover', 'booking_id',
+            'booking__time', 'booking__duration')
+    ):
+        if overlaps((start - turnover, end + turnover),
+                    interval(booking_time, booking_length)):
+            conflicts.append((number, booking_id, booking_time))
+    return sorted(conflicts)
+
+
+def _bookable_times_queries(date):
+    return Booking.tables.through.objects.filter(
+        booking__date=date
+    ).exclude(
+        booking__status='cancelled'
+    ).values_list('table_id', 'booking__time', 'booking__duration')
+
+
+def _bookable_times(plan, rows, guests, step):
+    if step is None:
+        step = getattr(settings, 'BOOKING_SEARCH_STEP', 15)
+    duration = booking_duration(guests)
+    tables = [(table.id, table.seats, table.turnover) for table in plan.tables]
+    occupied = [
+        (table_id, *interval(booking_time, booking_length))
+        for table_id, booking_time, booking_length in rows
+    ]
+    starts = bookable_starts(
+        tables, occupied, guests, duration,
+        to_minutes(OPENING_TIME), to_minutes(LAST_BOOKING_TIME), step,
+        groups=plan.groups)
+
+    # The sweep only counts the free seats of each group, so confirm
+    # every start the way ``place_booking`` would: with the slot masks
+    # of the ``availability_index`` and a group of joinable tables.
+    occupancy = {}
+    for table_id, start, end in occupied:
+        occupancy[table_id] = occupancy.get(table_id, 0) | slot_mask(
+            start, end)
+    floor = plan.floor
+    times = []
+    for start in starts:
+        free = [
+            position for position, table_id in enumerate(floor.ids)
+            if table_is_free(start, start + duration,
+                             occupancy.get(table_id, 0),
+                             floor.turnovers[position])
+        ]
+        if core.find_group(floor, free, guests):
+            times.append(to_time(start))
+    return times
+
+
+def bookable_times(date, guests, step=None):
+    """
+    Returns every time between opening and the last booking time at
+    which a party of ``guests`` can be seated on ``date``.
+
+    The tables come from the cached ``floor_plan`` and the day's
+    bookings are loaded with one query, then swept once with
+    ``bookable_starts`` to drop the times at which no group of
+    joinable tables has enough free seats. The remaining times are
+    only offered if the tables free then, checked like
+    ``place_booking`` does, can be pushed together to seat the party.
+
+    step: minutes between candidate times, ``BOOKING_SEARCH_STEP``
+    by default.
+    """
+    return _bookable_times(
+        floor_plan(), list(_bookable_times_queries(date)), guests, step)
+
+
+def remaining_capacity(start_date, days):
+    """
+    Yields (date, seats) for ``days`` dates from ``start_date``, where
+    seats lists the free seats in every hour of ``HEATMAP_HOURS``.
+
+    A table counts as taken for an hour if it is booked at any point
+    during it, however many of its bookings fall in that hour. The
+    booked tables over the whole window are read by a single query,
+    as a stream ordered by date, so each date is yielded as soon as
+    its rows are in.
+    """
+    total_seats = Table.objects.aggregate(total=Sum('seats'))['total'] or 0
+    hours = [(hour * 60, hour * 60 + 60) for hour in HEATMAP_HOURS]
+    end_date = start_date + timedelta(days=days)
+
+    rows = Booking.tables.through.objects.filter(
+        booking__date__gte=start_date, booking__date__lt=end_date
+    ).exclude(
+        booking__status='cancelled'
+    ).order_by('booking__date').values_list(
+        'booking__date', 'booking__time', 'booking__duration',
+        'table_id', 'table__seats')
+
+    def free_seats(taken):
+        return [max(total_seats - sum(tables.values()), 0)
+                for tables in taken]
+
+    day = start_date
+    taken = [{} for _ in hours]
+    for booking_date, booking_time, duration, table_id, seats in (
+        rows.iterator()
+    ):
+        while day < booking_date:
+            yield day, free_seats(taken)
+            day += timedelta(days=1)
+            taken = [{} for _ in hours]
+        booked = interval(booking_time, duration)
+        for index, hour in enumerate(hours):
+            if overlaps(hour, booked):
+                taken[index][table_id] = seats
+
+    while day < end_date:
+        yield day, free_seats(taken)
+        day += timedelta(days=1)
+        taken = [{} for _ in hours]
+
+
+@contextmanager
+def booking_day_lock(date):
+    """
+    Runs the block in a transaction that holds the lock for ``date``.
+
+    Bookings that allocate tables on the same date wait for each other,
+    so tables are only committed while they are still free. The lock is
+    taken with an UPDATE, which blocks concurrent writers on PostgreSQL
+    and SQLite alike.
+
+    The row for a date is inserted the first time it is locked, inside
+    the transaction and ignoring a conflict, so two first bookings of a
+    date wait for each other instead of failing on the unique date.
+
+    The cached occupancy of the date is dropped on entry, so the
+    allocation inside the block sees every committed booking.
+    """
+    lock = BookingLock.objects.filter(date=date)
+    with transaction.atomic():
+        if not lock.update(version=F('version') + 1):
+            BookingLock.objects.bulk_create(
+                [BookingLock(date=date)], ignore_conflicts=True)
+            lock.update(version=F('version') + 1)
+        availability_index.forget(date)
+        yield
+
+
+def table_is_free(start, end, occupancy, turnover):
+    """
+    Whether a table with the given occupancy mask is free between
+    the ``start`` and ``end`` minutes, keeping ``turnover`` minutes
+    clear on either side.
+    """
+    return not occupancy & slot_mask(start - turnover, end + turnover)
+
+
+class _Day:
+    """
+    Occupancy of a single date.
+
+    ``bookings`` maps a booking id to its slot mask and table ids,
+    ``tables`` maps a table id to the OR of the masks booked on it.
+    Turnover buffers are not stored; they are added to the interval
+    being checked instead.
+    """
+
+    def __init__(self):
+        self.loaded_at = clock.monotonic()
+        self.bookings = {}
+        self.tables = {}
+
+    def add(self, booking_id, mask, table_ids):
+        self.bookings[booking_id] = (mask, frozenset(table_ids))
+        for table_id in table_ids:
+            self.tables[table_id] = self.tables.get(table_id, 0) | mask
+
+    def remove(self, booking_id):
+        mask, table_ids = self.bookings.pop(booking_id, (0, frozenset()))
+        for table_id in table_ids:
+            self._rebuild_table(table_id)
+        return mask, table_ids
+
+    def _rebuild_table(self, table_id):
+        occupancy = 0
+        for mask, table_ids in self.bookings.values():
+            if table_id in table_ids:
+                occupancy |= mask
+        if occupancy:
+            self.tables[table_id] = occupancy
+        else:
+            self.tables.pop(table_id, None)
+
+    def occupied(self, start, end, turnovers, exclude_booking_id=None):
+        excluded = self.bookings.get(exclude_booking_id, (0, frozenset()))[1]
+        occupied = set()
+        for table_id, occupancy in self.tables.items():
+            if table_id in excluded:
+                occupancy = 0
+                for booking_id, (other, table_ids) in self.bookings.items():
+                    if booking_id != exclude_booking_id and \
+                            table_id in table_ids:
+                        occupancy |= other
+            turnover = turnovers.get(table_id, 0)
+            if not table_is_free(start, end, occupancy, turnover):
+                occupied.add(table_id)
+        return occupied
+
+
+class AvailabilityIndex:
+    """
+    In-memory occupancy of the tables, keyed by date and table.
+
+    Each date is loaded from the database the first time it is asked
+    for, with a single query, and then kept up to date by the
+    ``Booking`` signals in ``bookings.signals``.
+
+    The index only sees changes made by its own process, so a date is
+    reloaded after ``BOOKING_AVAILABILITY_TTL`` seconds.
+    """
+
+    def __init__(self):
+        self._days = {}
+        self._dates = {}
+        self._lock = threading.RLock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'BOOKING_AVAILABILITY_TTL', 60)
+
+    def clear(self):
+        with self._lock:
+            self._days.clear()
+            self._dates.clear()
+
+    def forget(self, date):
+        with self._lock:
+            day = self._days.pop(date, None)
+            if day:
+                for booking_id in day.bookings:
+                    self._dates.pop(booking_id, None)
+
+    def _load(self, date):
+        day = _Day()
+        rows = Booking.tables.through.objects.filter(
+            booking__date=date
+        ).exclude(
+            booking__status='cancelled'
+        ).values_list(
+            'booking_id', 'table_id', 'booking__time', 'booking__duration')
+
+        booking_tables = {}
+        booking_masks = {}
+        for booking_id, table_id, start_time, duration in rows:
+            booking_tables.setdefault(booking_id, []).append(table_id)
+            booking_masks[booking_id] = slot_mask(
+                *interval(start_time, duration))
+        for booking_id, table_ids in booking_tables.items():
+            day.add(booking_id, booking_masks[booking_id], table_ids)
+        return day
+
+    def _day(self, date):
+        with self._lock:
+            day = self._days.get(date)
+            if day and clock.monotonic() - day.loaded_at < self.ttl:
+                return day
+            self.forget(date)
+            day = self._load(date)
+            self._days[date] = day
+            for booking_id in day.bookings:
+                self._dates[booking_id] = date
+            if getattr(settings, 'BOOKING_AVAILABILITY_CHECK', False):
+                self.check(date)
+            return day
+
+    def occupied_tables(self, date, time, duration, turnovers=None,
+                        exclude_booking_id=None):
+        """
+        Returns the ids of the tables that are taken during a booking
+        of ``duration`` minutes starting at ``time`` on ``date``.
+
+        turnovers: a dict of table id to the table's turnover minutes.
+        """
+        start, end = interval(time, duration)
+        with self._lock:
+            return self._day(date).occupied(
+                start, end, turnovers or {}, exclude_booking_id)
+
+    def update_booking(self, booking, table_ids=None):
+        """
+        Records the current date, time, status and tables of a booking.
+
+        ``table_ids`` defaults to the tables already known for the
+        booking, so a change of time keeps its tables.
+        """
+        with self._lock:
+            previous = self._dates.pop(booking.pk, None)
+            known_tables = frozenset()
+            if previous in self._days:
+                known_tables = self._days[previous].remove(booking.pk)[1]
+            if booking.date not in self._days:
+                return
+            if booking.status == 'cancelled':
+                return
+            if table_ids is None:
+                if previous is None:
+                    table_ids = booking.tables.values_list('id', flat=True)
+                else:
+                    table_ids = known_tables
+            self._days[booking.date].add(
+                booking.pk,
+                slot_mask(*interval(booking.time, booking.duration)),
+                table_ids)
+            self._dates[booking.pk] = booking.date
+
+    def change_tables(self, booking, added=(), removed=(), cleared=False):
+        """
+        Applies an add, remove or clear of a booking's tables.
+        """
+        with self._lock:
+            date = self._dates.get(booking.pk)
+            if date is None:
+                self.update_booking(booking)
+                return
+            table_ids = self._days[date].bookings[booking.pk][1]
+            if cleared:
+                table_ids = frozenset()
+            table_ids = (table_ids | set(added)) - set(removed)
+            self.update_booking(booking, table_ids)
+
+    def remove_booking(self, booking_id):
+        with self._lock:
+            date = self._dates.pop(booking_id, None)
+            if date in self._days:
+                self._days[date].remove(booking_id)
+
+    def check(self, date):
+        """
+        Compares the index for ``date`` with the database.
+
+        Returns a dict of table id to (index mask, database mask) for
+        every table that differs. An inconsistent date is dropped so
+        that it is reloaded on the next read.
+        """
+        with self._lock:
+            day = self._days.get(date)
+            if day is None:
+                return {}
+            expected = self._load(date)
+            mismatches = {}
+            for table_id in set(day.tables) | set(expected.tables):
+                found = day.tables.get(table_id, 0)
+                wanted = expected.tables.get(table_id, 0)
+                if found != wanted:
+                    mismatches[table_id] = (found, wanted)
+            if mismatches:
+                logger.warning(
+                    "Availability index for %s is out of date on tables %s",
+                    date, sorted(mismatches))
+                self.forget(date)
+            return mismatches
+
+
+availability_index = AvailabilityIndex()
@@ -0,0 +1,239 @@
+import csv
+import json
+from itertools import islice
+from django import forms
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from .availability import availability_index
+from .forms import BookingForm
+from .intervals import booking_duration, MAX_BOOKING_DURATION
+from .models import Booking, Table
+
+
+FIELDS = (
+    'id', 'user', 'date', 'time', 'guests', 'duration', 'status',
+    'tables', 'created_at',
+)
+FORMATS = ('csv', 'jsonl')
+
+STATUSES = {value for value, label in Booking.STATUS_CHOICES}
+
+
+class ImportBookingForm(BookingForm):
+    """
+    Applies the ``BookingForm`` rules to an imported row.
+
+    allow_past: skips the "one day in advance" rule, so
+    reservation history can be imported.
+    """
+
+    def __init__(self, *args, allow_past=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.allow_past = allow_past
+
+    def clean_date(self):
+        if self.allow_past:
+            return self.cleaned_data.get('date')
+        return super().clean_date()
+
+
+def booking_to_row(booking):
+    """
+    Converts a booking, with its user and tables loaded, to a row.
+    """
+    return {
+        'id': booking.id,
+        'user': booking.user.username,
+        'date': booking.date.isoformat(),
+        'time': booking.time.strftime('%H:%M'),
+        'guests': booking.guests,
+        'duration': booking.duration,
+        'status': booking.status,
+        'tables': [table.number for table in booking.tables.all()],
+        'created_at': booking.created_at.isoformat(),
+    }
+
+
+def write_rows(rows, output, file_format):
+    """
+    Writes rows to ``output`` one at a time.
+    """
+    if file_format == 'jsonl':
+        for row in rows:
+            output.write(json.dumps(row) + '\n')
+        return
+
+    writer = csv.DictWriter(output, fieldnames=FIELDS)
+    writer.writeheader()
+    for row in rows:
+        row['tables'] = ';'.join(str(number) for number in row['tables'])
+        writer.writerow(row)
+
+
+def read_rows(source, file_format):
+    """
+    Yields (line number, row) pairs from ``source`` without
+    loading the whole file.
+    """
+    if file_format == 'jsonl':
+        for line_number, line in enumerate(source, start=1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError:
+                    yield line_number, None
+        return
+
+    reader = csv.DictReader(source)
+    for row in reader:
+        tables = row.get('tables') or ''
+        row['tables'] = [number for number in tables.split(';') if number]
+        yield reader.line_num, row
+
+
+class RowError(Exception):
+    pass
+
+
+class BookingImporter:
+    """
+    Validates rows and inserts them in batches with ``bulk_create``,
+    together with their ``Booking.tables`` through-rows.
+
+    Users are looked up by username and tables by number. Users are
+    cached as they are seen, so memory grows with the number of
+    users, not rows. The table summary of each booking is filled in
+    from the tables read up front, since ``bulk_create`` sends no
+    ``m2m_changed`` signals.
+
+    The ``created_at`` of every row is kept, so an export can be
+    imported again as history; ``bulk_create`` would otherwise set it
+    to now. The exported ``id`` is not kept.
+
+    on_error: called with the line number and message of every
+    rejected row.
+    """
+
+    def __init__(self, batch_size=1000, allow_past=False, on_error=None):
+        self.batch_size = batch_size
+        self.allow_past = allow_past
+        self.on_error = on_error
+        self.tables = {
+            number: (table_id, seats)
+            for number, table_id, seats in Table.objects.values_list(
+                'number', 'id', 'seats')
+        }
+        self.users = {}
+        self.imported = 0
+        self.skipped = 0
+
+    def user_id(self, username):
+        if username not in self.users:
+            self.users[username] = User.objects.filter(
+                username=username).values_list('id', flat=True).first()
+        if self.users[username] is None:
+            raise RowError(f'unknown user "{username}"')
+        return self.users[username]
+
+    def build(self, row):
+        """
+        Returns an unsaved booking, its table ids and its creation time,
+        if the row has one, for a row.
+        """
+        if not isinstance(row, dict):
+            raise RowError('not a JSON object')
+        form = ImportBookingForm(data={
+            'date': row.get('date'),
+            'time': row.get('time'),
+            'guests': row.get('guests'),
+        }, allow_past=self.allow_past)
+        if not form.is_valid():
+            raise RowError('; '.join(
+                f'{field}: {" ".join(errors)}'
+                for field, errors in form.errors.items()))
+
+        status = row.get('status') or 'pending'
+        if status not in STATUSES:
+            raise RowError(f'unknown status "{status}"')
+
+        guests = form.cleaned_data['guests']
+        duration = row.get('duration') or booking_duration(guests)
+        try:
+            duration = forms.IntegerField(
+                min_value=1, max_value=MAX_BOOKING_DURATION).clean(duration)
+        except forms.ValidationError as error:
+            raise RowError(f'duration: {" ".join(error.messages)}')
+
+        tables = {}
+        for number in row.get('tables') or []:
+            try:
+                tables[int(number)] = self.tables[int(number)]
+            except (KeyError, ValueError):
+                raise RowError(f'unknown table "{number}"')
+        table_ids = [table_id for table_id, seats in tables.values()]
+
+        created_at = row.get('created_at') or None
+        if created_at is not None:
+            try:
+                created_at = parse_datetime(created_at)
+            except (TypeError, ValueError):
+                created_at = None
+            if created_at is None:
+                raise RowError(f'created_at: invalid "{row["created_at"]}"')
+
+        booking = Booking(
+            user_id=self.user_id(row.get('user')),
+            date=form.cleaned_data['date'],
+            time=form.cleaned_data['time'],
+            guests=guests,
+            duration=duration,
+            status=status,
+            table_numbers=','.join(str(number) for number in sorted(tables)),
+            total_seats=sum(seats for table_id, seats in tables.values()),
+        )
+        return booking, table_ids, created_at
+
+    def valid_rows(self, rows):
+        for line_number, row in rows:
+            try:
+                yield self.build(row)
+            except RowError as error:
+                self.skipped += 1
+                if self.on_error:
+                    self.on_error(line_number, str(error))
+
+    def run(self, rows):
+        """
+        Imports the rows and returns the number of bookings created.
+        """
+        valid = self.valid_rows(rows)
+        while True:
+            batch = list(islice(valid, self.batch_size))
+            if not batch:
+                break
+            self.insert(batch)
+            self.imported += len(batch)
+        return self.imported
+
+    @transaction.atomic
+    def insert(self, batch):
+        bookings = Booking.objects.bulk_create(
+            [booking for booking, table_ids, created_at in batch])
+        Through = Booking.tables.through
+        Through.objects.bulk_create([
+            Through(booking_id=booking.id, table_id=table_id)
+            for booking, (_, table_ids, _) in zip(bookings, batch)
+            for table_id in table_ids
+        ])
+        # created_at is set on insert, so the exported one is put back.
+        restored = []
+        for booking, (_, _, created_at) in zip(bookings, batch):
+            if created_at is not None:
+                booking.created_at = created_at
+                restored.append(booking)
+        if restored:
+            Booking.objects.bulk_update(restored, ['created_at'])
+        # bulk_create sends no signals, so drop the cached days instead.
+        for booking in bookings:
+            availability_index.forget(booking.date)
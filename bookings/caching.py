@@ -0,0 +1,125 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+
+MENU_VERSION_KEY = 'bookings:menu-version'
+PAGES_VERSION_KEY = 'bookings:pages-version'
+
+# Seconds a rendered menu fragment is kept; changes invalidate it sooner.
+MENU_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Seconds a fully rendered static page is kept.
+PAGE_CACHE_TIMEOUT = 60 * 60
+
+# URL names of the views using ``CachedPageMixin``.
+CACHED_PAGES = ('home', 'about_us', 'booking_policy')
+
+
+def menu_version():
+    """
+    Returns the current menu version: the time of the last change
+    to a ``Menu``, in milliseconds.
+
+    The version is stored in the cache so every process sharing the
+    cache sees the same one.
+    """
+    return cache.get_or_set(
+        MENU_VERSION_KEY, lambda: int(time.time() * 1000), timeout=None)
+
+
+def invalidate_menu():
+    """
+    Starts a new menu version, so cached fragments and ETags
+    from before the change are no longer used.
+    """
+    version = max(int(time.time() * 1000), menu_version() + 1)
+    cache.set(MENU_VERSION_KEY, version, timeout=None)
+
+
+def has_pending_messages(request):
+    """
+    Whether the page would show messages, which must not be
+    answered with 304 Not Modified.
+    """
+    return len(messages.get_messages(request)) > 0
+
+
+def menu_etag(request):
+    """
+    ETag of the menu page. The page also shows who is logged in,
+    so the user is part of the tag.
+    """
+    if has_pending_messages(request):
+        return None
+    user_id = request.user.pk if request.user.is_authenticated else 0
+    return f'"menu-{menu_version()}-{user_id}"'
+
+
+def menu_last_modified(request):
+    if has_pending_messages(request):
+        return None
+    return datetime.fromtimestamp(menu_version() / 1000, tz=timezone.utc)
+
+
+def pages_version():
+    return cache.get_or_set(PAGES_VERSION_KEY, 1, timeout=None)
+
+
+def invalidate_pages():
+    """
+    Drops every cached static page, e.g. after a deploy.
+    """
+    cache.set(PAGES_VERSION_KEY, pages_version() + 1, timeout=None)
+
+
+class CachedPageMixin:
+    """
+    Serves a ``TemplateView`` from a full-page cache.
+
+    The rendered bytes are cached per page and per user (anonymous
+    visitors share one copy), and answered with ``304 Not Modified``
+    when the browser already has them. Requests with messages to show
+    are rendered normally and not cached.
+    """
+    page_cache_timeout = PAGE_CACHE_TIMEOUT
+
+    def page_cache_key(self, request):
+        user_id = request.user.pk if request.user.is_authenticated else 0
+        return (f'bookings:page:{pages_version()}:'
+                f'{request.resolver_match.url_name}:{user_id}')
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or \
+                has_pending_messages(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = self.page_cache_key(request)
+        page = cache.get(key)
+        if page is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            response.render()
+            page = {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'etag': '"%s"' % hashlib.md5(
+                    response.content, usedforsecurity=False).hexdigest(),
+                'last_modified': time.time(),
+            }
+            cache.set(key, page, self.page_cache_timeout)
+
+        response = HttpResponse(
+            page['content'], content_type=page['content_type'])
+        response['ETag'] = page['etag']
+        response['Last-Modified'] = http_date(page['last_modified'])
+        patch_vary_headers(response, ('Cookie',))
+        return get_conditional_response(
+            request, etag=page['etag'],
+            last_modified=int(page['last_modified']), response=response)
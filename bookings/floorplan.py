@@ -0,0 +1,130 @@
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from .allocation import connected_components
+from .models import Table
+from .services.core import Floor
+
+
+FLOOR_PLAN_VERSION_KEY = 'bookings:floor-plan-version'
+
+
+def floor_plan_version():
+    """
+    Returns the current floor plan version: the time of the last
+    change to a table or its adjacency, in milliseconds.
+    """
+    return cache.get_or_set(
+        FLOOR_PLAN_VERSION_KEY, lambda: int(time.time() * 1000),
+        timeout=None)
+
+
+def invalidate_floor_plan():
+    version = max(int(time.time() * 1000), floor_plan_version() + 1)
+    cache.set(FLOOR_PLAN_VERSION_KEY, version, timeout=None)
+
+
+class FloorPlan:
+    """
+    The tables of the restaurant and which of them can be pushed
+    together.
+
+    Two tables are joinable if they are marked adjacent and stand in
+    the same zone. ``groups`` maps every table id to the connected
+    component of this graph it belongs to, so tables in different
+    groups are never booked together.
+
+    A floor plan without any adjacency keeps the previous behaviour:
+    every table can be joined with every other one.
+
+    ``floor`` holds the same tables, in the same order, as the plain
+    data ``bookings.services.core`` works on.
+    """
+
+    def __init__(self, tables, adjacency):
+        self.tables = sorted(
+            tables, key=lambda table: (table.seats, table.number))
+        self.turnovers = {table.id: table.turnover for table in self.tables}
+        zones = {table.id: table.zone for table in self.tables}
+        self.neighbours = {table.id: set() for table in self.tables}
+        for table_id, other_id in adjacency:
+            if (table_id != other_id and table_id in zones and
+                    zones.get(other_id) == zones[table_id]):
+                self.neighbours[table_id].add(other_id)
+                self.neighbours[other_id].add(table_id)
+        self.joinable = any(self.neighbours.values())
+
+        self.groups = {}
+        if self.joinable:
+            components = connected_components(self.neighbours)
+            for group, component in enumerate(components):
+                for table_id in component:
+                    self.groups[table_id] = group
+        else:
+            self.groups = {table.id: 0 for table in self.tables}
+
+        positions = {table.id: position
+                     for position, table in enumerate(self.tables)}
+        self.floor = Floor(
+            [table.seats for table in self.tables],
+            [table.turnover for table in self.tables],
+            neighbours={
+                positions[table_id]: {positions[other] for other in others}
+                for table_id, others in self.neighbours.items()
+            } if self.joinable else None,
+            ids=list(positions))
+
+
+def load_floor_plan():
+    """
+    Reads the floor plan with two queries: the tables and the
+    adjacency between them.
+    """
+    adjacency = Table.adjacent.through.objects.values_list(
+        'from_table_id', 'to_table_id')
+    return FloorPlan(list(Table.objects.all()), list(adjacency))
+
+
+class FloorPlanCache:
+    """
+    Keeps the floor plan of the current version in memory.
+
+    The version is stored in the cache and moved on by the ``Table``
+    signals in ``bookings.signals``, so every process sharing the cache
+    reloads the plan after a change. The plan is also reloaded after
+    ``FLOOR_PLAN_TTL`` seconds, for processes that do not share it;
+    until then, bookings check the tables they are given against the
+    database (see ``bookings.services.booking.place_booking``).
+    """
+
+    def __init__(self):
+        self._plan = None
+        self._version = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'FLOOR_PLAN_TTL', 300)
+
+    def clear(self):
+        with self._lock:
+            self._plan = None
+
+    def get(self):
+        version = floor_plan_version()
+        with self._lock:
+            if (self._plan is None or self._version != version or
+                    time.monotonic() - self._loaded_at >= self.ttl):
+                self._plan = load_floor_plan()
+                self._version = version
+                self._loaded_at = time.monotonic()
+            return self._plan
+
+
+floor_plans = FloorPlanCache()
+
+
+def floor_plan():
+    return floor_plans.get()
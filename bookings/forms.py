@@ -1,7 +1,9 @@
+from datetime import timedelta
 from django import forms
 from django.utils import timezone
-from datetime import time
 from .models import Booking
+from .availability import table_conflicts
+from .intervals import booking_duration, OPENING_TIME, LAST_BOOKING_TIME
 
 
 class BookingForm(forms.ModelForm):
@@ -41,7 +43,6 @@ class BookingForm(forms.ModelForm):
         Ensures that at least one guest is selected.
         """
         guests = self.cleaned_data.get('guests')
-        print(f" guests recebido: {guests!r} ({type(guests)})")
         if guests is None or guests < 1:
             raise forms.ValidationError("Please select at least 1 guest.")
         return guests
@@ -67,11 +68,73 @@ class BookingForm(forms.ModelForm):
         if not selected_time:
             return selected_time
 
-        opening_time = time(11, 0)
-        last_booking_time = time(22, 0)
-
-        if selected_time < opening_time or selected_time > last_booking_time:
+        if selected_time < OPENING_TIME or selected_time > LAST_BOOKING_TIME:
             raise forms.ValidationError(
                 "Please choose a time between 11:00 am - 22:00 pm"
                 )
         return selected_time
+
+
+class AvailabilityForm(forms.Form):
+    """
+    Form for searching the free start times of a date.
+    """
+    date = forms.DateField()
+    guests = forms.IntegerField(min_value=1, error_messages={
+        'min_value': "Please select at least 1 guest."})
+
+    clean_date = BookingForm.clean_date
+
+
+class CapacityForm(forms.Form):
+    """
+    Form for choosing the window of the capacity calendar.
+
+    The window starts on the first bookable day unless ``start``
+    is given.
+    """
+    start = forms.DateField(required=False)
+    days = forms.IntegerField(required=False, min_value=30, max_value=90)
+
+    def clean_start(self):
+        start = self.cleaned_data.get('start')
+        return start or timezone.localdate() + timedelta(days=1)
+
+    def clean_days(self):
+        return self.cleaned_data.get('days') or 30
+
+
+class BookingAdminForm(forms.ModelForm):
+    """
+    Form used by the admin to edit a booking.
+
+    Rejects tables that are already reserved at an overlapping time,
+    checking all the chosen tables in a single query.
+    """
+    class Meta:
+        model = Booking
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        booking_date = cleaned_data.get('date')
+        booking_time = cleaned_data.get('time')
+        tables = cleaned_data.get('tables')
+
+        if not (booking_date and booking_time and tables) or \
+                cleaned_data.get('status') == 'cancelled':
+            return cleaned_data
+
+        duration = cleaned_data.get('duration') or booking_duration(
+            cleaned_data.get('guests') or 1)
+        conflicts = table_conflicts(
+            booking_date, booking_time, duration,
+            [table.id for table in tables],
+            exclude_booking_id=self.instance.pk)
+
+        for number, booking_id, other_time in conflicts:
+            self.add_error('tables', (
+                f'The table "{number}" is already reserved at this time '
+                f'(booking {booking_id} at {other_time:%H:%M}).'
+            ))
+        return cleaned_data
@@ -0,0 +1,123 @@
+from datetime import time
+from django.conf import settings
+# The one overlap check, shared with the Django-free booking core.
+from .services.core import overlaps  # noqa: F401
+
+
+MINUTES_PER_DAY = 24 * 60
+
+# Bookings may start between these times.
+OPENING_TIME = time(11, 0)
+LAST_BOOKING_TIME = time(22, 0)
+
+# No booking may hold its tables for longer than this, in minutes.
+MAX_BOOKING_DURATION = 240
+
+# (largest party, minutes) pairs; None matches any party size.
+DEFAULT_BOOKING_DURATIONS = (
+    (2, 60),
+    (4, 90),
+    (None, 120),
+)
+
+
+def booking_duration(guests):
+    """
+    Returns how many minutes a party of ``guests`` keeps its tables,
+    following ``settings.BOOKING_DURATIONS``.
+    """
+    durations = getattr(
+        settings, 'BOOKING_DURATIONS', DEFAULT_BOOKING_DURATIONS)
+    for largest_party, minutes in durations:
+        if largest_party is None or guests <= largest_party:
+            return minutes
+    return durations[-1][1]
+
+
+def to_minutes(value):
+    """
+    Converts a time of day to minutes after midnight.
+    """
+    return value.hour * 60 + value.minute
+
+
+def to_time(minutes):
+    """
+    Converts minutes after midnight back to a time of day.
+    """
+    return time(minutes // 60, minutes % 60)
+
+
+def interval(start_time, duration, turnover=0):
+    """
+    Returns the (start, end) minutes a booking holds a table for,
+    including the table's turnover buffer.
+    """
+    start = to_minutes(start_time)
+    return start, start + duration + turnover
+
+
+def bookable_starts(tables, occupied, guests, duration, first, last, step,
+                    groups=None):
+    """
+    Returns every start minute between ``first`` and ``last``, in
+    ``step`` minute increments, at which the free tables of one group
+    have enough seats for ``guests``.
+
+    tables: (table id, seats, turnover) for every table.
+
+    occupied: (table id, start, end) for every booked interval.
+
+    groups: a dict of table id to the group of tables it can be joined
+    with. By default every table can be joined with every other one.
+
+    Instead of checking each start on its own, each booking is turned
+    into the range of starts it blocks on its table, and one sweep over
+    the sorted range edges keeps a running count of free seats in each
+    group.
+    """
+    if groups is None:
+        groups = {}
+    seats = {table_id: (count, turnover)
+             for table_id, count, turnover in tables}
+    free_seats = {}
+    for table_id, (count, turnover) in seats.items():
+        group = groups.get(table_id)
+        free_seats[group] = free_seats.get(group, 0) + count
+
+    # A booked [a, b) blocks the starts s with s < b + turnover and
+    # s + duration + turnover > a, i.e. [a - duration - turnover + 1,
+    # b + turnover). Ranges on the same table are merged first, so
+    # a table's seats are only taken away once.
+    blocked = {}
+    for table_id, start, end in occupied:
+        if table_id not in seats:
+            continue
+        turnover = seats[table_id][1]
+        blocked.setdefault(table_id, []).append(
+            (start - duration - turnover + 1, end + turnover))
+
+    edges = []
+    for table_id, ranges in blocked.items():
+        ranges.sort()
+        merged = [list(ranges[0])]
+        for start, end in ranges[1:]:
+            if start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        group = groups.get(table_id)
+        for start, end in merged:
+            edges.append((start, -seats[table_id][0], group))
+            edges.append((end, seats[table_id][0], group))
+    edges.sort(key=lambda edge: edge[:2])
+
+    starts = []
+    position = 0
+    for minute in range(first, last + 1, step):
+        while position < len(edges) and edges[position][0] <= minute:
+            free_seats[edges[position][2]] += edges[position][1]
+            position += 1
+        if max(free_seats.values(), default=0) >= guests:
+            starts.append(minute)
+    return starts
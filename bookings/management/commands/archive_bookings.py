@@ -0,0 +1,33 @@
+import time
+from datetime import date
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from bookings.archive import archive_bookings, months_before
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves bookings older than --months months, with their tables, "
+        "to the booking archive."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months', type=int,
+            default=getattr(settings, 'BOOKING_ARCHIVE_MONTHS', 6),
+            help='Keep the bookings of this many past months live.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Bookings moved per transaction.')
+
+    def handle(self, *args, **options):
+        before = months_before(date.today(), options['months'])
+        total = 0
+        started = time.monotonic()
+        for count in archive_bookings(before, options['batch_size']):
+            total += count
+            self.stdout.write(f'Archived {total} bookings...')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {total} bookings dated before {before}, '
+            f'{total / elapsed if elapsed else 0:.0f} rows/s.'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from bookings.models import Booking
+from bookings.summaries import refresh_table_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills in Booking.table_numbers and Booking.total_seats from "
+        "the booked tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Bookings updated per query.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        bookings = Booking.objects.order_by('id').values_list('id', flat=True)
+        total = 0
+        last_id = 0
+        while True:
+            batch = list(bookings.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            refresh_table_summaries(batch, batch_size)
+            total += len(batch)
+            last_id = batch[-1]
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated the table summary of {total} bookings.'))
@@ -0,0 +1,80 @@
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Min
+from bookings.models import Booking
+
+
+# The status a past booking moves to, by its current status. Most
+# bookings are never confirmed by staff and stay pending, so a past
+# pending booking counts as honoured unless --pending-as-no-show is
+# given.
+CLOSED_STATUSES = {
+    'confirmed': 'completed',
+    'pending': 'completed',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Marks past confirmed and pending bookings as completed, a range "
+        "of dates at a time. With --pending-as-no-show, past pending "
+        "bookings are marked as no-show instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before', type=date.fromisoformat,
+            help='Close out bookings before this date (YYYY-MM-DD), '
+                 'today by default.')
+        parser.add_argument(
+            '--from-date', type=date.fromisoformat,
+            help='First date to close out; by default the oldest date '
+                 'with an open booking.')
+        parser.add_argument(
+            '--chunk-days', type=int, default=7,
+            help='Dates updated per transaction.')
+        parser.add_argument(
+            '--pending-as-no-show', action='store_true',
+            help='Mark past pending bookings as no-show, for restaurants '
+                 'that confirm every booking they honour.')
+
+    def handle(self, *args, **options):
+        before = options['before'] or date.today()
+        closed_statuses = dict(CLOSED_STATUSES)
+        if options['pending_as_no_show']:
+            closed_statuses['pending'] = 'no-show'
+        open_bookings = Booking.objects.filter(
+            status__in=closed_statuses, date__lt=before)
+        start = options['from_date'] or \
+            open_bookings.aggregate(first=Min('date'))['first']
+        if start is None:
+            self.stdout.write('No bookings to close out.')
+            return
+
+        step = timedelta(days=options['chunk_days'])
+        total = 0
+        started = time.monotonic()
+        while start < before:
+            end = min(start + step, before)
+            chunk_started = time.monotonic()
+            with transaction.atomic():
+                updated = sum(
+                    open_bookings.filter(
+                        status=status, date__gte=start, date__lt=end
+                    ).update(status=closed)
+                    for status, closed in closed_statuses.items())
+            total += updated
+            if updated:
+                self.stdout.write(
+                    f'{start} to {end - timedelta(days=1)}: {updated} '
+                    f'bookings, {self.rate(updated, chunk_started)}')
+            start = end
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Closed out {total} bookings, {self.rate(total, started)}.'))
+
+    def rate(self, rows, started):
+        elapsed = time.monotonic() - started
+        return f'{rows / elapsed if elapsed else 0:.0f} rows/s'
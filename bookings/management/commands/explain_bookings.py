@@ -0,0 +1,74 @@
+from datetime import date, time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from bookings.models import Booking
+
+
+def hot_queries(day, user_id):
+    """
+    The booking queries run on every booking request and page view.
+    """
+    active = Booking.objects.exclude(status='cancelled')
+    return {
+        'day occupancy': Booking.tables.through.objects.filter(
+            booking__date=day).exclude(booking__status='cancelled'),
+        'overlap window': active.filter(
+            date=day, time__gt=time(15, 0), time__lt=time(20, 0)),
+        'user overlap': active.filter(user_id=user_id, date=day),
+        'my bookings': Booking.objects.filter(
+            user_id=user_id, date__gte=day).order_by('date', 'time'),
+    }
+
+
+def used_indexes(plan):
+    """
+    Returns the names of the Booking indexes mentioned in a plan.
+    """
+    return [index.name for index in Booking._meta.indexes
+            if index.name in plan]
+
+
+class Command(BaseCommand):
+    help = (
+        "Shows the database plan for the hot booking queries and "
+        "which Booking indexes they use."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date', type=date.fromisoformat, default=date.today(),
+            help='Date to plan the queries for (YYYY-MM-DD).')
+        parser.add_argument(
+            '--user', type=int, default=1,
+            help='User id to plan the per-user queries for.')
+        parser.add_argument(
+            '--no-seqscan', action='store_true',
+            help='On PostgreSQL, discourage sequential scans so the '
+                 'plan shows the indexes even on a small table.')
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='Fail if a query does not use any Booking index.')
+
+    def handle(self, *args, **options):
+        if options['no_seqscan'] and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+        missing = []
+        for name, queryset in hot_queries(
+                options['date'], options['user']).items():
+            plan = queryset.explain()
+            indexes = used_indexes(plan)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name}:'))
+            self.stdout.write(plan)
+            if indexes:
+                self.stdout.write(
+                    self.style.SUCCESS(f"uses {', '.join(indexes)}"))
+            else:
+                self.stdout.write(self.style.WARNING('uses no Booking index'))
+                missing.append(name)
+            self.stdout.write('')
+
+        if missing and options['strict']:
+            raise CommandError(
+                f"No Booking index used by: {', '.join(missing)}")
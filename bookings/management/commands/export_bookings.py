@@ -0,0 +1,46 @@
+from datetime import date
+from django.core.management.base import BaseCommand
+from bookings.bulk import FORMATS, booking_to_row, write_rows
+from bookings.models import Booking
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams bookings, with their user and tables, to CSV or JSONL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='-',
+            help='File to write to; "-" writes to standard output.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument(
+            '--from-date', type=date.fromisoformat,
+            help='First booking date to export (YYYY-MM-DD).')
+        parser.add_argument(
+            '--to-date', type=date.fromisoformat,
+            help='Last booking date to export (YYYY-MM-DD).')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Bookings fetched from the database at a time.')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        file_format = options['format'] or (
+            'jsonl' if output.endswith('.jsonl') else 'csv')
+
+        bookings = Booking.objects.select_related('user').prefetch_related(
+            'tables').order_by('id')
+        if options['from_date']:
+            bookings = bookings.filter(date__gte=options['from_date'])
+        if options['to_date']:
+            bookings = bookings.filter(date__lte=options['to_date'])
+
+        rows = (booking_to_row(booking) for booking in
+                bookings.iterator(chunk_size=options['chunk_size']))
+
+        if output == '-':
+            write_rows(rows, self.stdout, file_format)
+        else:
+            with open(output, 'w', newline='', encoding='utf-8') as file:
+                write_rows(rows, file, file_format)
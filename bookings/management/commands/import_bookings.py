@@ -0,0 +1,49 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from bookings.bulk import FORMATS, BookingImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams bookings from CSV or JSONL into the database in batches. "
+        "Rows are checked with the BookingForm rules; invalid rows are "
+        "reported and skipped. Each row's created_at is kept; its id is "
+        "not, so bookings get new ids."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='File to read; "-" reads standard input.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Bookings inserted per bulk_create.')
+        parser.add_argument(
+            '--allow-past', action='store_true',
+            help='Accept bookings that are not at least one day ahead, '
+                 'e.g. when importing history.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'jsonl' if path.endswith('.jsonl') else 'csv')
+        importer = BookingImporter(
+            batch_size=options['batch_size'],
+            allow_past=options['allow_past'],
+            on_error=self.report)
+
+        if path == '-':
+            importer.run(read_rows(sys.stdin, file_format))
+        else:
+            try:
+                with open(path, newline='', encoding='utf-8') as file:
+                    importer.run(read_rows(file, file_format))
+            except OSError as error:
+                raise CommandError(error)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {importer.imported} bookings, '
+            f'skipped {importer.skipped} rows.'))
+
+    def report(self, line_number, error):
+        self.stderr.write(f'line {line_number}: {error}')
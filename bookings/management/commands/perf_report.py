@@ -0,0 +1,56 @@
+import json
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from bookings.perf import perf_log, perf_report
+
+
+class Command(BaseCommand):
+    help = (
+        "Shows the wall time, SQL queries and template render time per "
+        "URL name, as recorded by PerformanceMiddleware and published to "
+        "the cache by every process. The cache must be shared between "
+        "processes, as the default DatabaseCache is; with a LocMemCache "
+        "or DummyCache this command cannot see the web processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Print the report as JSON.')
+        parser.add_argument(
+            '--limit', type=int,
+            help='Show only the views running the most queries.')
+
+    def handle(self, *args, **options):
+        cache = caches['default']
+        if isinstance(cache, (LocMemCache, DummyCache)):
+            self.stderr.write(self.style.WARNING(
+                f'The {type(cache).__name__} cache is not shared between '
+                f'processes, so the requests of the web processes cannot '
+                f'be seen. Point CACHE_BACKEND at a shared cache.'))
+        records = perf_log.collect()
+        report = perf_report(records)[:options['limit']]
+        if options['json']:
+            self.stdout.write(json.dumps(
+                {'requests': len(records), 'views': report}, indent=2))
+            return
+        if not records:
+            self.stdout.write(
+                'No requests recorded. The web processes publish theirs '
+                'every BOOKING_PERF_PUBLISH_SECONDS to a cache shared '
+                'through CACHE_BACKEND.')
+            return
+
+        self.stdout.write(
+            f"{'view':<40} {'requests':>8} {'errors':>6} {'p50 ms':>8} "
+            f"{'p95 ms':>8} {'p99 ms':>8} {'queries':>7} {'max':>4} "
+            f"{'sql ms':>7} {'tmpl ms':>7}")
+        for row in report:
+            self.stdout.write(
+                f"{row['view']:<40} {row['requests']:>8} "
+                f"{row['errors']:>6} {row['wall_p50_ms']:>8.1f} "
+                f"{row['wall_p95_ms']:>8.1f} {row['wall_p99_ms']:>8.1f} "
+                f"{row['queries_mean']:>7.1f} {row['queries_max']:>4} "
+                f"{row['sql_mean_ms']:>7.1f} {row['template_mean_ms']:>7.1f}")
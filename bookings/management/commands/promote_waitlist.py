@@ -0,0 +1,47 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand
+from bookings.models import WaitlistEntry
+from bookings.waitlist import promote_waitlist
+
+
+class Command(BaseCommand):
+    help = (
+        "Books tables for waitlisted requests that fit now, oldest "
+        "first. Runs once, or as a worker with --interval."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date', type=date.fromisoformat,
+            help='Only promote the waitlist of this date (YYYY-MM-DD).')
+        parser.add_argument(
+            '--interval', type=float,
+            help='Keep running, checking every INTERVAL seconds.')
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        while True:
+            self.promote(options['date'], options['batch_size'])
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def promote(self, only_date, batch_size):
+        today = date.today()
+        expired = WaitlistEntry.objects.filter(
+            status='waiting', date__lt=today).update(status='cancelled')
+        if expired:
+            self.stdout.write(f'Expired {expired} past entries.')
+
+        dates = WaitlistEntry.objects.filter(
+            status='waiting', date__gte=today
+        ).order_by('date').values_list('date', flat=True).distinct()
+        if only_date:
+            dates = dates.filter(date=only_date)
+
+        for waitlist_date in list(dates):
+            promoted = promote_waitlist(waitlist_date, batch_size)
+            if promoted:
+                self.stdout.write(
+                    f'Promoted {len(promoted)} entries on {waitlist_date}.')
@@ -0,0 +1,48 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from bookings.tasks import Worker, purge_tasks
+
+# Seconds between purges of the tasks that are done.
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the queued tasks, such as booking emails, and deletes "
+        "the ones done more than TASK_KEEP_DAYS ago. Keeps polling "
+        "for new tasks unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int,
+            help='Threads running tasks (TASK_WORKER_THREADS).')
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Tasks claimed at a time (TASK_BATCH_SIZE).')
+        parser.add_argument(
+            '--interval', type=float,
+            default=getattr(settings, 'TASK_POLL_INTERVAL', 5),
+            help='Seconds to wait when no task is due.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Run the tasks that are due now, then exit.')
+
+    def handle(self, *args, **options):
+        worker = Worker(options['threads'], options['batch_size'])
+        purged_at = None
+        while True:
+            if purged_at is None or \
+                    time.monotonic() - purged_at >= PURGE_INTERVAL:
+                purged = purge_tasks()
+                purged_at = time.monotonic()
+                if purged:
+                    self.stdout.write(f'Purged {purged} done tasks.')
+            count = worker.run_once()
+            if count:
+                self.stdout.write(f'Ran {count} tasks.')
+            if options['once']:
+                return
+            if not count:
+                time.sleep(options['interval'])
@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from bookings.floorplan import floor_plan
+from bookings.policies import POLICIES
+from bookings.simulation import day_requests, simulate_day
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays the bookings of past dates, in the order they were "
+        "made, through each allocation policy on an empty floor plan, "
+        "and reports the seats filled and the rejections."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'date', type=date.fromisoformat,
+            help='First date to replay (YYYY-MM-DD).')
+        parser.add_argument(
+            '--days', type=int, default=1,
+            help='Number of dates to replay.')
+        parser.add_argument(
+            '--policy', action='append', dest='policies',
+            help='Policy to replay; every policy by default. '
+                 'May be given more than once.')
+
+    def handle(self, *args, **options):
+        policies = options['policies'] or list(POLICIES)
+        for name in policies:
+            if name not in POLICIES:
+                raise CommandError(f'Unknown allocation policy "{name}"')
+
+        plan = floor_plan()
+        days = [(options['date'] + timedelta(days=day))
+                for day in range(options['days'])]
+        requests = {day: day_requests(day) for day in days}
+        total = sum(len(rows) for rows in requests.values())
+        self.stdout.write(
+            f'Replaying {total} bookings over {len(days)} days on '
+            f'{len(plan.tables)} tables.')
+
+        self.stdout.write(
+            f"{'policy':<12} {'seated':>7} {'rejected':>8} "
+            f"{'seats':>7} {'cpu ms':>8} {'seats/cpu s':>11} "
+            f"{'rejected/cpu s':>14}")
+        for name in policies:
+            results = [simulate_day(plan, day, requests[day], name)
+                       for day in days]
+            seated = sum(result['seated'] for result in results)
+            rejected = sum(result['rejected'] for result in results)
+            seats = sum(result['seats_filled'] for result in results)
+            cpu = sum(result['cpu_seconds'] for result in results)
+            self.stdout.write(
+                f'{name:<12} {seated:>7} {rejected:>8} {seats:>7} '
+                f'{cpu * 1000:>8.1f} {self.per_second(seats, cpu):>11.0f} '
+                f'{self.per_second(rejected, cpu):>14.0f}')
+
+    def per_second(self, count, cpu):
+        return count / cpu if cpu else 0
@@ -0,0 +1,28 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from bookings.caching import CACHED_PAGES, invalidate_pages
+
+
+class Command(BaseCommand):
+    help = (
+        "Drops the cached static pages and renders them again for "
+        "anonymous visitors, e.g. after a deploy."
+    )
+
+    def handle(self, *args, **options):
+        invalidate_pages()
+        factory = RequestFactory()
+        for name in CACHED_PAGES:
+            path = reverse(name)
+            request = factory.get(path)
+            request.user = AnonymousUser()
+            request.resolver_match = resolve(path)
+            response = request.resolver_match.func(request)
+            if response.status_code != 200:
+                raise CommandError(
+                    f'{path} answered {response.status_code}')
+            self.stdout.write(f'Cached {path}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Warmed {len(CACHED_PAGES)} pages.'))
@@ -0,0 +1,107 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from .perf import PerfRecord, RequestStats, current_stats, perf_log
+
+
+class PerformanceMiddleware:
+    """
+    Records, for every request resolved to a URL name, the wall time,
+    the number and time of its SQL queries and the time spent rendering
+    templates, into the ring buffer of ``bookings.perf``.
+
+    Queries are counted by a database execute wrapper and templates
+    timed by the ``bookings.perf.DjangoTemplates`` backend, so nothing
+    depends on ``DEBUG``. The cost is a few clock reads per query and
+    one append per request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats, started)
+
+    def finish(self, request, response, stats, started):
+        """
+        Records the request, or, for a streaming response, wraps its
+        content so the request is recorded once the body is sent,
+        counting the queries run while it streams.
+        """
+        if getattr(request, 'resolver_match', None) is None:
+            return response
+        if not response.streaming:
+            self.record(request, response, stats,
+                        time.perf_counter() - started)
+        elif response.is_async:
+            response.streaming_content = self._astream(
+                request, response, stats, started,
+                response.streaming_content)
+        else:
+            response.streaming_content = self._stream(
+                request, response, stats, started,
+                response.streaming_content)
+        return response
+
+    def _stream(self, request, response, stats, started, content):
+        # The stats are set around each chunk only, as the server may
+        # pull the chunks from another context than the request's.
+        chunks = iter(content)
+        try:
+            while True:
+                token = current_stats.set(stats)
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    return
+                finally:
+                    current_stats.reset(token)
+                yield chunk
+        finally:
+            self.record(request, response, stats,
+                        time.perf_counter() - started)
+
+    async def _astream(self, request, response, stats, started, content):
+        chunks = aiter(content)
+        try:
+            while True:
+                token = current_stats.set(stats)
+                try:
+                    chunk = await anext(chunks)
+                except StopAsyncIteration:
+                    return
+                finally:
+                    current_stats.reset(token)
+                yield chunk
+        finally:
+            self.record(request, response, stats,
+                        time.perf_counter() - started)
+
+    def record(self, request, response, stats, wall):
+        match = request.resolver_match
+        perf_log.add(PerfRecord(
+            time.time(), match.view_name, request.method,
+            response.status_code, wall, stats.queries, stats.sql,
+            stats.template))
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.20 on 2026-10-18 10:00
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_menu_menu_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='duration',
+            field=models.PositiveIntegerField(blank=True, default=60, help_text='Minutes the booking holds its tables.', validators=[django.core.validators.MaxValueValidator(240)]),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='table',
+            name='turnover',
+            field=models.PositiveIntegerField(default=0, help_text='Minutes needed to reset the table after a booking.'),
+        ),
+    ]
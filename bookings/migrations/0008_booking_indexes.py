@@ -0,0 +1,25 @@
+# Generated by Django 4.2.20 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_booking_duration_table_turnover'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['date', 'time', 'status'], name='booking_date_time_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'date', 'time'], name='booking_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'cancelled'), _negated=True), fields=['date', 'time'], name='booking_active_date_time_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.20 on 2026-10-18 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0011_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('guests', models.PositiveIntegerField()),
+                ('date', models.DateField()),
+                ('time', models.TimeField()),
+                ('duration', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled'), ('no-show', 'No-show'), ('completed', 'Completed')], max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('tables', models.ManyToManyField(blank=True, related_name='archived_bookings', to='bookings.table')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date', '-time'],
+                'indexes': [models.Index(fields=['date', 'time'], name='archived_booking_date_idx'), models.Index(fields=['user', 'date'], name='archived_booking_user_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.20 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_archivedbooking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='table_numbers',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Numbers of the booked tables, kept in step with tables.', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='total_seats',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Seats of the booked tables, kept in step with tables.'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0013_booking_table_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='table',
+            name='zone',
+            field=models.CharField(blank=True, default='', help_text='Area of the room, e.g. "Terrace".', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='table',
+            name='adjacent',
+            field=models.ManyToManyField(blank=True, help_text='Tables in the same zone that can be pushed together with this one.', to='bookings.table'),
+        ),
+    ]
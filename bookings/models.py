@@ -1,16 +1,31 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
+from django.core.validators import MaxValueValidator
 from cloudinary.models import CloudinaryField
+from .intervals import booking_duration, MAX_BOOKING_DURATION
 
 
 # Create your models here.
 class Table(models.Model):
     """
-    Stores a single table, including its unique number
-    and seating capacity.
+    Stores a single table, including its unique number,
+    seating capacity, the minutes needed to turn it over
+    between bookings, and where it stands on the floor plan:
+    its zone and the tables it can be pushed together with.
     """
     number = models.PositiveIntegerField(unique=True)
     seats = models.PositiveIntegerField()
+    turnover = models.PositiveIntegerField(
+        default=0,
+        help_text='Minutes needed to reset the table after a booking.')
+    zone = models.CharField(
+        max_length=50, blank=True, default='',
+        help_text='Area of the room, e.g. "Terrace".')
+    adjacent = models.ManyToManyField(
+        'self', blank=True,
+        help_text='Tables in the same zone that can be pushed together '
+                  'with this one.')
 
     class Meta:
         ordering = ['number']
@@ -24,8 +39,14 @@ class Booking(models.Model):
     Represents a booking made by a user (:model: `auth.User`)
     for a specific date and time.
     Each booking may be linked to one or more tables (:model:`bookings.Table`)
-    and includes information such as number of guests,
+    and includes information such as number of guests, duration,
     status, and creation timestamp.
+
+    ``table_numbers`` and ``total_seats`` copy the booked tables, so
+    lists can show them without a join. They are kept in step by the
+    signals in ``bookings.signals``.
+
+    When no duration is given, it is derived from the number of guests.
     """
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -39,15 +60,42 @@ class Booking(models.Model):
     guests = models.PositiveIntegerField()
     date = models.DateField()
     time = models.TimeField()
+    duration = models.PositiveIntegerField(
+        blank=True,
+        validators=[MaxValueValidator(MAX_BOOKING_DURATION)],
+        help_text='Minutes the booking holds its tables.')
     tables = models.ManyToManyField(Table)
     status = models.CharField(
         max_length=10,
         choices=STATUS_CHOICES,
         default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
+    table_numbers = models.CharField(
+        max_length=200, blank=True, default='', editable=False,
+        help_text='Numbers of the booked tables, kept in step with tables.')
+    total_seats = models.PositiveIntegerField(
+        default=0, editable=False,
+        help_text='Seats of the booked tables, kept in step with tables.')
 
     class Meta:
         ordering = ['date', 'time']
+        indexes = [
+            models.Index(
+                fields=['date', 'time', 'status'],
+                name='booking_date_time_status_idx'),
+            models.Index(
+                fields=['user', 'date', 'time'],
+                name='booking_user_date_idx'),
+            models.Index(
+                fields=['date', 'time'],
+                condition=~models.Q(status='cancelled'),
+                name='booking_active_date_time_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.duration:
+            self.duration = booking_duration(self.guests)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return (
@@ -56,6 +104,148 @@ class Booking(models.Model):
         )
 
 
+class ArchivedBooking(models.Model):
+    """
+    A booking moved out of :model:`bookings.Booking` by
+    ``manage.py archive_bookings``, keeping its id and tables, so the
+    live table only holds recent and upcoming bookings.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='archived_bookings')
+    guests = models.PositiveIntegerField()
+    date = models.DateField()
+    time = models.TimeField()
+    duration = models.PositiveIntegerField()
+    tables = models.ManyToManyField(
+        Table, blank=True, related_name='archived_bookings')
+    status = models.CharField(
+        max_length=10,
+        choices=Booking.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-date', '-time']
+        indexes = [
+            models.Index(
+                fields=['date', 'time'],
+                name='archived_booking_date_idx'),
+            models.Index(
+                fields=['user', 'date'],
+                name='archived_booking_user_idx'),
+        ]
+
+    def __str__(self):
+        return (
+            f"Archived booking by {self.user.username} on {self.date} at "
+            f"{self.time}"
+        )
+
+
+class BookingLock(models.Model):
+    """
+    One row per booking date, updated to serialise the bookings
+    that allocate tables on that date.
+    """
+    date = models.DateField(unique=True)
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Booking lock for {self.date}"
+
+
+class WaitlistEntry(models.Model):
+    """
+    A booking request by a user (:model: `auth.User`) that could not
+    be seated. Entries are promoted to a :model:`bookings.Booking`
+    in the order they were made, once tables are freed on their date.
+    A user has at most one waiting entry for a date and time.
+    """
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('promoted', 'Promoted'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    guests = models.PositiveIntegerField()
+    date = models.DateField()
+    time = models.TimeField()
+    duration = models.PositiveIntegerField(
+        help_text='Minutes the booking would hold its tables.')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='waiting')
+    booking = models.OneToOneField(
+        Booking, null=True, blank=True, on_delete=models.SET_NULL,
+        help_text='The booking the entry was promoted to.')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        verbose_name_plural = 'waitlist entries'
+        indexes = [
+            models.Index(
+                fields=['date', 'created_at', 'id'],
+                condition=models.Q(status='waiting'),
+                name='waitlist_waiting_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'date', 'time'],
+                condition=models.Q(status='waiting'),
+                name='waitlist_one_waiting_entry'),
+        ]
+
+    def __str__(self):
+        return (
+            f"Waitlist entry by {self.user.username} on {self.date} at "
+            f"{self.time} for {self.guests}"
+        )
+
+
+class Task(models.Model):
+    """
+    A side effect of a request, such as an email, stored in the same
+    transaction as the change that caused it and run later by
+    ``manage.py run_worker``.
+
+    ``run_after`` is when the task may next be claimed: after a retry
+    delay, or once a claimed task has been running for too long.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            models.Index(
+                fields=['run_after', 'id'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='task_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
 class Menu(models.Model):
     """
     Stores a single menu, including menus name,
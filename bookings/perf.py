@@ -0,0 +1,209 @@
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from collections import deque, namedtuple
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+
+logger = logging.getLogger(__name__)
+
+PERF_PROCESSES_KEY = 'bookings:perf:processes'
+
+# Seconds a published snapshot is kept after its process stops.
+PERF_SNAPSHOT_TIMEOUT = 60 * 60
+
+# A recorded request. Times are in seconds.
+PerfRecord = namedtuple('PerfRecord', (
+    'at', 'view', 'method', 'status', 'wall', 'queries', 'sql', 'template'))
+
+
+class RequestStats:
+    """
+    The SQL and template work of the request being handled.
+    """
+    __slots__ = ('queries', 'sql', 'template', 'rendering')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.template = 0.0
+        self.rendering = 0
+
+
+# Set by ``PerformanceMiddleware`` for the duration of a request. Being
+# a context variable, it follows async views into ``sync_to_async``.
+current_stats = ContextVar('bookings_perf_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper that counts and times the queries of the
+    current request.
+    """
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.sql += time.perf_counter() - started
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class Template(django_backend.Template):
+    """
+    A Django template that adds its render time to the current request.
+    Templates rendered while another one renders (e.g. by a template
+    tag) are only counted once.
+    """
+
+    def render(self, context=None, request=None):
+        stats = current_stats.get()
+        if stats is None or stats.rendering:
+            return super().render(context, request)
+        stats.rendering += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.rendering -= 1
+            stats.template += time.perf_counter() - started
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """
+    The Django template backend, with templates timed by
+    ``PerformanceMiddleware``.
+    """
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
+
+
+class PerformanceLog:
+    """
+    Ring buffer of the last ``BOOKING_PERF_BUFFER_SIZE`` requests
+    handled by this process.
+
+    Every ``BOOKING_PERF_PUBLISH_SECONDS`` the buffer is also copied to
+    the cache, so ``manage.py perf_report`` and the JSON endpoint can
+    see the requests of every process sharing the cache.
+    """
+
+    def __init__(self):
+        self._records = None
+        self._published_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.key = (f'bookings:perf:{socket.gethostname()}:'
+                    f'{os.getpid()}')
+
+    @property
+    def records(self):
+        if self._records is None:
+            with self._lock:
+                if self._records is None:
+                    self._records = deque(maxlen=getattr(
+                        settings, 'BOOKING_PERF_BUFFER_SIZE', 2000))
+        return self._records
+
+    def add(self, record):
+        self.records.append(record)
+        interval = getattr(settings, 'BOOKING_PERF_PUBLISH_SECONDS', 30)
+        if interval and time.monotonic() - self._published_at >= interval:
+            self._published_at = time.monotonic()
+            try:
+                self.publish()
+            except Exception:
+                logger.exception("Could not publish the request timings")
+
+    def clear(self):
+        with self._lock:
+            self._records = None
+
+    def publish(self):
+        cache.set(self.key, list(self.records), PERF_SNAPSHOT_TIMEOUT)
+        processes = cache.get(PERF_PROCESSES_KEY) or []
+        if self.key not in processes:
+            cache.set(PERF_PROCESSES_KEY, processes + [self.key], None)
+
+    def collect(self):
+        """
+        Returns the requests of this process and those last published
+        by the others.
+        """
+        records = list(self.records)
+        processes = [key for key in cache.get(PERF_PROCESSES_KEY) or []
+                     if key != self.key]
+        snapshots = cache.get_many(processes)
+        for snapshot in snapshots.values():
+            records.extend(snapshot)
+        if len(snapshots) < len(processes):
+            cache.set(PERF_PROCESSES_KEY, [self.key, *snapshots], None)
+        return records
+
+
+perf_log = PerformanceLog()
+
+
+def _percentile(values, percent):
+    """
+    The nearest-rank percentile of a sorted list.
+    """
+    return values[max(0, math.ceil(len(values) * percent / 100) - 1)]
+
+
+def perf_report(records):
+    """
+    Sums up requests per URL name, the views running the most queries
+    first.
+
+    Returns:
+    list: A dict per URL name with the requests, server errors, wall
+    time percentiles and the mean SQL queries, SQL time and template
+    render time, in milliseconds.
+    """
+    views = {}
+    for record in records:
+        views.setdefault(record.view, []).append(record)
+
+    report = []
+    for view, rows in views.items():
+        count = len(rows)
+        walls = sorted(row.wall * 1000 for row in rows)
+        queries = [row.queries for row in rows]
+        report.append({
+            'view': view,
+            'requests': count,
+            'errors': sum(row.status >= 500 for row in rows),
+            'wall_p50_ms': round(_percentile(walls, 50), 2),
+            'wall_p95_ms': round(_percentile(walls, 95), 2),
+            'wall_p99_ms': round(_percentile(walls, 99), 2),
+            'queries_mean': round(sum(queries) / count, 2),
+            'queries_max': max(queries),
+            'queries_total': sum(queries),
+            'sql_mean_ms': round(sum(row.sql for row in rows) * 1000
+                                 / count, 2),
+            'template_mean_ms': round(sum(row.template for row in rows)
+                                      * 1000 / count, 2),
+        })
+    report.sort(key=lambda row: row['queries_total'], reverse=True)
+    return report
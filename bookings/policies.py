@@ -0,0 +1,67 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from .intervals import interval
+from .models import Booking
+from .services.core import POLICIES, demand_during
+
+
+# Seconds the expected demand of a date is kept.
+DEMAND_CACHE_SECONDS = 60 * 60
+
+
+def allocation_policy(name=None):
+    """
+    Returns the policy called ``name``, one of those registered in
+    ``bookings.services.core``, by default the one named by
+    ``BOOKING_ALLOCATION_POLICY``.
+    """
+    if name is None:
+        name = getattr(settings, 'BOOKING_ALLOCATION_POLICY', 'best-fit')
+    try:
+        return POLICIES[name]
+    except KeyError:
+        raise ValueError(f'Unknown allocation policy "{name}"')
+
+
+def demand_profile(date):
+    """
+    Returns the bookings expected on ``date`` as (start, end, guests,
+    weight) rows, from the same weekday of the previous
+    ``BOOKING_DEMAND_WEEKS`` weeks. Each past booking weighs one over
+    the number of weeks, and the profile is read with one query and
+    cached for an hour.
+    """
+    weeks = getattr(settings, 'BOOKING_DEMAND_WEEKS', 4)
+    key = f'bookings:demand:{date}:{weeks}'
+    profile = cache.get(key)
+    if profile is None:
+        rows = Booking.objects.filter(
+            date__in=[date - timedelta(weeks=week)
+                      for week in range(1, weeks + 1)]
+        ).exclude(
+            status='cancelled'
+        ).values_list('time', 'duration', 'guests')
+        profile = [(*interval(time, duration), guests, 1 / weeks)
+                   for time, duration, guests in rows]
+        cache.set(key, profile, DEMAND_CACHE_SECONDS)
+    return profile
+
+
+def expected_demand(date, start, end, exclude_booking_id=None):
+    """
+    Returns a dict of party size to the number of such parties still
+    expected during the ``start`` to ``end`` minutes of ``date``: the
+    demand profile less the bookings already made for that time, read
+    with one query.
+
+    exclude_booking_id: a booking being changed, which does not count
+    as already made.
+    """
+    bookings = Booking.objects.filter(date=date).exclude(status='cancelled')
+    if exclude_booking_id:
+        bookings = bookings.exclude(id=exclude_booking_id)
+    booked = [(*interval(time, duration), guests)
+              for time, duration, guests in bookings.values_list(
+                  'time', 'duration', 'guests')]
+    return demand_during(demand_profile(date), start, end, booked)
@@ -0,0 +1,9 @@
+"""
+The booking logic behind the views.
+
+``core`` decides on plain data (tables as seat arrays, times as minute
+offsets) and never imports Django, so allocation can be benchmarked,
+cached or run in worker processes on its own. ``repository`` loads
+that data in bulk, and ``booking`` puts the two together for the views,
+the waitlist and the benchmarks.
+"""
@@ -0,0 +1,120 @@
+from django.db import transaction
+from ..availability import booking_day_lock
+from ..intervals import booking_duration, interval
+from ..models import Booking
+from ..policies import allocation_policy
+from ..tasks import enqueue
+from ..waitlist import join_waitlist
+from . import core, repository
+
+
+def place_booking(booking, waitlist=False, policy=None, on_saved=None):
+    """
+    Allocates tables to ``booking`` and saves it with them: the one
+    path behind making a booking, changing one and promoting one from
+    the waitlist. A booking that is already saved is left out of its
+    own checks.
+
+    The checks and the save run under the lock for the booking date, so
+    concurrent requests cannot be given the same tables. The chosen
+    tables are checked against the database there too, and the floor
+    plan is reloaded if they were changed or removed meanwhile.
+
+    waitlist: whether a party that cannot be seated joins the waitlist
+    for that time.
+
+    on_saved: called with the booking once it is saved, still inside
+    the locked transaction, e.g. to queue an email that must only be
+    sent if the booking is committed.
+
+    Returns:
+    str or None: ``core.OVERLAPPING`` or ``core.NO_TABLES`` if the
+    booking was not saved.
+    """
+    start, end = interval(booking.time, booking.duration)
+    choose = allocation_policy(policy)
+
+    def decide(plan):
+        free = repository.free_positions(
+            plan, booking.date, booking.time, booking.duration,
+            exclude_booking_id=booking.pk)
+        return core.place(
+            plan.floor, free, busy, booking.guests, start, end, choose,
+            repository.demand_for(choose, booking.date, start, end,
+                                  exclude_booking_id=booking.pk))
+
+    with booking_day_lock(booking.date):
+        busy = repository.booked_intervals(
+            Booking.objects.filter(user=booking.user), booking.date,
+            exclude_booking_id=booking.pk)
+        plan = repository.load_floor()
+        positions, refused = decide(plan)
+        if not refused and not repository.tables_unchanged(
+                repository.tables_at(plan, positions)):
+            # The cached plan missed a change made by another process.
+            plan = repository.load_floor(reload=True)
+            positions, refused = decide(plan)
+
+        if refused:
+            if waitlist and refused == core.NO_TABLES:
+                join_waitlist(booking.user, booking.date, booking.time,
+                              booking.guests, booking.duration)
+            return refused
+
+        booking.save()
+        booking.tables.set(repository.tables_at(plan, positions))
+        if on_saved:
+            on_saved(booking)
+    return None
+
+
+def book_tables(booking):
+    """
+    Allocates tables to an unsaved booking and saves it.
+
+    A party that cannot be seated joins the waitlist for that time.
+
+    Returns:
+    str or None: A warning for the user if the booking was not made.
+    """
+    refused = place_booking(
+        booking, waitlist=True, on_saved=lambda booking: enqueue(
+            'send_booking_email', booking_id=booking.id, kind='received'))
+    if refused == core.OVERLAPPING:
+        return 'You already have a booking that overlaps with this time.'
+    if refused == core.NO_TABLES:
+        return ('Sorry, no tables are available for the selected time.'
+                ' We have added you to the waitlist and will book a'
+                ' table for you if one becomes free.')
+    return None
+
+
+def change_guests(booking, guests):
+    """
+    Changes the party size of a saved booking, and its duration with
+    it, moving the booking to tables that seat the new party.
+
+    Returns:
+    str or None: A warning for the user if the booking was not changed.
+    """
+    before = booking.guests, booking.duration
+    booking.guests = guests
+    booking.duration = booking_duration(guests)
+    refused = place_booking(booking)
+    if not refused:
+        return None
+
+    booking.guests, booking.duration = before
+    if refused == core.OVERLAPPING:
+        return 'You already have another booking that overlaps with this time.'
+    return 'There are no tables available for that number of guests.'
+
+
+def cancel(booking):
+    """
+    Cancels a booking and queues the email telling the guest.
+    """
+    with transaction.atomic():
+        booking.status = 'cancelled'
+        booking.save()
+        enqueue('send_booking_email', booking_id=booking.id, kind='cancelled')
@@ -0,0 +1,246 @@
+"""
+Booking decisions on plain data.
+
+Tables are given by their position in a ``Floor``: the seats, turnover
+and joinable neighbours of every table are lists or dicts indexed by
+position. Times are minutes after midnight, and intervals are
+(start, end) pairs with an exclusive end. Nothing here touches the
+database or imports Django.
+"""
+from collections import namedtuple
+from ..allocation import find_connected_table_group, find_table_group
+
+
+# Why a booking could not be placed.
+OVERLAPPING = 'overlapping'
+NO_TABLES = 'no-tables'
+
+# What ``bookings.allocation`` needs to know about a table.
+_Table = namedtuple('_Table', ('id', 'seats'))
+
+
+class Floor:
+    """
+    The tables of a floor plan as arrays indexed by position.
+
+    seats, turnovers: the seats and the turnover minutes of every
+    table.
+
+    neighbours: a dict of position to the positions of the tables it
+    can be pushed together with, or None if every table can be joined
+    with every other one.
+
+    ids: anything identifying the tables to the caller, e.g. their
+    primary keys. By default the positions themselves.
+    """
+    __slots__ = ('seats', 'turnovers', 'neighbours', 'ids', 'tables')
+
+    def __init__(self, seats, turnovers=None, neighbours=None, ids=None):
+        self.seats = list(seats)
+        self.turnovers = (list(turnovers) if turnovers is not None
+                          else [0] * len(self.seats))
+        self.neighbours = neighbours
+        self.ids = list(ids) if ids is not None else list(
+            range(len(self.seats)))
+        self.tables = [_Table(position, count)
+                       for position, count in enumerate(self.seats)]
+
+    def __len__(self):
+        return len(self.seats)
+
+
+def overlaps(first, second):
+    """
+    Whether two (start, end) intervals overlap. The end of an
+    interval is exclusive, so back-to-back bookings do not overlap.
+    """
+    return first[0] < second[1] and second[0] < first[1]
+
+
+def has_overlap(intervals, start, end):
+    """
+    Whether any of ``intervals`` overlaps with ``start`` to ``end``.
+    """
+    return any(overlaps((start, end), other) for other in intervals)
+
+
+def free_tables(floor, held, start, end):
+    """
+    Returns the positions of the tables free from ``start`` to ``end``.
+
+    held: for every position, the intervals already booked on that
+    table. Each table also keeps its turnover free after every booking.
+    """
+    free = []
+    for position, booked in enumerate(held):
+        turnover = floor.turnovers[position]
+        wanted = (start, end + turnover)
+        if not any(overlaps(wanted, (booked_start, booked_end + turnover))
+                   for booked_start, booked_end in booked):
+            free.append(position)
+    return free
+
+
+def find_group(floor, free, guests, least_waste=False):
+    """
+    Chooses among the ``free`` positions, ordered by preference, the
+    tables to seat a party of ``guests``: the fewest tables, then the
+    fewest wasted seats, or the other way round with ``least_waste``.
+    Only tables that can be pushed together are joined.
+
+    Returns:
+    list or None: The chosen positions, otherwise None.
+    """
+    tables = [floor.tables[position] for position in free]
+    if floor.neighbours is None:
+        group = find_table_group(tables, guests, least_waste=least_waste)
+    else:
+        group = find_connected_table_group(
+            tables, guests, floor.neighbours, least_waste=least_waste)
+    return [table.id for table in group] if group else None
+
+
+# Policy name to the function that chooses the tables.
+POLICIES = {}
+
+
+def policy(name, demand=False):
+    """
+    Registers a function as an allocation policy.
+
+    The function is called with the ``Floor``, the free positions
+    ordered by seats, the party size and the expected demand, and
+    returns the chosen positions or None.
+
+    demand: whether the policy reads the expected demand, a dict of
+    party size to the number of such parties still expected. Other
+    policies are given None, so the demand is never loaded for them.
+    """
+    def register(function):
+        function.uses_demand = demand
+        POLICIES[name] = function
+        return function
+    return register
+
+
+@policy('best-fit')
+def best_fit(floor, free, guests, demand):
+    """
+    The smallest table that seats the party, otherwise the fewest
+    joined tables that waste the fewest seats.
+    """
+    return find_group(floor, free, guests)
+
+
+@policy('least-waste')
+def least_waste(floor, free, guests, demand):
+    """
+    The tables that waste the fewest seats, joining small tables
+    rather than taking a larger one.
+    """
+    return find_group(floor, free, guests, least_waste=True)
+
+
+def demand_during(profile, start, end, booked=()):
+    """
+    Returns a dict of party size to the number of such parties of a
+    demand ``profile``, (start, end, guests, weight) rows, still
+    expected from ``start`` to ``end``.
+
+    booked: the (start, end, guests) of the parties already booked;
+    each one overlapping the window takes one party of its size off
+    the expected demand, so only the parties yet to book are counted.
+    """
+    demand = {}
+    for booked_start, booked_end, guests, weight in profile:
+        if overlaps((start, end), (booked_start, booked_end)):
+            demand[guests] = demand.get(guests, 0) + weight
+    for booked_start, booked_end, guests in booked:
+        if guests in demand and overlaps((start, end),
+                                         (booked_start, booked_end)):
+            demand[guests] -= 1
+    return {guests: expected for guests, expected in demand.items()
+            if expected > 0}
+
+
+def expected_lost_seats(seats, demand):
+    """
+    Estimates the seats of the expected parties that the free tables,
+    given by their ``seats``, could not take.
+
+    Parties are seated largest first on the smallest table that fits,
+    each table taking one party; joined tables are not considered.
+    """
+    capacity = sorted([count, 1.0] for count in seats)
+    lost = 0
+    for guests in sorted(demand, reverse=True):
+        expected = demand[guests]
+        for table in capacity:
+            if expected <= 0:
+                break
+            if table[0] >= guests and table[1] > 0:
+                taken = min(table[1], expected)
+                table[1] -= taken
+                expected -= taken
+        lost += expected * guests
+    return lost
+
+
+@policy('look-ahead', demand=True)
+def look_ahead(floor, free, guests, demand):
+    """
+    Scores the candidate choices against the expected demand and
+    takes the one with the fewest wasted plus expected lost seats, so
+    a large table is kept for the large parties still to come.
+
+    The candidates are the smallest free table of every size that
+    seats the party, and the best-fit and least-waste groups.
+    """
+    candidates = []
+    sizes = set()
+    for position in free:
+        seats = floor.seats[position]
+        if seats >= guests and seats not in sizes:
+            sizes.add(seats)
+            candidates.append([position])
+    for least in (False, True):
+        group = find_group(floor, free, guests, least_waste=least)
+        if group and group not in candidates:
+            candidates.append(group)
+    if not candidates:
+        return None
+
+    def score(candidate):
+        taken = set(candidate)
+        wasted = sum(floor.seats[position] for position in candidate) - guests
+        lost = expected_lost_seats(
+            [floor.seats[position] for position in free
+             if position not in taken],
+            demand or {})
+        return (wasted + lost, len(candidate), wasted)
+
+    return min(candidates, key=score)
+
+
+def place(floor, free, busy, guests, start, end, choose, demand=None):
+    """
+    Decides where a party of ``guests`` booked from ``start`` to
+    ``end`` sits.
+
+    free: the positions of the tables free at that time.
+
+    busy: the intervals of the guest's other bookings that day; a
+    guest cannot be in two places at once.
+
+    choose: the allocation policy.
+
+    Returns:
+    tuple: The chosen positions and None, or None and why the party
+    cannot be placed (``OVERLAPPING`` or ``NO_TABLES``).
+    """
+    if has_overlap(busy, start, end):
+        return None, OVERLAPPING
+    positions = choose(floor, free, guests, demand)
+    if not positions:
+        return None, NO_TABLES
+    return positions, None
@@ -0,0 +1,74 @@
+"""
+Loads what ``bookings.services.core`` decides on, in bulk and mostly
+from the in-memory caches, and turns its answers back into models.
+"""
+from ..availability import availability_index
+from ..floorplan import floor_plan, floor_plans
+from ..intervals import interval
+from ..models import Table
+from ..policies import expected_demand
+
+
+def load_floor(reload=False):
+    """
+    Returns the cached ``FloorPlan``; its ``floor`` is the plain-data
+    version for the core, with the tables in the same order.
+
+    reload: read the plan from the database even if it is cached.
+    """
+    if reload:
+        floor_plans.clear()
+    return floor_plan()
+
+
+def tables_unchanged(tables):
+    """
+    Whether ``tables``, taken from a cached floor plan, still exist
+    with the same seats, checked with a single query.
+
+    Processes that do not share the cache only see changes to the
+    floor plan once ``FLOOR_PLAN_TTL`` runs out, so tables are checked
+    before they are booked.
+    """
+    seats = dict(Table.objects.filter(
+        id__in=[table.id for table in tables]).values_list('id', 'seats'))
+    return all(seats.get(table.id) == table.seats for table in tables)
+
+
+def free_positions(plan, date, time, duration, exclude_booking_id=None):
+    """
+    Returns the positions in ``plan.floor`` of the tables free for a
+    booking of ``duration`` minutes at the given date and time, read
+    from the ``availability_index``, so usually without a query.
+    """
+    occupied = availability_index.occupied_tables(
+        date, time, duration, turnovers=plan.turnovers,
+        exclude_booking_id=exclude_booking_id)
+    return [position for position, table_id in enumerate(plan.floor.ids)
+            if table_id not in occupied]
+
+
+def booked_intervals(bookings, date, exclude_booking_id=None):
+    """
+    Returns the (start, end) minutes of ``bookings`` on ``date``,
+    except cancelled ones, with a single query.
+    """
+    bookings = bookings.filter(date=date).exclude(status='cancelled')
+    if exclude_booking_id:
+        bookings = bookings.exclude(id=exclude_booking_id)
+    return [interval(time, duration)
+            for time, duration in bookings.values_list('time', 'duration')]
+
+
+def demand_for(choose, date, start, end, exclude_booking_id=None):
+    """
+    Returns the demand still expected from ``start`` to ``end`` on
+    ``date`` if the policy ``choose`` reads it, otherwise None.
+    """
+    if not choose.uses_demand:
+        return None
+    return expected_demand(date, start, end, exclude_booking_id)
+
+
+def tables_at(plan, positions):
+    return [plan.tables[position] for position in positions]
@@ -0,0 +1,146 @@
+from datetime import date
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save)
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from .models import Booking, Menu, Table
+from .availability import availability_index
+from .caching import invalidate_menu
+from .floorplan import invalidate_floor_plan
+from .perf import install_query_recorder
+from .summaries import refresh_table_summaries, refresh_table_summary
+from .waitlist import schedule_promotion
+
+
+@receiver(post_save, sender=Booking)
+def index_saved_booking(sender, instance, created, raw=False, **kwargs):
+    """
+    Keeps the availability index in step with a saved booking.
+    """
+    if raw:
+        return
+    availability_index.update_booking(
+        instance, table_ids=() if created else None)
+
+
+@receiver(post_delete, sender=Booking)
+def index_deleted_booking(sender, instance, **kwargs):
+    availability_index.remove_booking(instance.pk)
+
+
+@receiver(m2m_changed, sender=Booking.tables.through)
+def summarise_booking_tables(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    """
+    Keeps ``Booking.table_numbers`` and ``Booking.total_seats`` in step
+    with ``Booking.tables``, changed from either side.
+    """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_table_summary(instance)
+    elif action == 'pre_clear':
+        instance._cleared_booking_ids = list(
+            instance.booking_set.values_list('id', flat=True))
+    elif action == 'post_clear':
+        refresh_table_summaries(instance._cleared_booking_ids)
+    elif action in ('post_add', 'post_remove'):
+        refresh_table_summaries(pk_set)
+
+
+def _table_booking_ids(table):
+    return Booking.tables.through.objects.filter(
+        table_id=table.pk).values_list('booking_id', flat=True)
+
+
+@receiver(pre_save, sender=Table)
+def remember_table_summary(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk:
+        instance._previous_summary = Table.objects.filter(
+            pk=instance.pk).values_list('number', 'seats').first()
+
+
+@receiver(post_save, sender=Table)
+def summarise_edited_table(sender, instance, created, raw=False, **kwargs):
+    """
+    Updates the bookings of a table whose number or seats changed.
+    """
+    if raw or created:
+        return
+    if getattr(instance, '_previous_summary', None) != (
+            instance.number, instance.seats):
+        refresh_table_summaries(_table_booking_ids(instance))
+
+
+@receiver(pre_delete, sender=Table)
+def remember_table_bookings(sender, instance, **kwargs):
+    instance._booking_ids = list(_table_booking_ids(instance))
+
+
+@receiver(post_delete, sender=Table)
+def summarise_deleted_table(sender, instance, **kwargs):
+    refresh_table_summaries(instance._booking_ids)
+
+
+@receiver(post_save, sender=Booking)
+def promote_waitlist_on_cancellation(sender, instance, raw=False, **kwargs):
+    """
+    Offers the tables of a cancelled or no-show booking to the
+    waitlist of its date.
+    """
+    if not raw and instance.status in ('cancelled', 'no-show'):
+        schedule_promotion(instance.date)
+
+
+@receiver(post_delete, sender=Booking)
+def promote_waitlist_on_deletion(sender, instance, **kwargs):
+    if instance.date >= date.today():
+        schedule_promotion(instance.date)
+
+
+@receiver(m2m_changed, sender=Booking.tables.through)
+def index_booking_tables(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """
+    Keeps the availability index in step with ``Booking.tables``.
+
+    Changes made from the ``Table`` side are rare, so they simply
+    reset the index.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        availability_index.clear()
+    elif action == 'post_add':
+        availability_index.change_tables(instance, added=pk_set)
+    elif action == 'post_remove':
+        availability_index.change_tables(instance, removed=pk_set)
+    else:
+        availability_index.change_tables(instance, cleared=True)
+
+
+@receiver(post_save, sender=Table)
+@receiver(post_delete, sender=Table)
+def invalidate_floor_plan_on_table_change(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate_floor_plan()
+
+
+@receiver(m2m_changed, sender=Table.adjacent.through)
+def invalidate_floor_plan_on_adjacency_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_floor_plan()
+
+
+@receiver(post_save, sender=Menu)
+@receiver(post_delete, sender=Menu)
+def invalidate_menu_cache(sender, **kwargs):
+    invalidate_menu()
+
+
+@receiver(connection_created)
+def record_request_queries(sender, connection, **kwargs):
+    """
+    Lets ``PerformanceMiddleware`` count the queries of every
+    database connection.
+    """
+    install_query_recorder(connection)
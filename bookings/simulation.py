@@ -0,0 +1,56 @@
+import time
+from .intervals import interval
+from .models import Booking
+from .policies import allocation_policy, demand_profile
+from .services import core
+
+
+def day_requests(date):
+    """
+    Returns the booking requests of ``date`` as (time, duration,
+    guests), in the order they were made. Cancelled bookings are left
+    out.
+    """
+    return list(Booking.objects.filter(date=date).exclude(
+        status='cancelled'
+    ).order_by('created_at', 'id').values_list('time', 'duration', 'guests'))
+
+
+def simulate_day(plan, date, requests, policy):
+    """
+    Replays ``requests`` through the allocation ``policy`` on an empty
+    floor ``plan``, keeping the occupancy in memory.
+
+    The expected demand is read up front, so the replay itself only
+    runs the plain-data ``bookings.services.core``; the parties seated
+    so far are taken off it as the day fills up.
+
+    Returns:
+    dict: The requests seated and rejected, the seats filled and the
+    CPU seconds the policy took.
+    """
+    choose = allocation_policy(policy)
+    profile = demand_profile(date) if choose.uses_demand else None
+    floor = plan.floor
+    held = [[] for _ in range(len(floor))]
+    seated = []
+    result = {'policy': policy, 'seated': 0, 'rejected': 0,
+              'seats_filled': 0, 'cpu_seconds': 0.0}
+
+    started = time.process_time()
+    for start_time, duration, guests in requests:
+        start, end = interval(start_time, duration)
+        free = core.free_tables(floor, held, start, end)
+        demand = (core.demand_during(profile, start, end, seated)
+                  if profile is not None else None)
+        positions = choose(floor, free, guests, demand)
+        if positions:
+            for position in positions:
+                held[position].append((start, end))
+            seated.append((start, end, guests))
+            result['seated'] += 1
+            result['seats_filled'] += guests
+        else:
+            result['rejected'] += 1
+    result['cpu_seconds'] = time.process_time() - started
+    return result
@@ -0,0 +1,51 @@
+from .models import Booking
+
+
+def table_summaries(booking_ids):
+    """
+    Returns a dict of booking id to (table numbers, total seats) for
+    the given bookings, read with a single query. Bookings without
+    tables map to ('', 0).
+    """
+    summaries = {booking_id: ([], 0) for booking_id in booking_ids}
+    rows = Booking.tables.through.objects.filter(
+        booking_id__in=summaries
+    ).order_by('table__number').values_list(
+        'booking_id', 'table__number', 'table__seats')
+    for booking_id, number, seats in rows:
+        numbers, total = summaries[booking_id]
+        numbers.append(str(number))
+        summaries[booking_id] = (numbers, total + seats)
+    return {
+        booking_id: (','.join(numbers), total)
+        for booking_id, (numbers, total) in summaries.items()
+    }
+
+
+def refresh_table_summaries(booking_ids, batch_size=1000):
+    """
+    Recomputes ``Booking.table_numbers`` and ``Booking.total_seats``
+    for the given bookings, ``batch_size`` bookings per query.
+
+    Returns:
+    dict: booking id to (table numbers, total seats).
+    """
+    booking_ids = list(booking_ids)
+    refreshed = {}
+    for start in range(0, len(booking_ids), batch_size):
+        summaries = table_summaries(booking_ids[start:start + batch_size])
+        Booking.objects.bulk_update([
+            Booking(id=booking_id, table_numbers=numbers, total_seats=seats)
+            for booking_id, (numbers, seats) in summaries.items()
+        ], ['table_numbers', 'total_seats'])
+        refreshed.update(summaries)
+    return refreshed
+
+
+def refresh_table_summary(booking):
+    """
+    Recomputes the table summary of a single booking, in the database
+    and on the instance.
+    """
+    booking.table_numbers, booking.total_seats = refresh_table_summaries(
+        [booking.pk])[booking.pk]
@@ -0,0 +1,217 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Booking, Task
+
+
+logger = logging.getLogger(__name__)
+
+# Task name to the function that runs it.
+TASKS = {}
+
+
+def task(function):
+    """
+    Registers a function as a task the worker can run.
+
+    The function is called with the task payload as keyword arguments
+    and may return a list of ``EmailMessage`` for the worker to send.
+    """
+    TASKS[function.__name__] = function
+    return function
+
+
+def enqueue(name, **payload):
+    """
+    Adds a task to the outbox.
+
+    The row is written in the current transaction, so the worker only
+    sees it once the change that caused it is committed.
+    """
+    if name not in TASKS:
+        raise ValueError(f'Unknown task "{name}"')
+    return Task.objects.create(name=name, payload=payload)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def claim_tasks(limit):
+    """
+    Marks up to ``limit`` due tasks as running and returns them.
+
+    A claimed task is due again once it has run for ``TASK_TIMEOUT``
+    seconds, in case its worker died. Rows claimed by another worker
+    in the meantime are left out, so a task is never run twice at once
+    even where ``select_for_update`` is not supported.
+    """
+    now = timezone.now()
+    claimed_until = now + timedelta(seconds=_setting('TASK_TIMEOUT', 300))
+    due = Task.objects.filter(
+        status__in=('pending', 'running'), run_after__lte=now)
+    with transaction.atomic():
+        ids = list(due.select_for_update(skip_locked=True).order_by(
+            'run_after', 'id').values_list('id', flat=True)[:limit])
+        due.filter(id__in=ids).update(
+            status='running', attempts=F('attempts') + 1,
+            run_after=claimed_until)
+    return list(Task.objects.filter(id__in=ids, run_after=claimed_until))
+
+
+def _retry(claimed, error):
+    """
+    Schedules a failed task again after an exponential backoff, or
+    gives up after ``TASK_MAX_ATTEMPTS``.
+    """
+    logger.warning("Task %s #%s failed: %s", claimed.name, claimed.id, error)
+    if claimed.attempts >= _setting('TASK_MAX_ATTEMPTS', 5):
+        Task.objects.filter(id=claimed.id).update(
+            status='failed', last_error=str(error))
+        return
+    delay = _setting('TASK_RETRY_DELAY', 30) * 2 ** (claimed.attempts - 1)
+    Task.objects.filter(id=claimed.id).update(
+        status='pending', last_error=str(error),
+        run_after=timezone.now() + timedelta(seconds=delay))
+
+
+def run_tasks(tasks):
+    """
+    Runs claimed tasks and sends the emails they return over a single
+    mail connection.
+
+    Returns:
+    int: The number of tasks that succeeded.
+    """
+    done = []
+    emails = []
+    for claimed in tasks:
+        try:
+            function = TASKS[claimed.name]
+        except KeyError:
+            _retry(claimed, f'Unknown task "{claimed.name}"')
+            continue
+        try:
+            messages = function(**claimed.payload)
+        except Exception as error:
+            _retry(claimed, error)
+            continue
+        if messages:
+            emails.append((claimed, messages))
+        else:
+            done.append(claimed.id)
+
+    if emails:
+        mail = get_connection()
+        try:
+            mail.open()
+            for claimed, messages in emails:
+                try:
+                    mail.send_messages(messages)
+                except Exception as error:
+                    _retry(claimed, error)
+                else:
+                    done.append(claimed.id)
+        except Exception as error:
+            for claimed, messages in emails:
+                if claimed.id not in done:
+                    _retry(claimed, error)
+        finally:
+            mail.close()
+
+    Task.objects.filter(id__in=done).update(status='done', last_error='')
+    return len(done)
+
+
+def purge_tasks(days=None):
+    """
+    Deletes the tasks that were done more than ``days`` days ago
+    (``TASK_KEEP_DAYS`` by default). Failed tasks are kept.
+
+    Returns:
+    int: The number of tasks deleted.
+    """
+    if days is None:
+        days = _setting('TASK_KEEP_DAYS', 7)
+    cutoff = timezone.now() - timedelta(days=days)
+    return Task.objects.filter(
+        status='done', created_at__lt=cutoff).delete()[0]
+
+
+class Worker:
+    """
+    Runs the due tasks in batches of ``batch_size`` on ``threads``
+    threads. Each thread claims its own batches and uses its own
+    database and mail connections.
+
+    With one thread the batches run in the calling thread.
+    """
+
+    def __init__(self, threads=None, batch_size=None):
+        self.threads = threads or _setting('TASK_WORKER_THREADS', 4)
+        self.batch_size = batch_size or _setting('TASK_BATCH_SIZE', 50)
+
+    def drain(self):
+        """
+        Runs batches until no task is due, and returns how many ran.
+        """
+        count = 0
+        while True:
+            tasks = claim_tasks(self.batch_size)
+            if not tasks:
+                return count
+            run_tasks(tasks)
+            count += len(tasks)
+
+    def _drain_in_thread(self):
+        try:
+            return self.drain()
+        finally:
+            connection.close()
+
+    def run_once(self):
+        if self.threads == 1:
+            return self.drain()
+        with ThreadPoolExecutor(self.threads,
+                                thread_name_prefix='tasks') as pool:
+            futures = [pool.submit(self._drain_in_thread)
+                       for _ in range(self.threads)]
+            return sum(future.result() for future in futures)
+
+
+BOOKING_EMAILS = {
+    'received': (
+        'We have received your booking',
+        'Thank you for booking a table for {guests} on {date} at {time}.'
+        ' Please call us to confirm your booking.'),
+    'cancelled': (
+        'Your booking has been cancelled',
+        'Your booking for {guests} on {date} at {time} has been cancelled.'),
+    'promoted': (
+        'A table is free for you',
+        'A table became free and we have booked it for your party of'
+        ' {guests} on {date} at {time}.'),
+}
+
+
+@task
+def send_booking_email(booking_id, kind):
+    """
+    Tells the guest that a booking was received, cancelled or
+    promoted from the waitlist.
+    """
+    booking = Booking.objects.select_related('user').filter(
+        id=booking_id).first()
+    if booking is None or not booking.user.email:
+        return []
+    subject, body = BOOKING_EMAILS[kind]
+    return [EmailMessage(
+        subject,
+        body.format(guests=booking.guests, date=booking.date,
+                    time=booking.time.strftime('%H:%M')),
+        to=[booking.user.email])]
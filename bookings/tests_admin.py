@@ -0,0 +1,139 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from datetime import date, time, timedelta
+from django.utils import timezone
+from .models import ArchivedBooking, Booking, Table
+from .availability import table_conflicts
+
+
+class TestBookingAdmin(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin", password="adminPassword")
+        self.client.force_login(self.admin)
+        self.tables = [Table.objects.create(number=number, seats=number + 1)
+                       for number in range(1, 5)]
+        self.url = reverse('admin:bookings_booking_changelist')
+
+    def add_bookings(self, count):
+        start = Booking.objects.count()
+        for number in range(start, start + count):
+            user = User.objects.create_user(username=f"guest{number}")
+            booking = Booking.objects.create(
+                user=user, guests=4,
+                date=date(2025, 12, 1) + timedelta(days=number % 28),
+                time=time(12 + number % 10, 0))
+            booking.tables.set(self.tables[:2 + number % 3])
+
+    def changelist_queries(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_shows_tables_and_capacity(self):
+        self.add_bookings(1)
+        response = self.client.get(self.url)
+        self.assertContains(
+            response, '<td class="field-table_number">1,2</td>', html=True)
+        self.assertContains(response, '<td class="field-table_seats">5</td>',
+                            html=True)
+        self.assertContains(response, 'Total seats')
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        self.add_bookings(5)
+        few = self.changelist_queries()
+        self.add_bookings(95)
+        self.assertEqual(self.changelist_queries(), few)
+
+    def test_changelist_shows_1000_rows(self):
+        self.add_bookings(5)
+        few = self.changelist_queries(all='')
+        self.add_bookings(995)
+        self.assertEqual(self.changelist_queries(all=''), few)
+
+
+class TestBookingAdminConflicts(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin", password="adminPassword")
+        self.client.force_login(self.admin)
+        self.tables = [Table.objects.create(number=number, seats=2)
+                       for number in range(1, 11)]
+        self.booking = Booking.objects.create(
+            user=self.admin, guests=4, date=date(2025, 12, 20),
+            time=time(18, 0), duration=90)
+        self.booking.tables.set(self.tables[:2])
+
+    def post(self, booking_time, tables, status='pending'):
+        return self.client.post(reverse('admin:bookings_booking_add'), {
+            'user': self.admin.id,
+            'guests': 4,
+            'date': '2025-12-20',
+            'time': booking_time,
+            'duration': 60,
+            'status': status,
+            'tables': [table.id for table in tables],
+        })
+
+    def test_partial_overlap_is_a_form_error(self):
+        response = self.post('19:00', self.tables[1:3])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response,
+            f'The table &quot;2&quot; is already reserved at this time '
+            f'(booking {self.booking.id} at 18:00).')
+        self.assertNotContains(response, 'The table &quot;3&quot;')
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_free_tables_are_saved(self):
+        response = self.post('19:30', self.tables[:2])
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_cancelled_bookings_are_not_checked(self):
+        response = self.post('18:00', self.tables[:2], status='cancelled')
+        self.assertEqual(response.status_code, 302)
+
+    def test_turnover_is_respected(self):
+        self.tables[0].turnover = 15
+        self.tables[0].save()
+        response = self.post('19:30', self.tables[:2])
+        self.assertContains(response, 'The table &quot;1&quot;')
+        self.assertNotContains(response, 'The table &quot;2&quot;')
+
+    def test_all_tables_are_checked_in_one_query(self):
+        table_ids = [table.id for table in self.tables]
+        with self.assertNumQueries(1):
+            conflicts = table_conflicts(
+                date(2025, 12, 20), time(17, 30), 60, table_ids)
+        self.assertEqual(
+            conflicts,
+            [(1, self.booking.id, time(18, 0)),
+             (2, self.booking.id, time(18, 0))])
+
+
+class TestArchivedBookingAdmin(TestCase):
+
+    def test_history_is_listed_read_only(self):
+        admin = User.objects.create_superuser(
+            username="admin", password="adminPassword")
+        self.client.force_login(admin)
+        table = Table.objects.create(number=7, seats=4)
+        archived = ArchivedBooking.objects.create(
+            id=42, user=admin, guests=4, date=date(2024, 1, 5),
+            time=time(19, 0), duration=90, status='completed',
+            created_at=timezone.now())
+        archived.tables.add(table)
+
+        response = self.client.get(
+            reverse('admin:bookings_archivedbooking_changelist'),
+            {'q': 'admin'})
+        self.assertContains(response, '2024')
+        self.assertNotContains(
+            response, reverse('admin:bookings_archivedbooking_add'))
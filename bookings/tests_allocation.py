@@ -0,0 +1,176 @@
+from django.test import SimpleTestCase
+from itertools import combinations
+from types import SimpleNamespace
+import random
+import time
+from unittest.mock import patch
+from .allocation import find_connected_table_group, find_table_group
+
+
+def make_tables(*seats):
+    return [SimpleNamespace(id=number, number=number, seats=seat)
+            for number, seat in enumerate(seats, start=1)]
+
+
+def make_neighbours(tables, edges):
+    neighbours = {table.id: set() for table in tables}
+    for table_id, other_id in edges:
+        neighbours[table_id].add(other_id)
+        neighbours[other_id].add(table_id)
+    return neighbours
+
+
+def is_connected(group, neighbours):
+    ids = {table.id for table in group}
+    reached = {group[0].id}
+    stack = [group[0].id]
+    while stack:
+        for other in neighbours[stack.pop()] & ids:
+            if other not in reached:
+                reached.add(other)
+                stack.append(other)
+    return reached == ids
+
+
+def brute_force(tables, guests):
+    for num_tables in range(1, len(tables) + 1):
+        totals = [sum(table.seats for table in group)
+                  for group in combinations(tables, num_tables)]
+        fitting = [total for total in totals if total >= guests]
+        if fitting:
+            return num_tables, min(fitting)
+    return None
+
+
+class TestFindTableGroup(SimpleTestCase):
+
+    def test_single_table_with_least_waste(self):
+        tables = make_tables(2, 4, 6)
+        result = find_table_group(tables, 3)
+        self.assertEqual([table.seats for table in result], [4])
+
+    def test_combines_tables_when_needed(self):
+        tables = make_tables(2, 2, 4)
+        result = find_table_group(tables, 7)
+        self.assertEqual(sorted(table.seats for table in result), [2, 2, 4])
+
+    def test_prefers_least_wasted_seats(self):
+        tables = make_tables(2, 5, 6, 10)
+        result = find_table_group(tables, 11)
+        self.assertEqual(sorted(table.seats for table in result), [5, 6])
+
+    def test_least_waste_joins_tables_rather_than_waste_seats(self):
+        tables = make_tables(2, 2, 6)
+        self.assertEqual([table.seats for table in find_table_group(
+            tables, 4)], [6])
+        self.assertEqual([table.seats for table in find_table_group(
+            tables, 4, least_waste=True)], [2, 2])
+        neighbours = make_neighbours(tables, [(1, 2)])
+        self.assertEqual([table.seats for table in find_connected_table_group(
+            tables, 4, neighbours, least_waste=True)], [2, 2])
+
+    def test_returns_none_if_not_enough_seats(self):
+        tables = make_tables(2, 4)
+        self.assertIsNone(find_table_group(tables, 7))
+        self.assertIsNone(find_table_group([], 1))
+
+    def test_matches_exhaustive_search(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            tables = make_tables(
+                *(rng.choice([2, 2, 4, 4, 6, 8]) for _ in range(8)))
+            guests = rng.randint(1, 30)
+            result = find_table_group(tables, guests)
+            expected = brute_force(tables, guests)
+            if expected is None:
+                self.assertIsNone(result)
+            else:
+                self.assertEqual(
+                    (len(result), sum(table.seats for table in result)),
+                    expected)
+                self.assertEqual(len(set(map(id, result))), len(result))
+
+    def test_large_floor_plan_is_fast(self):
+        # One table is taken. Every seat count is even, so an odd party
+        # of one less than the free seats passes the total-seats check
+        # and needs every free table: the slowest search there is.
+        tables = make_tables(*([2, 4, 6] * 70))[:-1]
+        guests = sum(table.seats for table in tables) - 1
+        start = time.monotonic()
+        with patch('bookings.allocation._greedy_table_group',
+                   side_effect=AssertionError('ran out of time')):
+            self.assertEqual(find_table_group(tables, guests), tables)
+            self.assertIsNotNone(find_table_group(tables, 700))
+        self.assertIsNone(find_table_group(tables, guests + 2))
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_time_budget_falls_back_to_greedy(self):
+        tables = make_tables(2, 4, 6, 8)
+        result = find_table_group(tables, 9, time_budget=-1)
+        self.assertGreaterEqual(sum(table.seats for table in result), 9)
+        self.assertEqual(len(result), 2)
+
+
+class TestFindConnectedTableGroup(SimpleTestCase):
+
+    def test_only_joins_adjacent_tables(self):
+        # 1 - 2   3 - 4: tables 2 and 3 would waste the fewest seats,
+        # but they are not next to each other.
+        tables = make_tables(2, 4, 4, 6)
+        neighbours = make_neighbours(tables, [(1, 2), (3, 4)])
+        result = find_connected_table_group(tables, 8, neighbours)
+        self.assertEqual([table.number for table in result], [3, 4])
+
+    def test_joins_through_a_chain(self):
+        tables = make_tables(2, 2, 2)
+        neighbours = make_neighbours(tables, [(1, 2), (2, 3)])
+        result = find_connected_table_group(tables, 6, neighbours)
+        self.assertEqual([table.number for table in result], [1, 2, 3])
+        # Without the middle table the ends cannot be joined.
+        self.assertIsNone(find_connected_table_group(
+            [tables[0], tables[2]], 4, neighbours))
+
+    def test_single_table_needs_no_neighbours(self):
+        tables = make_tables(2, 4, 6)
+        result = find_connected_table_group(
+            tables, 3, make_neighbours(tables, []))
+        self.assertEqual([table.seats for table in result], [4])
+
+    def test_matches_exhaustive_search(self):
+        rng = random.Random(11)
+        for _ in range(200):
+            tables = make_tables(
+                *(rng.choice([2, 2, 4, 4, 6, 8]) for _ in range(8)))
+            edges = [(table.id, other.id)
+                     for table, other in combinations(tables, 2)
+                     if rng.random() < 0.3]
+            neighbours = make_neighbours(tables, edges)
+            guests = rng.randint(1, 24)
+
+            expected = None
+            for size in range(1, len(tables) + 1):
+                totals = [
+                    sum(table.seats for table in group)
+                    for group in combinations(tables, size)
+                    if is_connected(group, neighbours)]
+                fitting = [total for total in totals if total >= guests]
+                if fitting:
+                    expected = (size, min(fitting))
+                    break
+
+            result = find_connected_table_group(tables, guests, neighbours)
+            if expected is None:
+                self.assertIsNone(result)
+            else:
+                self.assertTrue(is_connected(result, neighbours))
+                self.assertEqual(
+                    (len(result), sum(table.seats for table in result)),
+                    expected)
+
+    def test_time_budget_falls_back_to_a_connected_group(self):
+        tables = make_tables(2, 4, 6, 8)
+        neighbours = make_neighbours(tables, [(1, 2), (2, 3), (3, 4)])
+        result = find_connected_table_group(
+            tables, 15, neighbours, time_budget=-1)
+        self.assertGreaterEqual(sum(table.seats for table in result), 15)
+        self.assertTrue(is_connected(result, neighbours))
@@ -0,0 +1,193 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test.utils import override_settings
+from datetime import date, time
+from .models import Booking, Table
+from .availability import (
+    availability_index, remaining_capacity, slot_mask, SLOTS_PER_DAY)
+from .intervals import bookable_starts, booking_duration, interval, overlaps
+import random
+
+
+class TestIntervals(TestCase):
+
+    def test_one_hour_covers_twelve_slots(self):
+        mask = slot_mask(*interval(time(19, 30), 60))
+        self.assertEqual(bin(mask).count('1'), 12)
+        self.assertEqual(mask & slot_mask(*interval(time(20, 30), 60)), 0)
+        self.assertNotEqual(mask & slot_mask(*interval(time(20, 25), 60)), 0)
+
+    def test_partial_slots_are_rounded_outwards(self):
+        self.assertEqual(
+            bin(slot_mask(*interval(time(19, 32), 60))).count('1'), 13)
+
+    def test_mask_stops_at_midnight(self):
+        mask = slot_mask(*interval(time(23, 30), 120))
+        self.assertEqual(mask.bit_length(), SLOTS_PER_DAY)
+
+    def test_overlaps_is_exclusive_at_the_end(self):
+        self.assertTrue(overlaps((600, 660), (659, 700)))
+        self.assertFalse(overlaps((600, 660), (660, 700)))
+        self.assertEqual(interval(time(18, 0), 90, turnover=15),
+                         (1080, 1185))
+
+    def test_booking_duration_follows_party_size(self):
+        self.assertEqual(booking_duration(2), 60)
+        self.assertEqual(booking_duration(4), 90)
+        self.assertEqual(booking_duration(12), 120)
+
+    @override_settings(BOOKING_DURATIONS=((4, 45), (None, 150)))
+    def test_booking_duration_is_configurable(self):
+        self.assertEqual(booking_duration(3), 45)
+        self.assertEqual(booking_duration(5), 150)
+
+
+class TestBookableStarts(TestCase):
+
+    def brute_force(self, tables, occupied, guests, duration, starts):
+        bookable = []
+        for start in starts:
+            free_seats = 0
+            for table_id, seats, turnover in tables:
+                wanted = (start - turnover, start + duration + turnover)
+                if not any(overlaps(wanted, (begin, end))
+                           for other, begin, end in occupied
+                           if other == table_id):
+                    free_seats += seats
+            if free_seats >= guests:
+                bookable.append(start)
+        return bookable
+
+    def test_matches_checking_every_start(self):
+        rng = random.Random(3)
+        for _ in range(50):
+            tables = [(table_id, rng.choice([2, 4, 6]), rng.choice([0, 10]))
+                      for table_id in range(8)]
+            occupied = []
+            for _ in range(rng.randint(0, 20)):
+                start = rng.randrange(660, 1320, 5)
+                occupied.append((rng.randrange(8), start,
+                                 start + rng.choice([60, 90, 120])))
+            guests = rng.randint(1, 30)
+            duration = booking_duration(guests)
+            self.assertEqual(
+                bookable_starts(tables, occupied, guests, duration,
+                                660, 1320, 5),
+                self.brute_force(tables, occupied, guests, duration,
+                                 range(660, 1321, 5)))
+
+
+class TestRemainingCapacity(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="MyUsername")
+        self.table1 = Table.objects.create(number=1, seats=2)
+        self.table2 = Table.objects.create(number=2, seats=4)
+
+    def book(self, day, start, guests, *tables, status='pending'):
+        booking = Booking.objects.create(
+            user=self.user, guests=guests, date=day, time=start,
+            status=status)
+        booking.tables.add(*tables)
+
+    def test_free_seats_per_hour(self):
+        self.book(date(2025, 12, 21), time(18, 30), 4, self.table2)
+        self.book(date(2025, 12, 21), time(19, 0), 2, self.table1)
+        self.book(date(2025, 12, 22), time(12, 0), 6,
+                  self.table1, self.table2)
+        self.book(date(2025, 12, 22), time(20, 0), 6,
+                  self.table1, self.table2, status='cancelled')
+
+        with self.assertNumQueries(2):
+            days = list(remaining_capacity(date(2025, 12, 20), 4))
+
+        self.assertEqual([day for day, seats in days], [
+            date(2025, 12, 20), date(2025, 12, 21),
+            date(2025, 12, 22), date(2025, 12, 23)])
+        self.assertEqual(days[0][1], [6] * 12)
+        # 11:00 .. 22:00; 18:30-20:00 on table 2, 19:00-20:00 on table 1.
+        self.assertEqual(days[1][1],
+                         [6, 6, 6, 6, 6, 6, 6, 2, 0, 6, 6, 6])
+        self.assertEqual(days[2][1],
+                         [6, 0, 0, 6, 6, 6, 6, 6, 6, 6, 6, 6])
+        self.assertEqual(days[3][1], [6] * 12)
+
+    def test_back_to_back_bookings_take_a_table_once(self):
+        Table.objects.create(number=3, seats=4)
+        self.book(date(2025, 12, 21), time(11, 0), 4, self.table2)
+        self.book(date(2025, 12, 21), time(12, 30), 4, self.table2)
+
+        days = list(remaining_capacity(date(2025, 12, 21), 1))
+
+        # 11:00-12:30 and 12:30-14:00 on table 2, tables 1 and 3 free.
+        self.assertEqual(days[0][1][:4], [6, 6, 6, 10])
+
+
+class TestAvailabilityIndex(TestCase):
+
+    def setUp(self):
+        availability_index.clear()
+        self.user = User.objects.create_user(username="MyUsername",
+                                             password="myPassword")
+        self.day = date(2025, 12, 20)
+        self.table1 = Table.objects.create(number=1, seats=2)
+        self.table2 = Table.objects.create(number=2, seats=4)
+        self.booking = Booking.objects.create(
+            user=self.user, guests=2, date=self.day, time=time(18, 0))
+        self.booking.tables.add(self.table1)
+
+    def occupied(self, start, duration=60, **kwargs):
+        return availability_index.occupied_tables(
+            self.day, start, duration, **kwargs)
+
+    def test_turnover_keeps_table_clear(self):
+        self.assertEqual(self.occupied(time(19, 0)), set())
+        self.assertEqual(
+            self.occupied(time(19, 0), turnovers={self.table1.id: 15}),
+            {self.table1.id})
+
+    def test_loads_day_lazily(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.occupied(time(18, 30)), {self.table1.id})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.occupied(time(19, 0)), set())
+
+    def test_new_booking_and_tables_are_indexed(self):
+        self.occupied(time(18, 0))
+        with self.assertNumQueries(1):
+            booking = Booking.objects.create(
+                user=self.user, guests=4, date=self.day, time=time(18, 30))
+        booking.tables.add(self.table2)
+        self.assertEqual(self.occupied(time(19, 0)), {self.table2.id})
+        booking.tables.remove(self.table2)
+        self.assertEqual(self.occupied(time(19, 0)), set())
+        self.assertEqual(availability_index.check(self.day), {})
+
+    def test_time_change_and_cancellation_are_indexed(self):
+        self.occupied(time(18, 0))
+        self.booking.time = time(20, 0)
+        self.booking.save()
+        self.assertEqual(self.occupied(time(18, 0)), set())
+        self.assertEqual(self.occupied(time(20, 30)), {self.table1.id})
+        self.booking.status = 'cancelled'
+        self.booking.save()
+        self.assertEqual(self.occupied(time(20, 30)), set())
+        self.assertEqual(availability_index.check(self.day), {})
+
+    def test_deleted_booking_frees_tables(self):
+        self.occupied(time(18, 0))
+        self.booking.delete()
+        self.assertEqual(self.occupied(time(18, 0)), set())
+
+    def test_exclude_booking(self):
+        self.assertEqual(
+            self.occupied(time(18, 0), exclude_booking_id=self.booking.id),
+            set())
+
+    def test_check_reports_and_drops_stale_days(self):
+        self.occupied(time(18, 0))
+        Booking.objects.filter(id=self.booking.id).update(time=time(12, 0))
+        mismatches = availability_index.check(self.day)
+        self.assertEqual(list(mismatches), [self.table1.id])
+        self.assertEqual(self.occupied(time(18, 0)), set())
+        self.assertEqual(availability_index.check(self.day), {})
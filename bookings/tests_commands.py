@@ -0,0 +1,240 @@
+from django.test import TestCase
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from django.db import connection
+from datetime import date, datetime, time, timedelta, timezone
+from io import StringIO
+from unittest import skipUnless
+import json
+import os
+import tempfile
+from .models import ArchivedBooking, Booking, Table
+from .archive import months_before
+
+
+class TestExplainBookings(TestCase):
+
+    @skipUnless(connection.vendor in ('sqlite', 'postgresql'),
+                'Plan format is backend specific')
+    def test_hot_queries_use_booking_indexes(self):
+        out = StringIO()
+        call_command('explain_bookings', '--strict', '--no-seqscan',
+                     '--date', '2025-12-20', stdout=out)
+        output = out.getvalue()
+        self.assertNotIn('uses no Booking index', output)
+        for index in Booking._meta.indexes:
+            self.assertIn(index.name, output)
+
+
+class TestImportExportBookings(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="MyUsername")
+        self.table1 = Table.objects.create(number=1, seats=2)
+        self.table2 = Table.objects.create(number=2, seats=4)
+        self.booking = Booking.objects.create(
+            user=self.user, guests=5, date=date(2025, 12, 20),
+            time=time(18, 0), status='confirmed')
+        self.booking.tables.add(self.table1, self.table2)
+        Booking.objects.filter(id=self.booking.id).update(
+            created_at=datetime(2025, 3, 1, 12, 30, tzinfo=timezone.utc))
+        self.booking.refresh_from_db()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_export_jsonl(self):
+        out = StringIO()
+        call_command('export_bookings', '--format', 'jsonl', stdout=out)
+        row = json.loads(out.getvalue().splitlines()[0])
+        self.assertEqual(row['user'], 'MyUsername')
+        self.assertEqual(row['tables'], [1, 2])
+        self.assertEqual(row['duration'], 120)
+
+    def test_round_trip(self):
+        for name in ('bookings.csv', 'bookings.jsonl'):
+            call_command('export_bookings', '--output', self.path(name))
+            Booking.objects.all().delete()
+            call_command('import_bookings', self.path(name),
+                         '--allow-past', stdout=StringIO())
+            booking = Booking.objects.get()
+            self.assertEqual(booking.status, 'confirmed')
+            self.assertEqual(booking.duration, 120)
+            self.assertEqual(list(booking.tables.all()),
+                             [self.table1, self.table2])
+            self.assertEqual(booking.table_numbers, '1,2')
+            self.assertEqual(booking.created_at, self.booking.created_at)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        day = date.today() + timedelta(days=7)
+        past = date.today() - timedelta(days=30)
+        with open(self.path('bookings.csv'), 'w') as file:
+            file.write(
+                'user,date,time,guests,status,tables\n'
+                f'MyUsername,{day},19:00,2,pending,1\n'
+                f'MyUsername,{day},23:30,2,pending,1\n'
+                f'Nobody,{day},19:00,2,pending,1\n'
+                f'MyUsername,{day},19:00,0,pending,1\n'
+                f'MyUsername,{day},19:00,2,pending,9\n'
+                f'MyUsername,{day},19:00,2,lost,1\n'
+                f'MyUsername,{past},19:00,2,pending,1\n')
+        out, err = StringIO(), StringIO()
+        call_command('import_bookings', self.path('bookings.csv'),
+                     stdout=out, stderr=err)
+        self.assertIn('Imported 1 bookings, skipped 6 rows.', out.getvalue())
+        errors = err.getvalue().splitlines()
+        self.assertEqual([error.split(':')[0] for error in errors],
+                         [f'line {number}' for number in range(3, 9)])
+        self.assertEqual(Booking.objects.filter(date=day).count(), 1)
+
+    def test_import_runs_constant_queries_per_batch(self):
+        day = date.today() + timedelta(days=7)
+        rows = ''.join(
+            json.dumps({'user': 'MyUsername', 'date': day.isoformat(),
+                        'time': '19:00', 'guests': 2, 'tables': [1]}) + '\n'
+            for _ in range(50))
+        with open(self.path('bookings.jsonl'), 'w') as file:
+            file.write(rows)
+        # Tables, user, then per batch: savepoint, bookings, through-rows
+        # and release.
+        with self.assertNumQueries(2 + 2 * 4):
+            call_command('import_bookings', self.path('bookings.jsonl'),
+                         '--batch-size', '25', stdout=StringIO())
+        self.assertEqual(
+            Booking.tables.through.objects.filter(
+                booking__date=day).count(), 50)
+
+
+class TestCloseOutBookings(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="MyUsername")
+
+    def book(self, day, status):
+        return Booking.objects.create(
+            user=self.user, guests=2, date=day, time=time(12, 0),
+            status=status)
+
+    def close_out(self, *args):
+        out = StringIO()
+        call_command('close_out_bookings', *args, stdout=out)
+        return out.getvalue()
+
+    def test_moves_past_bookings_to_final_states(self):
+        today = date.today()
+        confirmed = self.book(today - timedelta(days=100), 'confirmed')
+        pending = self.book(today - timedelta(days=20), 'pending')
+        cancelled = self.book(today - timedelta(days=15), 'cancelled')
+        upcoming = self.book(today + timedelta(days=10), 'pending')
+
+        output = self.close_out('--chunk-days', '30')
+
+        self.assertIn('Closed out 2 bookings', output)
+        self.assertIn('rows/s', output)
+        for booking, status in ((confirmed, 'completed'),
+                                (pending, 'completed'),
+                                (cancelled, 'cancelled'),
+                                (upcoming, 'pending')):
+            booking.refresh_from_db()
+            self.assertEqual(booking.status, status)
+
+    def test_pending_as_no_show(self):
+        today = date.today()
+        confirmed = self.book(today - timedelta(days=5), 'confirmed')
+        pending = self.book(today - timedelta(days=5), 'pending')
+
+        self.close_out('--pending-as-no-show')
+
+        confirmed.refresh_from_db()
+        pending.refresh_from_db()
+        self.assertEqual((confirmed.status, pending.status),
+                         ('completed', 'no-show'))
+
+    def test_is_idempotent_and_resumable(self):
+        today = date.today()
+        early = self.book(today - timedelta(days=90), 'confirmed')
+        late = self.book(today - timedelta(days=10), 'confirmed')
+
+        self.close_out('--before', str(today - timedelta(days=60)))
+        early.refresh_from_db()
+        late.refresh_from_db()
+        self.assertEqual((early.status, late.status),
+                         ('completed', 'confirmed'))
+
+        self.assertIn('Closed out 1 bookings', self.close_out())
+        self.assertIn('No bookings to close out.', self.close_out())
+        self.assertIn('Closed out 0 bookings',
+                      self.close_out('--from-date',
+                                     str(today - timedelta(days=100))))
+
+
+class TestArchiveBookings(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="MyUsername")
+        self.table1 = Table.objects.create(number=1, seats=2)
+        self.table2 = Table.objects.create(number=2, seats=4)
+
+    def book(self, day, *tables):
+        booking = Booking.objects.create(
+            user=self.user, guests=4, date=day, time=time(12, 0),
+            status='completed')
+        booking.tables.add(*tables)
+        return booking
+
+    def test_months_before(self):
+        self.assertEqual(months_before(date(2025, 6, 1), 6), date(2024, 12, 1))
+        self.assertEqual(months_before(date(2025, 3, 31), 1),
+                         date(2025, 2, 28))
+
+    def test_moves_old_bookings_with_their_tables(self):
+        cutoff = months_before(date.today(), 6)
+        old = [self.book(cutoff - timedelta(days=60 - day),
+                         self.table1, self.table2)
+               for day in range(5)]
+        recent = self.book(cutoff + timedelta(days=40), self.table1)
+
+        out = StringIO()
+        call_command('archive_bookings', '--months', '6', '--batch-size', '2',
+                     stdout=out)
+
+        self.assertIn(f'Archived 5 bookings dated before {cutoff}',
+                      out.getvalue())
+        self.assertEqual(list(Booking.objects.all()), [recent])
+        archived = ArchivedBooking.objects.get(id=old[0].id)
+        self.assertEqual(
+            (archived.user, archived.date, archived.status, archived.duration),
+            (self.user, old[0].date, 'completed', old[0].duration))
+        self.assertEqual(list(archived.tables.all()),
+                         [self.table1, self.table2])
+        self.assertEqual(ArchivedBooking.tables.through.objects.count(), 10)
+
+        call_command('archive_bookings', stdout=out)
+        self.assertEqual(ArchivedBooking.objects.count(), 5)
+
+
+class TestBackfillTableSummaries(TestCase):
+
+    def test_fills_in_table_summaries(self):
+        user = User.objects.create_user(username="MyUsername")
+        table1 = Table.objects.create(number=1, seats=2)
+        table2 = Table.objects.create(number=2, seats=4)
+        bookings = Booking.objects.bulk_create(
+            Booking(user=user, guests=2, date=date(2025, 12, day),
+                    time=time(12, 0), duration=60)
+            for day in range(1, 4))
+        Booking.tables.through.objects.bulk_create(
+            Booking.tables.through(booking_id=booking.id, table_id=table.id)
+            for booking in bookings for table in (table1, table2))
+
+        out = StringIO()
+        call_command('backfill_table_summaries', '--batch-size', '2',
+                     stdout=out)
+
+        self.assertIn('Updated the table summary of 3 bookings.',
+                      out.getvalue())
+        self.assertEqual(
+            set(Booking.objects.values_list('table_numbers', 'total_seats')),
+            {('1,2', 6)})
@@ -0,0 +1,115 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from datetime import date, time
+import random
+from .models import Booking, Table
+from .availability import availability_index, bookable_times
+from .floorplan import floor_plan, floor_plans
+from .intervals import booking_duration
+from .services.booking import book_tables, place_booking
+
+
+class TestFloorPlan(TestCase):
+
+    def setUp(self):
+        availability_index.clear()
+        floor_plans.clear()
+        self.user = User.objects.create_user(username="MyUsername")
+        self.guest = User.objects.create_user(username="Guest")
+        self.table1 = Table.objects.create(number=1, seats=2, zone='Inside')
+        self.table2 = Table.objects.create(number=2, seats=4, zone='Inside')
+        self.table3 = Table.objects.create(number=3, seats=4, zone='Inside')
+        self.table4 = Table.objects.create(number=4, seats=4,
+                                           zone='Terrace')
+        self.table1.adjacent.add(self.table2)
+
+    def place(self, guests, day=date(2025, 12, 20), start=time(18, 0)):
+        # The tables place_booking gives the party, or None; the booking
+        # is deleted again so it does not take the tables of the next.
+        booking = Booking(user=self.guest, guests=guests, date=day,
+                          time=start, duration=booking_duration(guests))
+        if place_booking(booking):
+            return None
+        tables = list(booking.tables.all())
+        booking.delete()
+        return tables
+
+    def test_without_adjacency_every_table_can_be_joined(self):
+        self.table1.adjacent.clear()
+        result = self.place(10)
+        self.assertEqual(len(result), 3)
+
+    def test_only_adjacent_tables_are_joined(self):
+        self.assertEqual(self.place(6), [self.table1, self.table2])
+        self.assertIsNone(self.place(7))
+
+    def test_adjacency_across_zones_is_ignored(self):
+        self.table3.adjacent.add(self.table4)
+        self.assertIsNone(self.place(8))
+        self.table4.zone = 'Inside'
+        self.table4.save()
+        self.assertEqual(self.place(8), [self.table3, self.table4])
+
+    def test_is_cached_until_a_table_changes(self):
+        plan = floor_plan()
+        with self.assertNumQueries(0):
+            self.assertIs(floor_plan(), plan)
+        self.table2.adjacent.add(self.table3)
+        with self.assertNumQueries(2):
+            plan = floor_plan()
+        self.assertEqual(plan.neighbours[self.table2.id],
+                         {self.table1.id, self.table3.id})
+        self.assertEqual(plan.groups[self.table1.id],
+                         plan.groups[self.table3.id])
+        self.assertNotEqual(plan.groups[self.table1.id],
+                            plan.groups[self.table4.id])
+
+    def test_booking_rechecks_tables_changed_by_another_process(self):
+        floor_plan()
+        # Changes another process made without moving the version on,
+        # as with a cache that is not shared.
+        Table.objects.filter(id=self.table2.id).update(seats=2)
+        Table.objects.filter(id=self.table3.id)._raw_delete('default')
+        booking = Booking(user=self.user, guests=4, date=date(2025, 12, 20),
+                          time=time(18, 0), duration=90)
+        self.assertIsNone(book_tables(booking))
+        self.assertEqual(list(booking.tables.all()), [self.table4])
+
+    def test_search_only_offers_times_a_joinable_group_fits(self):
+        booking = Booking.objects.create(
+            user=self.user, guests=2, date=date(2025, 12, 20),
+            time=time(18, 0))
+        booking.tables.add(self.table1)
+        times = bookable_times(date(2025, 12, 20), 6)
+        self.assertNotIn(time(18, 0), times)
+        self.assertIn(time(20, 0), times)
+        self.assertEqual(bookable_times(date(2025, 12, 20), 7), [])
+
+    def test_search_skips_groups_split_by_a_booked_table(self):
+        self.table2.adjacent.add(self.table3)
+        booking = Booking.objects.create(
+            user=self.user, guests=4, date=date(2025, 12, 20),
+            time=time(18, 0))
+        booking.tables.add(self.table2)
+        # Tables 1 and 3 have the seats, but only join through table 2.
+        self.assertNotIn(time(18, 0), bookable_times(date(2025, 12, 20), 6))
+        self.assertIsNone(self.place(6))
+
+    def test_every_offered_time_can_be_booked(self):
+        self.table2.adjacent.add(self.table3)
+        Table.objects.filter(id=self.table3.id).update(turnover=10)
+        floor_plans.clear()
+        rng = random.Random(4)
+        tables = [self.table1, self.table2, self.table3, self.table4]
+        day = date(2025, 12, 20)
+        for _ in range(12):
+            booking = Booking.objects.create(
+                user=self.user, guests=2, date=day,
+                time=time(rng.randint(11, 21), rng.randint(0, 59)),
+                duration=rng.choice([47, 60, 90, 113]))
+            booking.tables.add(*rng.sample(tables, rng.randint(1, 2)))
+
+        for guests in range(1, 11):
+            for start in bookable_times(day, guests, step=1):
+                self.assertTrue(self.place(guests, day, start),
+                                f'{guests} guests at {start}')
@@ -31,6 +31,15 @@ class TestModels(TestCase):
             'pending',
             msg='Default status is not pending')
 
+    def test_duration_defaults_from_guests(self):
+        booking = Booking.objects.create(
+            user=self.user,
+            guests=6,
+            date=date.today(),
+            time=time(18, 0),
+        )
+        self.assertEqual(booking.duration, 120)
+
     def test_table_str_method(self):
         self.assertEqual(str(self.table), "Table 2 (4 seats)")
 
@@ -52,3 +61,45 @@ class TestModels(TestCase):
 
     def test_menu_str_method(self):
         self.assertEqual(str(self.menu), "Salmon - £19.99")
+
+
+class TestTableSummaries(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user(username="MyUsername")
+        self.table1 = Table.objects.create(number=1, seats=2)
+        self.table2 = Table.objects.create(number=2, seats=4)
+        self.booking = Booking.objects.create(
+            user=user, guests=5, date=date(2025, 12, 20), time=time(18, 0))
+
+    def assertSummary(self, numbers, seats):
+        self.booking.refresh_from_db()
+        self.assertEqual(
+            (self.booking.table_numbers, self.booking.total_seats),
+            (numbers, seats))
+
+    def test_follows_booked_tables(self):
+        self.booking.tables.add(self.table2, self.table1)
+        self.assertEqual(self.booking.table_numbers, '1,2')
+        self.assertSummary('1,2', 6)
+        self.booking.tables.remove(self.table1)
+        self.assertSummary('2', 4)
+        self.booking.tables.clear()
+        self.assertSummary('', 0)
+
+    def test_follows_reverse_changes(self):
+        self.table1.booking_set.add(self.booking)
+        self.assertSummary('1', 2)
+        self.table1.booking_set.clear()
+        self.assertSummary('', 0)
+
+    def test_follows_table_edits(self):
+        self.booking.tables.set([self.table1, self.table2])
+        self.table1.seats = 3
+        self.table1.save()
+        self.assertSummary('1,2', 7)
+        self.table2.number = 5
+        self.table2.save()
+        self.assertSummary('1,5', 7)
+        self.table1.delete()
+        self.assertSummary('5', 4)
@@ -0,0 +1,117 @@
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from datetime import date, time
+from io import StringIO
+import json
+from .models import Booking, Table
+from .perf import PerfRecord, perf_log, perf_report
+
+
+class TestPerformanceMiddleware(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        perf_log.clear()
+        self.user = User.objects.create_user(username="MyUsername",
+                                             password="myPassword")
+        table = Table.objects.create(number=1, seats=4)
+        booking = Booking.objects.create(
+            user=self.user, guests=2, date=date(2025, 12, 20),
+            time=time(18, 0))
+        booking.tables.add(table)
+        self.client.force_login(self.user)
+
+    def test_records_queries_and_render_time_per_url_name(self):
+        self.client.get(reverse('my_bookings'))
+        self.client.get(reverse('my_bookings'))
+        self.client.get('/static/css/style.css')
+
+        records = list(perf_log.records)
+        self.assertEqual([record.view for record in records],
+                         ['my_bookings', 'my_bookings'])
+        record = records[0]
+        self.assertEqual((record.method, record.status), ('GET', 200))
+        self.assertGreater(record.queries, 0)
+        self.assertGreater(record.sql, 0)
+        self.assertGreater(record.template, 0)
+        self.assertGreaterEqual(record.wall, record.template)
+
+    def test_streaming_response_is_recorded_once_sent(self):
+        response = self.client.get(reverse('capacity'), {'days': 30})
+        self.assertEqual(len(perf_log.records), 0)
+        b''.join(response.streaming_content)
+
+        record, = perf_log.records
+        self.assertEqual(record.view, 'capacity')
+        # The seat total and the bookings are read while streaming.
+        self.assertGreaterEqual(record.queries, 2)
+
+    def test_only_counts_queries_inside_requests(self):
+        Booking.objects.count()
+        self.assertEqual(len(perf_log.records), 0)
+
+    @override_settings(BOOKING_PERF_BUFFER_SIZE=3)
+    def test_keeps_the_last_requests(self):
+        perf_log.clear()
+        for _ in range(5):
+            self.client.get(reverse('home'))
+        self.assertEqual(len(perf_log.records), 3)
+
+    def test_report_puts_busiest_views_first(self):
+        report = perf_report([
+            PerfRecord(0, 'home', 'GET', 200, 0.002, 1, 0.001, 0.001),
+            PerfRecord(0, 'booking', 'POST', 500, 0.010, 9, 0.004, 0),
+            PerfRecord(0, 'booking', 'POST', 302, 0.030, 11, 0.006, 0),
+        ])
+        self.assertEqual([row['view'] for row in report],
+                         ['booking', 'home'])
+        self.assertEqual(
+            {key: report[0][key] for key in (
+                'requests', 'errors', 'wall_p50_ms', 'wall_p99_ms',
+                'queries_mean', 'queries_max', 'sql_mean_ms')},
+            {'requests': 2, 'errors': 1, 'wall_p50_ms': 10.0,
+             'wall_p99_ms': 30.0, 'queries_mean': 10.0, 'queries_max': 11,
+             'sql_mean_ms': 5.0})
+
+    def test_command_reads_published_requests(self):
+        self.client.get(reverse('my_bookings'))
+        perf_log.publish()
+        other = perf_log.key
+        perf_log.key = 'bookings:perf:other:1'
+        perf_log.clear()
+        try:
+            out = StringIO()
+            call_command('perf_report', '--json', stdout=out,
+                         stderr=StringIO())
+        finally:
+            perf_log.key = other
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['requests'], 1)
+        self.assertEqual(report['views'][0]['view'], 'my_bookings')
+
+    def test_command_without_requests(self):
+        out = StringIO()
+        call_command('perf_report', stdout=out, stderr=StringIO())
+        self.assertIn('No requests recorded.', out.getvalue())
+
+    def test_command_warns_about_a_process_local_cache(self):
+        err = StringIO()
+        call_command('perf_report', stdout=StringIO(), stderr=err)
+        self.assertIn('LocMemCache cache is not shared', err.getvalue())
+
+    def test_endpoint_is_off_by_default_and_staff_only(self):
+        self.assertEqual(
+            self.client.get(reverse('perf_report')).status_code, 404)
+        with override_settings(BOOKING_PERF_ENDPOINT=True):
+            self.assertEqual(
+                self.client.get(reverse('perf_report')).status_code, 403)
+            self.user.is_staff = True
+            self.user.save()
+            response = self.client.get(reverse('perf_report'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('perf_report',
+                      [row['view'] for row in response.json()['views']])
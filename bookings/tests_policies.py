@@ -0,0 +1,121 @@
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from datetime import date, time
+from io import StringIO
+from .models import Booking, Table
+from .availability import availability_index
+from .floorplan import floor_plan, floor_plans
+from .intervals import booking_duration
+from .policies import expected_demand
+from .services.booking import place_booking
+from .services.core import expected_lost_seats
+from .simulation import day_requests, simulate_day
+
+
+class TestAllocationPolicies(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        availability_index.clear()
+        floor_plans.clear()
+        self.user = User.objects.create_user(username="MyUsername")
+        self.guest = User.objects.create_user(username="Guest")
+        self.table1 = Table.objects.create(number=1, seats=2)
+        self.table2 = Table.objects.create(number=2, seats=3)
+        self.table3 = Table.objects.create(number=3, seats=6)
+
+    def allocate(self, guests, policy=None):
+        # Places the party and deletes the booking again, so each
+        # policy sees the same floor and demand.
+        booking = Booking(user=self.guest, guests=guests,
+                          date=date(2025, 12, 20), time=time(18, 0),
+                          duration=booking_duration(guests))
+        if place_booking(booking, policy=policy):
+            return None
+        tables = list(booking.tables.all())
+        booking.delete()
+        return tables
+
+    def book(self, day, guests, start=time(18, 0)):
+        return Booking.objects.create(
+            user=self.user, guests=guests, date=day, time=start)
+
+    def test_best_fit_is_the_default(self):
+        self.assertEqual(self.allocate(4), [self.table3])
+        with override_settings(BOOKING_ALLOCATION_POLICY='least-waste'):
+            self.assertEqual(self.allocate(4), [self.table1, self.table2])
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            self.allocate(2, policy='first-come')
+
+    def test_expected_demand_from_past_weekdays(self):
+        for week in (6, 13):
+            self.book(date(2025, 12, week), 6)
+        self.book(date(2025, 12, 13), 2, start=time(12, 0))
+        self.assertEqual(
+            expected_demand(date(2025, 12, 20), 18 * 60, 19 * 60),
+            {6: 0.5})
+
+    @override_settings(BOOKING_DEMAND_WEEKS=1)
+    def test_expected_demand_leaves_out_parties_already_booked(self):
+        self.book(date(2025, 12, 13), 6)
+        self.book(date(2025, 12, 13), 2)
+        self.book(date(2025, 12, 20), 6)
+        self.assertEqual(
+            expected_demand(date(2025, 12, 20), 18 * 60, 19 * 60),
+            {2: 1})
+
+    def test_expected_lost_seats(self):
+        self.assertEqual(expected_lost_seats([2, 6], {6: 1, 2: 1}), 0)
+        self.assertEqual(expected_lost_seats([2, 2], {6: 1, 2: 1}), 6)
+        self.assertEqual(expected_lost_seats([6], {6: 0.5, 4: 1}), 2)
+
+    @override_settings(BOOKING_DEMAND_WEEKS=1)
+    def test_look_ahead_keeps_tables_for_expected_parties(self):
+        # A party of six is expected, so the small tables are joined
+        # instead of giving away the six-top.
+        self.book(date(2025, 12, 13), 6)
+        self.assertEqual(self.allocate(4, policy='look-ahead'),
+                         [self.table1, self.table2])
+
+    @override_settings(BOOKING_DEMAND_WEEKS=1)
+    def test_look_ahead_can_waste_seats_to_seat_more_parties(self):
+        # Two couples are expected, so the party of five takes the
+        # six-top and leaves them the small tables.
+        self.book(date(2025, 12, 13), 2)
+        self.book(date(2025, 12, 13), 2)
+        self.assertEqual(self.allocate(5, policy='least-waste'),
+                         [self.table1, self.table2])
+        self.assertEqual(self.allocate(5, policy='look-ahead'),
+                         [self.table3])
+
+    def test_simulator_replays_a_day(self):
+        day = date(2025, 5, 10)
+        self.book(day, 4)
+        self.book(day, 6)
+        self.assertEqual(day_requests(day),
+                         [(time(18, 0), 90, 4), (time(18, 0), 120, 6)])
+
+        best_fit = simulate_day(floor_plan(), day, day_requests(day),
+                                'best-fit')
+        least_waste = simulate_day(floor_plan(), day, day_requests(day),
+                                   'least-waste')
+        self.assertEqual((best_fit['seated'], best_fit['rejected'],
+                          best_fit['seats_filled']), (1, 1, 4))
+        self.assertEqual((least_waste['seated'], least_waste['rejected'],
+                          least_waste['seats_filled']), (2, 0, 10))
+
+    def test_simulate_allocation_command(self):
+        self.book(date(2025, 5, 10), 4)
+        out = StringIO()
+        call_command('simulate_allocation', '2025-05-10', '--days', '2',
+                     stdout=out)
+        output = out.getvalue()
+        self.assertIn('Replaying 1 bookings over 2 days on 3 tables.',
+                      output)
+        for policy in ('best-fit', 'least-waste', 'look-ahead'):
+            self.assertIn(policy, output)
@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DatabaseError
+from datetime import date, time
+import subprocess
+import sys
+from unittest.mock import patch
+from .models import Booking, Table, Task
+from .availability import availability_index
+from .floorplan import floor_plans
+from .services import core
+from .services.booking import book_tables, change_guests
+
+
+class TestCore(SimpleTestCase):
+
+    def test_core_does_not_import_django(self):
+        code = ('import sys, bookings.services.core; '
+                'print(any(name.startswith("django") '
+                'for name in sys.modules))')
+        result = subprocess.run([sys.executable, '-c', code],
+                                cwd=settings.BASE_DIR, capture_output=True,
+                                text=True, check=True)
+        self.assertEqual(result.stdout.strip(), 'False')
+
+    def test_free_tables_keep_their_turnover(self):
+        floor = core.Floor([2, 4], turnovers=[0, 15])
+        held = [[(18 * 60, 19 * 60)], [(18 * 60, 19 * 60)]]
+        self.assertEqual(core.free_tables(floor, held, 19 * 60, 20 * 60), [0])
+        self.assertEqual(
+            core.free_tables(floor, held, 19 * 60 + 15, 20 * 60), [0, 1])
+        self.assertEqual(
+            core.free_tables(floor, held, 17 * 60, 18 * 60 + 1), [])
+
+    def test_find_group_only_joins_neighbours(self):
+        floor = core.Floor([2, 2, 4], neighbours={0: {2}, 1: set(), 2: {0}})
+        self.assertEqual(core.find_group(floor, [0, 1, 2], 6), [0, 2])
+        self.assertIsNone(core.find_group(floor, [0, 1], 4))
+        self.assertEqual(core.find_group(core.Floor([2, 2, 4]), [0, 1], 4),
+                         [0, 1])
+
+    def test_look_ahead_keeps_tables_for_expected_parties(self):
+        floor = core.Floor([2, 3, 6])
+        look_ahead = core.POLICIES['look-ahead']
+        self.assertTrue(look_ahead.uses_demand)
+        self.assertEqual(look_ahead(floor, [0, 1, 2], 4, {6: 1}), [0, 1])
+        self.assertEqual(
+            look_ahead(floor, [0, 1, 2], 4, {2: 1, 3: 1}), [2])
+
+    def test_place(self):
+        floor = core.Floor([2, 4])
+        best_fit = core.POLICIES['best-fit']
+        self.assertEqual(
+            core.place(floor, [0, 1], [], 3, 600, 690, best_fit), ([1], None))
+        self.assertEqual(
+            core.place(floor, [0, 1], [(660, 720)], 3, 600, 690, best_fit),
+            (None, core.OVERLAPPING))
+        self.assertEqual(
+            core.place(floor, [0], [(690, 720)], 3, 600, 690, best_fit),
+            (None, core.NO_TABLES))
+
+
+class TestBookingService(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        availability_index.clear()
+        floor_plans.clear()
+        self.user = User.objects.create_user(username="MyUsername")
+        self.table1 = Table.objects.create(number=1, seats=2)
+        self.table2 = Table.objects.create(number=2, seats=4)
+
+    def test_book_then_change_guests(self):
+        booking = Booking(user=self.user, guests=2, date=date(2025, 12, 20),
+                          time=time(18, 0), duration=60)
+        self.assertIsNone(book_tables(booking))
+        self.assertEqual(list(booking.tables.all()), [self.table1])
+
+        self.assertIsNone(change_guests(booking, 4))
+        booking.refresh_from_db()
+        self.assertEqual((booking.guests, booking.duration), (4, 90))
+        self.assertEqual(list(booking.tables.all()), [self.table2])
+
+    def test_refused_change_keeps_the_booking(self):
+        booking = Booking(user=self.user, guests=2, date=date(2025, 12, 20),
+                          time=time(18, 0), duration=60)
+        book_tables(booking)
+        self.assertEqual(
+            change_guests(booking, 7),
+            'There are no tables available for that number of guests.')
+        self.assertEqual((booking.guests, booking.duration), (2, 60))
+        booking.refresh_from_db()
+        self.assertEqual(list(booking.tables.all()), [self.table1])
+
+        Booking.objects.create(user=self.user, guests=2,
+                               date=date(2025, 12, 20), time=time(19, 15))
+        self.assertEqual(
+            change_guests(booking, 4),
+            'You already have another booking that overlaps with this time.')
+
+    def test_booking_and_its_email_are_saved_together(self):
+        booking = Booking(user=self.user, guests=2, date=date(2025, 12, 20),
+                          time=time(18, 0), duration=60)
+        book_tables(booking)
+        self.assertEqual(
+            list(Task.objects.values_list('payload', flat=True)),
+            [{'booking_id': booking.id, 'kind': 'received'}])
+
+        with patch('bookings.services.booking.enqueue',
+                   side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                book_tables(Booking(
+                    user=self.user, guests=2, date=date(2025, 12, 21),
+                    time=time(18, 0), duration=60))
+        self.assertFalse(
+            Booking.objects.filter(date=date(2025, 12, 21)).exists())
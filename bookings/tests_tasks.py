@@ -0,0 +1,118 @@
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from datetime import date, time, timedelta
+from io import StringIO
+from unittest.mock import patch
+from .models import Booking, Table, Task
+from .availability import availability_index
+from .tasks import (
+    TASKS, Worker, claim_tasks, enqueue, purge_tasks, run_tasks, task)
+
+
+@task
+def fail_always():
+    raise RuntimeError('mail server is down')
+
+
+class TestTaskQueue(TestCase):
+
+    def setUp(self):
+        availability_index.clear()
+        self.user = User.objects.create_user(
+            username="MyUsername", password="myPassword",
+            email="guest@example.com")
+        self.client.login(username="MyUsername", password="myPassword")
+        Table.objects.create(number=1, seats=4)
+
+    def book(self):
+        return self.client.post(reverse('booking'), {
+            'date': date.today() + timedelta(days=30),
+            'time': time(18, 0),
+            'guests': 2})
+
+    def test_booking_queues_email_instead_of_sending_it(self):
+        self.book()
+        self.assertEqual(mail.outbox, [])
+        queued = Task.objects.get()
+        booking = Booking.objects.get()
+        self.assertEqual(queued.name, 'send_booking_email')
+        self.assertEqual(queued.payload,
+                         {'booking_id': booking.id, 'kind': 'received'})
+
+        call_command('run_worker', '--once', '--threads', '1',
+                     stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['guest@example.com'])
+        self.assertIn('18:00', mail.outbox[0].body)
+        self.assertEqual(Task.objects.get().status, 'done')
+
+    def test_cancellation_email(self):
+        self.book()
+        booking = Booking.objects.get()
+        self.client.get(
+            reverse('cancel_booking', kwargs={'booking_id': booking.id}))
+        Worker(threads=1).run_once()
+        self.assertEqual([message.subject for message in mail.outbox], [
+            'We have received your booking',
+            'Your booking has been cancelled'])
+
+    def test_batch_shares_one_mail_connection(self):
+        booking = Booking.objects.create(
+            user=self.user, guests=2, date=date.today() + timedelta(days=30),
+            time=time(12, 0))
+        for _ in range(3):
+            enqueue('send_booking_email', booking_id=booking.id,
+                    kind='received')
+        with patch('bookings.tasks.get_connection',
+                   wraps=mail.get_connection) as get_connection:
+            self.assertEqual(Worker(threads=1, batch_size=10).run_once(), 3)
+        get_connection.assert_called_once_with()
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_claimed_tasks_are_not_claimed_again(self):
+        enqueue('fail_always')
+        self.assertEqual(len(claim_tasks(10)), 1)
+        self.assertEqual(claim_tasks(10), [])
+
+    @override_settings(TASK_MAX_ATTEMPTS=2, TASK_RETRY_DELAY=10)
+    def test_failed_tasks_are_retried_with_backoff(self):
+        queued = enqueue('fail_always')
+        run_tasks(claim_tasks(10))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('pending', 1))
+        self.assertEqual(queued.last_error, 'mail server is down')
+        self.assertGreater(queued.run_after,
+                           timezone.now() + timedelta(seconds=9))
+        self.assertEqual(claim_tasks(10), [])
+
+        Task.objects.update(run_after=timezone.now())
+        run_tasks(claim_tasks(10))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('failed', 2))
+
+    @override_settings(TASK_KEEP_DAYS=7)
+    def test_old_done_tasks_are_purged(self):
+        old, recent, failed = (enqueue('fail_always') for _ in range(3))
+        Task.objects.filter(id__in=[old.id, recent.id]).update(status='done')
+        Task.objects.filter(id=failed.id).update(status='failed')
+        Task.objects.exclude(id=recent.id).update(
+            created_at=timezone.now() - timedelta(days=8))
+
+        out = StringIO()
+        call_command('run_worker', '--once', '--threads', '1', stdout=out)
+
+        self.assertIn('Purged 1 done tasks.', out.getvalue())
+        self.assertEqual(
+            sorted(Task.objects.values_list('id', flat=True)),
+            [recent.id, failed.id])
+        self.assertEqual(purge_tasks(days=0), 1)
+
+    def test_unknown_tasks_are_rejected(self):
+        with self.assertRaises(ValueError):
+            enqueue('no_such_task')
+        self.assertIn('send_booking_email', TASKS)
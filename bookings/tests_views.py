@@ -1,23 +1,45 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth.models import User
-from django.urls import reverse
-from datetime import date, time
-from unittest.mock import patch
-from .models import Booking, Table
-from bookings.views import allocate_table
+from django.urls import resolve, reverse
+from asgiref.sync import iscoroutinefunction
+from cloudinary import CloudinaryResource
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, connections
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from book_my_table.middleware import ASGI_URLCONF
+from datetime import date, time, timedelta
+from unittest.mock import ANY, patch
+from concurrent.futures import ThreadPoolExecutor
+from django.test import Client
+from django.core.cache import cache
+from django.core.management import call_command
+from io import StringIO
+import json
+import time as time_module
+from .models import Booking, BookingLock, Menu, Table
+from .views import my_bookings, my_bookings_async
+from bookings.intervals import booking_duration
+from bookings.services.booking import place_booking
+from bookings.availability import availability_index, booking_day_lock
+from bookings.floorplan import floor_plan
 
 
 class TestViews(TestCase):
 
     def setUp(self):
+        availability_index.clear()
+        cache.clear()
+        self.day = date.today() + timedelta(days=30)
         self.user = User.objects.create_user(username="MyUsername",
                                              password="myPassword")
         self.client.login(username="MyUsername", password="myPassword")
+        self.guest = User.objects.create_user(username="Guest")
 
         self.booking = Booking.objects.create(
             user=self.user,
             guests=4,
-            date=date(2025, 12, 20),
+            date=self.day,
             time=time(18, 0),
         )
         self.table1 = Table.objects.create(number=1, seats=2)
@@ -56,36 +78,172 @@ class TestViews(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'bookings/my_bookings.html')
 
-    def test_allocate_table_returns_table_if_available(self):
-        result = allocate_table(date(2025, 12, 20), time(20, 0), guests=4)
+    def add_weekly_lunches(self, weeks):
+        for week in range(weeks):
+            booking = Booking.objects.create(
+                user=self.user, guests=2, time=time(12, 0),
+                date=self.day + timedelta(days=1) + timedelta(weeks=week),
+                status='confirmed' if week % 2 else 'pending')
+            booking.tables.add(self.table1)
+
+    def test_my_bookings_is_paginated_by_date_time_and_id(self):
+        self.add_weekly_lunches(25)
+        twin = Booking.objects.create(
+            user=self.user, guests=2, date=self.day + timedelta(days=1),
+            time=time(12, 0))
+
+        response = self.client.get(reverse('my_bookings'))
+        first_page = response.context['bookings']
+        self.assertEqual(len(first_page), 20)
+        self.assertEqual(first_page[0], self.booking)
+        self.assertEqual(first_page[2], twin)
+        self.assertEqual(response.context['status_counts'],
+                         [('Pending', 15), ('Confirmed', 12)])
+        self.assertContains(response, 'Tables:</strong> 2,3<br>')
+
+        response = self.client.get(
+            reverse('my_bookings'), {'after': response.context['next_cursor']})
+        second_page = response.context['bookings']
+        self.assertEqual(len(second_page), 7)
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertFalse(set(first_page) & set(second_page))
+
+    def test_my_bookings_ignores_malformed_cursor(self):
+        response = self.client.get(reverse('my_bookings'), {'after': 'x_y'})
+        self.assertEqual(list(response.context['bookings']), [self.booking])
+
+    def test_my_bookings_query_count_does_not_grow_with_bookings(self):
+        self.add_weekly_lunches(2)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse('my_bookings'))
+        self.add_weekly_lunches(40)
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(reverse('my_bookings'))
+        self.assertEqual(len(few), len(many))
+
+    def test_edit_guests_shares_my_bookings_page(self):
+        self.add_weekly_lunches(25)
+        response = self.client.post(reverse(
+            'edit_guests', kwargs={'booking_id': self.booking.id}),
+            {'guests': 'x'})
+        self.assertEqual(len(response.context['bookings']), 20)
+        self.assertIsNotNone(response.context['next_cursor'])
+        self.assertEqual(response.context['editing_booking'], self.booking)
+
+    def place(self, start, guests, day=None, duration=None):
+        # Books for another guest through place_booking and returns the
+        # tables given, then deletes the booking so the floor is free
+        # again for the next check.
+        booking = Booking(user=self.guest, guests=guests, date=day or self.day,
+                          time=start,
+                          duration=duration or booking_duration(guests))
+        if place_booking(booking):
+            return None
+        tables = list(booking.tables.all())
+        booking.delete()
+        return tables
+
+    def test_place_booking_takes_table_if_available(self):
+        result = self.place(time(20, 0), guests=4)
         self.assertIsNotNone(result)
         self.assertEqual(result[0], self.table2)
 
-    def test_allocate_table_returns_none_if_no_available(self):
-        result = allocate_table(date(2025, 12, 20), time(18, 0), guests=4)
-        self.assertIsNone(result)
+    def test_place_booking_refuses_if_none_available(self):
+        self.assertIsNone(self.place(time(18, 0), guests=4))
+        self.assertFalse(Booking.objects.filter(user=self.guest))
 
-    def test_allocate_table_combines_tables_if_needed(self):
+    def test_place_booking_combines_tables_if_needed(self):
         self.table2.delete()
         self.table3.delete()
 
         Table.objects.create(number=4, seats=2)
         Table.objects.create(number=5, seats=2)
 
-        result = allocate_table(date(2025, 12, 22), time(20, 0), guests=4)
+        result = self.place(
+            time(20, 0), guests=4, day=self.day + timedelta(days=2))
         self.assertIsNotNone(result)
         total_seats = sum(table.seats for table in result)
         self.assertGreaterEqual(total_seats, 4)
 
+    def test_place_booking_ignores_cancelled_bookings(self):
+        self.booking.status = 'cancelled'
+        self.booking.save()
+        result = self.place(time(18, 30), guests=4)
+        self.assertEqual(result, [self.table2])
+
+    def test_place_booking_blocks_partially_overlapping_bookings(self):
+        result = self.place(time(17, 1), guests=4, duration=60)
+        self.assertIsNone(result)
+        result = self.place(time(17, 0), guests=4, duration=60)
+        self.assertEqual(result, [self.table2])
+
+    def test_place_booking_uses_booking_duration_and_turnover(self):
+        self.assertEqual(self.booking.duration, 90)
+        result = self.place(time(19, 29), guests=4)
+        self.assertIsNone(result)
+        result = self.place(time(19, 30), guests=4)
+        self.assertEqual(result, [self.table2])
+
+        self.table2.turnover = 15
+        self.table2.save()
+        result = self.place(time(19, 30), guests=4)
+        self.assertEqual(result, [self.table3])
+
+    def _add_bookings(self, count):
+        other = User.objects.create_user(username="Other", password="pass")
+        for minute in range(count):
+            booking = Booking.objects.create(
+                user=other,
+                guests=2,
+                date=self.day,
+                time=time(17 + minute // 60, minute % 60),
+            )
+            booking.tables.add(self.table1)
+
+    def test_place_booking_query_count_does_not_grow_with_bookings(self):
+        BookingLock.objects.create(date=self.day)
+        floor_plan()
+        availability_index.clear()
+        with CaptureQueriesContext(connection) as few:
+            self.place(time(20, 0), guests=2)
+        self._add_bookings(60)
+        availability_index.clear()
+        with CaptureQueriesContext(connection) as many:
+            self.place(time(20, 0), guests=2)
+        self.assertEqual(len(few), len(many))
+
+    def test_create_booking_query_count_does_not_grow_with_bookings(self):
+        data = {'date': self.day, 'time': time(20, 0), 'guests': 2}
+        BookingLock.objects.create(date=self.day)
+        floor_plan()
+        availability_index.clear()
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(reverse('booking'), data)
+        Booking.objects.filter(time=time(20, 0)).delete()
+
+        self._add_bookings(60)
+
+        availability_index.clear()
+        with CaptureQueriesContext(connection) as many:
+            self.client.post(reverse('booking'), data)
+        self.assertEqual(len(few), len(many))
+
+    def test_first_lock_of_a_date_creates_its_row(self):
+        for _ in range(2):
+            with booking_day_lock(self.day + timedelta(days=1)):
+                pass
+        lock = BookingLock.objects.get(date=self.day + timedelta(days=1))
+        self.assertEqual(lock.version, 2)
+
     def test_create_booking_user_cannot_book_same_date_and_time_twice(self):
         Booking.objects.create(
             user=self.user,
-            date=date(2025, 12, 15),
+            date=self.day - timedelta(days=5),
             time=time(18, 0),
             guests=2)
 
         response = self.client.post(reverse('booking'), {
-            'date': date(2025, 12, 15),
+            'date': self.day - timedelta(days=5),
             'time': time(18, 0),
             'guests': 2}, follow=True)
         self.assertEqual(response.status_code, 200)
@@ -95,20 +253,20 @@ class TestViews(TestCase):
                 "You already have a booking that overlaps with this time."
                 in m.message for m in messages))
 
-    @patch('bookings.views.allocate_table', return_value=[])
+    @patch('bookings.services.repository.free_positions', return_value=[])
     def test_create_booking_rejected_if_not_available_table(
         self,
-        mock_allocate_table
+        mock_free_positions
     ):
         response = self.client.post(reverse('booking'), {
-            'date': date(2025, 12, 15),
+            'date': self.day - timedelta(days=5),
             'time': time(18, 0),
             'guests': 2}, follow=True)
 
         self.assertEqual(response.status_code, 200)
-        mock_allocate_table.assert_called_once_with(
-            date(2025, 12, 15),
-            time(18, 0), 2)
+        mock_free_positions.assert_called_once_with(
+            ANY, self.day - timedelta(days=5),
+            time(18, 0), 60, exclude_booking_id=None)
         messages = list(response.wsgi_request._messages)
         self.assertTrue(
             any(
@@ -117,7 +275,7 @@ class TestViews(TestCase):
 
     def test_create_booking_successfully(self):
         response = self.client.post(reverse('booking'), {
-            'date': date(2025, 12, 15),
+            'date': self.day - timedelta(days=5),
             'time': time(18, 0),
             'guests': 2})
         self.assertEqual(response.status_code, 302)
@@ -170,9 +328,10 @@ class TestViews(TestCase):
 
     def test_edit_guests_rejected_if_no_tables_available(self):
         self.booking.status = 'pending'
-        self.booking.date = date(2025, 12, 6)
+        self.booking.date = self.day - timedelta(days=14)
         self.booking.save()
-        with patch('bookings.views.allocate_table', return_value=None):
+        with patch('bookings.services.repository.free_positions',
+                   return_value=[]):
             response = self.client.post(reverse(
                 'edit_guests', kwargs={'booking_id': self.booking.id}),
                                         {'guests': 6})
@@ -185,7 +344,7 @@ class TestViews(TestCase):
 
     def test_edit_guests_updated_successfully(self):
         self.booking.status = 'pending'
-        self.booking.date = date(2025, 10, 15)
+        self.booking.date = self.day - timedelta(days=14)
         self.booking.save()
         response = self.client.post(
             reverse('edit_guests', kwargs={'booking_id': self.booking.id}),
@@ -200,7 +359,7 @@ class TestViews(TestCase):
 
     def test_edit_guests_rejected_if_less_than_one(self):
         self.booking.status = 'pending'
-        self.booking.date = date(2025, 11, 11)
+        self.booking.date = self.day - timedelta(days=14)
         self.booking.save()
         response = self.client.post(reverse(
             'edit_guests', kwargs={'booking_id': self.booking.id}),
@@ -213,7 +372,7 @@ class TestViews(TestCase):
 
     def test_edit_guests_invalid_input(self):
         self.booking.status = 'pending'
-        self.booking.date = date(2025, 11, 11)
+        self.booking.date = self.day - timedelta(days=14)
         self.booking.save()
         response = self.client.post(reverse(
             'edit_guests', kwargs={'booking_id': self.booking.id}),
@@ -224,3 +383,390 @@ class TestViews(TestCase):
         self.assertTrue(any(
             "Please enter a valid number of guests"
             in m.message for m in messages))
+
+
+class TestAsyncViews(TestCase):
+
+    def setUp(self):
+        availability_index.clear()
+        cache.clear()
+        self.day = date.today() + timedelta(days=30)
+        self.user = User.objects.create_user(username="MyUsername",
+                                             password="myPassword")
+        self.async_client.force_login(self.user)
+        self.client.force_login(self.user)
+        self.table = Table.objects.create(number=1, seats=4)
+        self.booking = Booking.objects.create(
+            user=self.user, guests=4, date=self.day, time=time(18, 0))
+        self.booking.tables.add(self.table)
+
+    def test_booking_views_are_async(self):
+        for name, kwargs in (('booking', {}), ('my_bookings', {}),
+                             ('availability', {}),
+                             ('cancel_booking', {'booking_id': 1})):
+            view = resolve(reverse(name, kwargs=kwargs),
+                           urlconf=ASGI_URLCONF).func
+            self.assertTrue(iscoroutinefunction(view), name)
+
+    async def test_only_asgi_requests_get_the_async_views(self):
+        response = await self.async_client.get(reverse('my_bookings'))
+        self.assertIs(response.resolver_match.func, my_bookings_async)
+        response = await sync_to_async(self.client.get)(
+            reverse('my_bookings'))
+        self.assertIs(response.resolver_match.func, my_bookings)
+
+    async def test_create_booking(self):
+        response = await self.async_client.get(reverse('booking'))
+        self.assertTemplateUsed(response, 'bookings/booking.html')
+
+        next_day = self.day + timedelta(days=1)
+        response = await self.async_client.post(reverse('booking'), {
+            'date': next_day,
+            'time': time(18, 0),
+            'guests': 2})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], reverse('my_bookings'))
+        booking = await Booking.objects.aget(date=next_day)
+        self.assertEqual([table async for table in booking.tables.all()],
+                         [self.table])
+
+        response = await self.async_client.post(reverse('booking'), {
+            'date': next_day,
+            'time': time(18, 30),
+            'guests': 4})
+        self.assertEqual(response['Location'], reverse('booking'))
+        response = await self.async_client.get(reverse('booking'))
+        self.assertContains(response, 'You already have a booking')
+
+    def test_other_urls_are_kept(self):
+        for name in ('admin:index', 'account_login'):
+            self.assertEqual(
+                resolve(reverse(name), urlconf=ASGI_URLCONF).url_name,
+                name.split(':')[-1])
+
+    async def test_my_bookings(self):
+        response = await self.async_client.get(reverse('my_bookings'))
+        self.assertEqual(list(response.context['bookings']), [self.booking])
+
+    async def test_cancel_booking(self):
+        url = reverse('cancel_booking', kwargs={'booking_id': self.booking.id})
+        response = await self.async_client.get(url)
+        self.assertEqual(response['Location'], reverse('my_bookings'))
+        response = await self.async_client.get(reverse('my_bookings'))
+        self.assertContains(response, 'Booking cancelled successfully!')
+        await self.booking.arefresh_from_db()
+        self.assertEqual(self.booking.status, 'cancelled')
+
+        await self.async_client.get(url)
+        response = await self.async_client.get(reverse('my_bookings'))
+        self.assertContains(response, 'This booking cannot be cancelled.')
+
+        response = await self.async_client.get(
+            reverse('cancel_booking', kwargs={'booking_id': 999}))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_availability(self):
+        response = await self.async_client.get(
+            reverse('availability'), {'date': self.day, 'guests': 4})
+        times = response.json()['times']
+        self.assertIn('16:30', times)
+        self.assertNotIn('17:00', times)
+
+
+class TestASGIApplication(TransactionTestCase):
+    """
+    Requests sent through ``book_my_table.asgi.application``, whose sync
+    work runs on other threads and connections, so the rows are
+    committed rather than kept in a test transaction.
+    """
+
+    def setUp(self):
+        availability_index.clear()
+        cache.clear()
+        self.day = date.today() + timedelta(days=30)
+        user = User.objects.create_user(username="MyUsername")
+        table = Table.objects.create(number=1, seats=4)
+        booking = Booking.objects.create(
+            user=user, guests=4, date=self.day, time=time(18, 0))
+        booking.tables.add(table)
+
+    async def test_availability(self):
+        from book_my_table.asgi import application
+
+        communicator = ApplicationCommunicator(application, {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': reverse('availability'),
+            'root_path': '',
+            'query_string': f'date={self.day}&guests=4'.encode(),
+            'headers': [(b'host', b'testserver')],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        })
+        await communicator.send_input({'type': 'http.request'})
+        start = await communicator.receive_output(timeout=10)
+        body = b''
+        while True:
+            message = await communicator.receive_output(timeout=10)
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        self.assertEqual(start['status'], 200)
+        times = json.loads(body)['times']
+        self.assertIn('16:30', times)
+        self.assertNotIn('17:00', times)
+
+
+class TestAvailabilitySearch(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.day = date.today() + timedelta(days=7)
+        self.user = User.objects.create_user(username="MyUsername")
+        self.table1 = Table.objects.create(number=1, seats=2)
+        self.table2 = Table.objects.create(number=2, seats=4)
+        booking = Booking.objects.create(
+            user=self.user, guests=4, date=self.day, time=time(18, 0))
+        booking.tables.add(self.table2)
+
+    def search(self, **params):
+        return self.client.get(reverse('availability'), params)
+
+    def test_returns_bookable_times(self):
+        response = self.search(date=self.day, guests=4)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['duration'], 90)
+        self.assertEqual(data['times'][0], '11:00')
+        self.assertEqual(data['times'][-1], '22:00')
+        self.assertIn('16:30', data['times'])
+        self.assertNotIn('16:45', data['times'])
+        self.assertNotIn('19:15', data['times'])
+        self.assertIn('19:30', data['times'])
+
+    def test_small_party_fits_on_other_table(self):
+        times = self.search(date=self.day, guests=2).json()['times']
+        self.assertEqual(len(times), 45)
+
+    def test_invalid_search(self):
+        response = self.search(date=date.today() - timedelta(days=30), guests=0)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date', response.json()['errors'])
+        self.assertIn('guests', response.json()['errors'])
+
+    def test_answer_is_cached_briefly(self):
+        response = self.search(date=self.day, guests=4)
+        self.assertIn('max-age=5', response['Cache-Control'])
+        with self.assertNumQueries(0):
+            self.search(date=self.day, guests=4)
+
+    def test_latency_budget(self):
+        day = self.day + timedelta(days=1)
+        tables = [Table.objects.create(number=number, seats=4)
+                  for number in range(3, 53)]
+        for number in range(500):
+            booking = Booking.objects.create(
+                user=self.user, guests=4, date=day,
+                time=time(11 + number % 11, 5 * (number % 12)))
+            booking.tables.add(tables[number % len(tables)])
+
+        started = time_module.perf_counter()
+        # The floor plan (tables and adjacency) and the day's bookings.
+        with self.assertNumQueries(3):
+            response = self.search(date=day, guests=6)
+        self.assertLess(time_module.perf_counter() - started, 0.25)
+        self.assertEqual(response.status_code, 200)
+
+
+class TestCapacityCalendar(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="MyUsername")
+        self.table = Table.objects.create(number=1, seats=4)
+        booking = Booking.objects.create(
+            user=self.user, guests=4, date=date(2025, 12, 21),
+            time=time(11, 0))
+        booking.tables.add(self.table)
+
+    def test_streams_compact_json(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse('capacity'), {'start': '2025-12-20', 'days': 30})
+            content = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertNotIn(b' ', content)
+        data = json.loads(content)
+        self.assertEqual(data['hours'], list(range(11, 23)))
+        self.assertEqual(len(data['days']), 30)
+        self.assertEqual(data['days'][0], ['2025-12-20', [4] * 12])
+        self.assertEqual(data['days'][1][1][:3], [0, 0, 4])
+
+    def test_defaults_to_thirty_days_from_tomorrow(self):
+        response = self.client.get(reverse('capacity'))
+        data = json.loads(b''.join(response.streaming_content))
+        tomorrow = date.today() + timedelta(days=1)
+        self.assertEqual(data['start'], tomorrow.isoformat())
+        self.assertEqual(len(data['days']), 30)
+
+    def test_window_is_limited(self):
+        response = self.client.get(reverse('capacity'), {'days': 91})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('days', response.json()['errors'])
+
+    def test_calendar_page(self):
+        response = self.client.get(reverse('capacity_calendar'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'bookings/capacity_calendar.html')
+        self.assertContains(response, reverse('capacity'))
+
+
+class TestMenuCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # The menu renders image URLs, which otherwise need the
+        # Cloudinary account from CLOUDINARY_URL.
+        patcher = patch.object(CloudinaryResource, 'url',
+                               'https://example.com/placeholder.jpg')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.menu = Menu.objects.create(
+            menu_name="Salmon", description="Grilled", price=19.99)
+
+    def menu_queries(self, response_queries):
+        return [query for query in response_queries
+                if 'bookings_menu' in query['sql']]
+
+    def test_menu_items_are_cached_until_menu_changes(self):
+        response = self.client.get(reverse('menu'))
+        self.assertContains(response, "Salmon")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('menu'))
+        self.assertContains(response, "Salmon")
+        self.assertEqual(self.menu_queries(queries), [])
+
+        Menu.objects.create(menu_name="Risotto", description="Rice",
+                            price=12)
+        response = self.client.get(reverse('menu'))
+        self.assertContains(response, "Risotto")
+
+        self.menu.delete()
+        response = self.client.get(reverse('menu'))
+        self.assertNotContains(response, "Salmon")
+
+    def test_conditional_get_returns_not_modified(self):
+        response = self.client.get(reverse('menu'))
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        response = self.client.get(reverse('menu'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.menu.price = 21
+        self.menu.save()
+        response = self.client.get(reverse('menu'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_user(self):
+        anonymous = self.client.get(reverse('menu'))['ETag']
+        user = User.objects.create_user(username="MyUsername")
+        self.client.force_login(user)
+        response = self.client.get(reverse('menu'),
+                                   HTTP_IF_NONE_MATCH=anonymous)
+        self.assertEqual(response.status_code, 200)
+
+
+class TestPageCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_page_is_served_from_cache(self):
+        first = self.client.get(reverse('about_us'))
+        self.assertTemplateUsed(first, 'bookings/about_us.html')
+        second = self.client.get(reverse('about_us'))
+        self.assertTemplateNotUsed(second, 'bookings/about_us.html')
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_conditional_get_returns_not_modified(self):
+        etag = self.client.get(reverse('home'))['ETag']
+        response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_page_varies_on_user(self):
+        anonymous = self.client.get(reverse('booking_policy'))
+        user = User.objects.create_user(username="MyUsername")
+        self.client.force_login(user)
+        response = self.client.get(reverse('booking_policy'))
+        self.assertContains(response, "You are logged in as MyUsername")
+        self.assertNotEqual(anonymous['ETag'], response['ETag'])
+
+    def test_pages_with_messages_are_not_cached(self):
+        user = User.objects.create_user(username="MyUsername")
+        self.client.force_login(user)
+        self.client.get(reverse('home'))
+        booking = Booking.objects.create(
+            user=user, guests=2, date=date(2025, 12, 20), time=time(18, 0))
+        response = self.client.get(
+            reverse('cancel_booking', kwargs={'booking_id': booking.id}))
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, "Booking cancelled successfully!")
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_warm_page_cache_command(self):
+        call_command('warm_page_cache', stdout=StringIO())
+        response = self.client.get(reverse('home'))
+        self.assertTemplateNotUsed(response, 'bookings/index.html')
+        self.assertEqual(response.status_code, 200)
+
+
+class TestConcurrentBookings(TransactionTestCase):
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Needs a database that several threads can share')
+        availability_index.clear()
+        # SQLite lets one connection write at a time, so fewer guests
+        # race there to keep the wait for the lock short.
+        guests = 20 if connection.vendor == 'sqlite' else 100
+        self.clients = []
+        for number in range(guests):
+            client = Client()
+            client.force_login(
+                User.objects.create_user(username=f"guest{number}"))
+            self.clients.append(client)
+        self.tables = [
+            Table.objects.create(number=number, seats=2)
+            for number in range(1, 11)
+        ]
+        self.day = date.today() + timedelta(days=7)
+
+    def book(self, client):
+        try:
+            return client.post(reverse('booking'), {
+                'date': self.day,
+                'time': time(19, 0),
+                'guests': 2}).status_code
+        finally:
+            connections.close_all()
+
+    def test_simultaneous_bookings_never_share_a_table(self):
+        with ThreadPoolExecutor(max_workers=len(self.clients)) as pool:
+            statuses = list(pool.map(self.book, self.clients))
+
+        self.assertEqual(statuses, [302] * len(self.clients))
+        booked = list(Booking.tables.through.objects.filter(
+            booking__date=self.day).values_list('table_id', flat=True))
+        self.assertEqual(len(booked), len(self.tables))
+        self.assertEqual(len(set(booked)), len(booked))
+        self.assertEqual(Booking.objects.filter(date=self.day).count(),
+                         len(self.tables))
@@ -0,0 +1,158 @@
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from datetime import date, time, timedelta
+from io import StringIO
+from unittest.mock import patch
+from .models import Booking, Table, WaitlistEntry
+from .availability import availability_index
+from .services import booking as services
+from .waitlist import join_waitlist, promote_waitlist, waitlist_promoter
+
+
+class TestWaitlist(TestCase):
+
+    def setUp(self):
+        availability_index.clear()
+        self.user = User.objects.create_user(username="MyUsername",
+                                             password="myPassword")
+        self.other = User.objects.create_user(username="Other")
+        self.day = date.today() + timedelta(days=30)
+        self.table = Table.objects.create(number=1, seats=4)
+        self.booking = Booking.objects.create(
+            user=self.other, guests=4, date=self.day,
+            time=time(18, 0))
+        self.booking.tables.add(self.table)
+
+    def wait(self, user, guests, at=time(18, 0)):
+        return join_waitlist(user, self.day, at, guests, 90)
+
+    def test_rejected_booking_joins_waitlist(self):
+        self.client.login(username="MyUsername", password="myPassword")
+        response = self.client.post(reverse('booking'), {
+            'date': self.day,
+            'time': time(18, 30),
+            'guests': 2}, follow=True)
+        self.assertContains(response, 'added you to the waitlist')
+        entry = WaitlistEntry.objects.get()
+        self.assertEqual((entry.user, entry.time, entry.guests, entry.status),
+                         (self.user, time(18, 30), 2, 'waiting'))
+
+    def test_asking_again_keeps_one_entry(self):
+        first = self.wait(self.user, 2)
+        again = self.wait(self.user, 3)
+        self.assertEqual(first.id, again.id)
+        entry = WaitlistEntry.objects.get()
+        self.assertEqual((entry.guests, entry.created_at),
+                         (3, first.created_at))
+
+    def test_entry_is_not_promoted_over_the_users_own_booking(self):
+        entry = self.wait(self.user, 2, at=time(12, 0))
+        Booking.objects.create(
+            user=self.user, guests=2, date=self.day,
+            time=time(12, 30))
+        self.assertEqual(promote_waitlist(self.day), [])
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'waiting')
+
+    def test_promotion_goes_through_place_booking(self):
+        self.wait(self.user, 2, at=time(12, 0))
+        with patch.object(services, 'place_booking',
+                          wraps=services.place_booking) as place_booking:
+            promoted = promote_waitlist(self.day)
+        place_booking.assert_called_once()
+        self.assertEqual(place_booking.call_args.args[0], promoted[0])
+
+    def test_my_bookings_lists_and_cancels_entries(self):
+        later = date.today() + timedelta(days=7)
+        entry = join_waitlist(self.user, later, time(18, 0), 2, 60)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('my_bookings'))
+        self.assertEqual(response.context['waitlist'], [entry])
+
+        url = reverse('cancel_waitlist_entry', kwargs={'entry_id': entry.id})
+        response = self.client.post(url, follow=True)
+        self.assertContains(response, 'You have left the waitlist.')
+        self.assertEqual(response.context['waitlist'], [])
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'cancelled')
+
+        response = self.client.post(url, follow=True)
+        self.assertContains(response,
+                            'This waitlist entry cannot be cancelled.')
+
+    def test_entries_of_other_users_cannot_be_cancelled(self):
+        entry = self.wait(self.other, 2)
+        self.client.force_login(self.user)
+        response = self.client.post(reverse(
+            'cancel_waitlist_entry', kwargs={'entry_id': entry.id}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_nothing_is_promoted_while_tables_are_taken(self):
+        self.wait(self.user, 2)
+        self.assertEqual(promote_waitlist(self.day), [])
+        self.assertEqual(WaitlistEntry.objects.get().status, 'waiting')
+
+    def test_first_come_first_served(self):
+        first = self.wait(self.user, 4)
+        second = self.wait(User.objects.create_user(username="Late"), 2)
+        self.booking.status = 'cancelled'
+        self.booking.save()
+
+        promoted = promote_waitlist(self.day)
+
+        self.assertEqual(len(promoted), 1)
+        self.assertEqual(promoted[0].user, self.user)
+        self.assertEqual(promoted[0].status, 'confirmed')
+        self.assertEqual(list(promoted[0].tables.all()), [self.table])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, first.booking), ('promoted',
+                                                         promoted[0]))
+        self.assertEqual(second.status, 'waiting')
+
+    def test_later_entries_that_fit_are_promoted(self):
+        too_big = self.wait(self.user, 6)
+        fits = self.wait(self.other, 2, at=time(12, 0))
+        promote_waitlist(self.day)
+        too_big.refresh_from_db()
+        fits.refresh_from_db()
+        self.assertEqual(too_big.status, 'waiting')
+        self.assertEqual(fits.status, 'promoted')
+
+    def test_promotes_in_batches(self):
+        Table.objects.create(number=2, seats=4)
+        Table.objects.create(number=3, seats=4)
+        for _ in range(3):
+            self.wait(User.objects.create_user(username=f"User{_}"), 4,
+                      at=time(12, 0))
+        promoted = promote_waitlist(self.day, batch_size=2)
+        self.assertEqual(len(promoted), 3)
+        self.assertFalse(
+            WaitlistEntry.objects.filter(status='waiting').exists())
+
+    def test_cancellation_schedules_promotion(self):
+        self.client.force_login(self.other)
+        with patch.object(waitlist_promoter, 'submit') as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.get(reverse(
+                    'cancel_booking', kwargs={'booking_id': self.booking.id}))
+        submit.assert_called_once_with(self.day)
+
+    @override_settings(WAITLIST_PROMOTER_THREADS=0)
+    def test_promoter_can_be_left_to_the_command(self):
+        self.assertIsNone(waitlist_promoter.submit(self.day))
+
+    def test_promote_waitlist_command(self):
+        entry = self.wait(self.user, 2, at=time(12, 0))
+        expired = join_waitlist(self.user, date.today() - timedelta(days=1),
+                                time(12, 0), 2, 60)
+        out = StringIO()
+        call_command('promote_waitlist', stdout=out)
+        entry.refresh_from_db()
+        expired.refresh_from_db()
+        self.assertEqual(entry.status, 'promoted')
+        self.assertEqual(expired.status, 'cancelled')
+        self.assertIn(f'Promoted 1 entries on {self.day}.', out.getvalue())
@@ -4,13 +4,20 @@ from . import views
 urlpatterns = [
     path('', views.BookMyTableList.as_view(), name='home'),
     path('booking/', views.create_booking, name='booking'),
+    path('availability/', views.availability, name='availability'),
+    path('availability/calendar/', views.capacity_calendar,
+         name='capacity_calendar'),
+    path('availability/capacity/', views.capacity, name='capacity'),
     path('menu/', views.MenuList.as_view(), name='menu'),
     path('my-bookings/', views.my_bookings, name='my_bookings'),
     path('cancel-booking/<int:booking_id>/',
          views.cancel_booking, name='cancel_booking'),
+    path('cancel-waitlist/<int:entry_id>/',
+         views.cancel_waitlist_entry, name='cancel_waitlist_entry'),
     path('edit-guests/<int:booking_id>/', views.edit_guests,
          name='edit_guests'),
     path('about-us/', views.AboutUs.as_view(), name='about_us'),
     path('booking_policy/', views.BookingPolicy.as_view(),
          name='booking_policy'),
+    path('perf/', views.perf_report_json, name='perf_report'),
 ]
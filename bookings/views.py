@@ -1,99 +1,185 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+import json
+from django.http import (
+    Http404, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse)
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_GET
 from django.views import generic
 from django.contrib import messages
-from datetime import date, timedelta, datetime
-import itertools
-from .models import Menu, Booking, Table
-from .forms import BookingForm
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from datetime import date, time, timedelta
+from django.db.models import Count, Q
+from .models import Menu, Booking, WaitlistEntry
+from .forms import AvailabilityForm, BookingForm, CapacityForm
+from .availability import (
+    HEATMAP_HOURS, bookable_times, remaining_capacity)
+from .intervals import booking_duration
+from .perf import perf_log, perf_report
+from .services.booking import book_tables, cancel, change_guests
+from .waitlist import leave_waitlist
+from .caching import (
+    MENU_CACHE_TIMEOUT, CachedPageMixin, menu_etag, menu_last_modified,
+    menu_version)
 
 
 # Create your views here.
-class BookMyTableList(generic.TemplateView):
+class BookMyTableList(CachedPageMixin, generic.TemplateView):
     """Displays the home page (index)."""
     template_name = "bookings/index.html"
 
 
+@method_decorator(
+    condition(etag_func=menu_etag, last_modified_func=menu_last_modified),
+    name='dispatch')
 class MenuList(generic.ListView):
-    """Displays a list of menu items."""
+    """
+    Displays a list of menu items.
+
+    The items are rendered into a template fragment cached per menu
+    version, so the menu is only queried after it changes. Browsers
+    revalidate with the ETag and Last-Modified headers.
+    """
     queryset = Menu.objects.all()
     template_name = "bookings/menu_list.html"
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['menu_version'] = menu_version()
+        context['menu_cache_timeout'] = MENU_CACHE_TIMEOUT
+        return context
+
 
-class AboutUs(generic.TemplateView):
+class AboutUs(CachedPageMixin, generic.TemplateView):
     """Displays the About Us page."""
     template_name = "bookings/about_us.html"
 
 
-class BookingPolicy(generic.TemplateView):
+class BookingPolicy(CachedPageMixin, generic.TemplateView):
     """Displays the Booking Policy page."""
     template_name = "bookings/booking_policy.html"
 
 
-def allocate_table(date, time, guests, exclude_booking_id=None):
-    """
-    Search for available tables for a booking on specific date, time
-    and number of guests, avoiding conflicts with other existing bookings.
+# Seconds an availability search answer may be reused.
+AVAILABILITY_CACHE_SECONDS = 5
 
-    start: date and time of booking
 
-    end: peoriod of booking
+def search_availability(params):
+    """
+    Answers an availability search for ``availability`` and its async
+    version, reusing answers cached in the last few seconds.
+    """
+    form = AvailabilityForm(data=params)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    booking_date = form.cleaned_data['date']
+    guests = form.cleaned_data['guests']
+    key = f'bookings:availability:{booking_date}:{guests}'
+    times = cache.get(key)
+    if times is None:
+        times = [start.strftime('%H:%M')
+                 for start in bookable_times(booking_date, guests)]
+        cache.set(key, times, AVAILABILITY_CACHE_SECONDS)
+
+    return JsonResponse({
+        'date': booking_date.isoformat(),
+        'guests': guests,
+        'duration': booking_duration(guests),
+        'times': times,
+    })
+
+
+@require_GET
+@cache_control(max_age=AVAILABILITY_CACHE_SECONDS)
+def availability(request):
+    """
+    Returns, as JSON, every time a party can be booked on a date.
 
-    Returns:
-    list or None: A list of tables if available, otherwise None.
+    Expects ``date`` (YYYY-MM-DD) and ``guests`` query parameters.
+    Answers are cached for a few seconds.
     """
+    return search_availability(request.GET)
 
-    start = datetime.combine(date, time)
-    end = start + timedelta(hours=1)
 
-    bookings = Booking.objects.filter(date=date)
-    if exclude_booking_id:
-        bookings = bookings.exclude(id=exclude_booking_id)
+def _capacity_json(start, days):
+    """
+    Yields the capacity calendar as compact JSON, one date at a time.
+    """
+    dumps = json.JSONEncoder(separators=(',', ':')).encode
+    yield '{"start":%s,"hours":%s,"days":[' % (
+        dumps(start.isoformat()), dumps(list(HEATMAP_HOURS)))
+    separator = ''
+    for day, seats in remaining_capacity(start, days):
+        yield separator + dumps([day.isoformat(), seats])
+        separator = ','
+    yield ']}'
+
+
+@require_GET
+@cache_control(max_age=AVAILABILITY_CACHE_SECONDS)
+def capacity(request):
+    """
+    Streams the free seats of every opening hour over a window of
+    30 to 90 days, as JSON.
 
-    unavailable_table_ids = set()
-    for booking in bookings:
-        start_b = datetime.combine(booking.date, booking.time)
-        end_b = start_b + timedelta(hours=1)
-        if start < end_b and end > start_b:
-            unavailable_table_ids.update(
-                booking.tables.values_list('id', flat=True))
+    Accepts optional ``start`` (YYYY-MM-DD) and ``days`` query
+    parameters. Each date is sent as ``["YYYY-MM-DD", [seats, ...]]``
+    with one number for every entry of ``hours``.
+    """
+    form = CapacityForm(data=request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
 
-    available_tables = (
-        Table.objects.exclude(id__in=unavailable_table_ids).order_by('seats')
-    )
+    return StreamingHttpResponse(
+        _capacity_json(form.cleaned_data['start'], form.cleaned_data['days']),
+        content_type='application/json')
 
-    for num_tables in range(1, len(available_tables) + 1):
-        for table_group in itertools.combinations(
-            available_tables, num_tables
-        ):
-            total_seats = sum(table.seats for table in table_group)
-            if total_seats >= guests:
-                return list(table_group)
 
-    return None
+def capacity_calendar(request):
+    """
+    Displays a calendar of the free seats per day and hour, so guests
+    can see which days are full before they book.
+    """
+    return render(request, 'bookings/capacity_calendar.html')
 
 
-def user_has_overlapping_booking(user, date, time, exclude_booking_id=None):
-    """
-    It checks if the user already has a booking, that overlaps
-    with the new one.
+def submit_booking(request, user):
     """
+    Handles the booking form for ``create_booking`` and its async
+    version: allocates tables with ``book_tables`` on a valid POST, and
+    adds a message saying whether the booking was made.
 
-    start = datetime.combine(date, time)
-    end = start + timedelta(hours=1)
+    Returns:
+    tuple: The name of the URL to redirect to, or None, and the form
+    to show otherwise.
+    """
+    if request.method != "POST":
+        return None, BookingForm()
 
-    bookings = Booking.objects.filter(
-        user=user, date=date).exclude(status='cancelled')
+    booking_form = BookingForm(data=request.POST)
+    if not booking_form.is_valid():
+        return None, booking_form
 
-    if exclude_booking_id:
-        bookings = bookings.exclude(id=exclude_booking_id)
+    booking = booking_form.save(commit=False)
+    booking.user = user
+    booking.duration = booking_duration(booking.guests)
 
-    for booking in bookings:
-        start_b = datetime.combine(booking.date, booking.time)
-        end_b = start_b + timedelta(hours=1)
-        if start < end_b and end > start_b:
-            return True
+    warning = book_tables(booking)
+    if warning:
+        messages.add_message(request, messages.WARNING, warning)
+        return 'booking', booking_form
 
-    return False
+    messages.add_message(
+        request,
+        messages.SUCCESS,
+        'Booking made successfully!')
+    return 'my_bookings', booking_form
 
 
 def create_booking(request):
@@ -101,43 +187,12 @@ def create_booking(request):
     Present a form for the user to fill out to make a booking.
     Prevents duplicate bookings for the same user at the same date/time.
 
-    Allocates appropriate tables or shows a warning if none are available.
+    Allocates appropriate tables with ``book_tables`` or shows a warning
+    if none are available.
     """
-    if request.method == "POST":
-        booking_form = BookingForm(data=request.POST)
-        if booking_form.is_valid():
-            booking = booking_form.save(commit=False)
-            booking.user = request.user
-
-            if user_has_overlapping_booking(
-                request.user, booking.date, booking.time
-            ):
-                messages.add_message(
-                    request, messages.WARNING,
-                    'You already have a booking that overlaps with this time.'
-                    )
-                return redirect('booking')
-
-            tables = allocate_table(booking.date, booking.time, booking.guests)
-
-            if not tables:
-                messages.add_message(
-                    request,
-                    messages.WARNING,
-                    'Sorry, no tables are available for the selected time.'
-                    'Please try a different time or guest count.')
-                return redirect('booking')
-
-            booking.save()
-            booking.tables.set(tables)
-            messages.add_message(
-                request,
-                messages.SUCCESS,
-                'Booking made successfully!')
-            return redirect('my_bookings')
-
-    else:
-        booking_form = BookingForm()
+    redirect_to, booking_form = submit_booking(request, request.user)
+    if redirect_to:
+        return redirect(redirect_to)
 
     return render(
         request,
@@ -148,46 +203,171 @@ def create_booking(request):
         )
 
 
+# Bookings shown per page of My Bookings.
+BOOKINGS_PAGE_SIZE = 20
+
+
+def booking_cursor(booking):
+    """
+    Returns the position of a booking in the list, for ``?after=``.
+    """
+    return (f'{booking.date.isoformat()}_{booking.time.isoformat()}_'
+            f'{booking.id}')
+
+
+def parse_booking_cursor(value):
+    """
+    Returns the (date, time, id) of a ``booking_cursor``, or None if
+    the value is missing or malformed.
+    """
+    try:
+        booking_date, booking_time, booking_id = value.split('_')
+        return (date.fromisoformat(booking_date),
+                time.fromisoformat(booking_time), int(booking_id))
+    except (AttributeError, ValueError):
+        return None
+
+
+def user_bookings_queries(user, after=None):
+    """
+    Returns the queries behind My Bookings: one page of the user's
+    upcoming bookings, the count of those bookings per status and the
+    user's upcoming waitlist entries.
+
+    Pages are keyed on (date, time, id) instead of an offset, so a
+    page costs the same however far down the list it is. One extra
+    booking is fetched to tell whether there is a next page.
+
+    after: the (date, time, id) of the last booking already shown.
+    """
+    upcoming = Booking.objects.filter(user=user, date__gte=date.today())
+    counts = upcoming.order_by().values_list('status').annotate(Count('id'))
+
+    page = upcoming.order_by('date', 'time', 'id')
+    if after:
+        after_date, after_time, after_id = after
+        page = page.filter(
+            Q(date__gt=after_date) |
+            Q(date=after_date, time__gt=after_time) |
+            Q(date=after_date, time=after_time, id__gt=after_id))
+    waiting = WaitlistEntry.objects.filter(
+        user=user, status='waiting', date__gte=date.today()
+    ).order_by('date', 'time')
+    return page[:BOOKINGS_PAGE_SIZE + 1], counts, waiting
+
+
+def user_bookings_context(page, counts, waiting=()):
+    """
+    Builds the My Bookings context from the evaluated results of
+    ``user_bookings_queries``.
+    """
+    bookings = list(page)
+    next_cursor = None
+    if len(bookings) > BOOKINGS_PAGE_SIZE:
+        bookings = bookings[:BOOKINGS_PAGE_SIZE]
+        next_cursor = booking_cursor(bookings[-1])
+
+    counts = dict(counts)
+    return {
+        'bookings': bookings,
+        'next_cursor': next_cursor,
+        'waitlist': list(waiting),
+        'status_counts': [
+            (label, counts[value])
+            for value, label in Booking.STATUS_CHOICES if value in counts
+        ],
+    }
+
+
+def user_bookings(request):
+    """
+    Returns the My Bookings context for the logged-in user, starting
+    after the ``after`` query parameter.
+    """
+    return user_bookings_context(*user_bookings_queries(
+        request.user, parse_booking_cursor(request.GET.get('after'))))
+
+
 def my_bookings(request):
     """
-    Displays a list of bookings made by the currently logged-in user.
+    Displays the bookings made by the currently logged-in user, one
+    page at a time.
 
     Returns only bookings from current day onwards, sorted by date and time.
-    """
-    bookings = Booking.objects.filter(user=request.user,
-                                      date__gte=date.today()
-                                      ).order_by('date', 'time')
 
+    **Context**
+
+    ``bookings``
+         A page of the user's bookings.
+
+    ``next_cursor``
+         The ``after`` parameter of the next page, if there is one.
+
+    ``status_counts``
+         (status, count) of all the user's upcoming bookings.
+
+    ``waitlist``
+         The user's upcoming waitlist entries.
+    """
     return render(
         request,
         'bookings/my_bookings.html',
-        {
-            'bookings': bookings,
-        }
+        user_bookings(request)
         )
 
 
-def cancel_booking(request, booking_id):
+def cancel_user_booking(request, user, booking_id):
     """
-    Allows the current logged-in user to cancel a booking,
-    as long as it hasn't already been cancelled or completed.
+    Cancels one of ``user``'s bookings for ``cancel_booking`` and its
+    async version, unless it is already cancelled or completed, and
+    adds a message saying which.
     """
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
+    booking = get_object_or_404(Booking, id=booking_id, user=user)
 
     if booking.status in ('cancelled', 'completed'):
         messages.add_message(
             request, messages.WARNING,
             "This booking cannot be cancelled."
         )
-        return redirect('my_bookings')
+        return
 
-    booking.status = 'cancelled'
-    booking.save()
+    cancel(booking)
 
     messages.add_message(
                 request, messages.SUCCESS,
                 'Booking cancelled successfully!'
             )
+
+
+def cancel_booking(request, booking_id):
+    """
+    Allows the current logged-in user to cancel a booking,
+    as long as it hasn't already been cancelled or completed.
+    """
+    cancel_user_booking(request, request.user, booking_id)
+    return redirect('my_bookings')
+
+
+def cancel_waitlist_entry(request, entry_id):
+    """
+    Allows the current logged-in user to leave the waitlist for a
+    date and time, as long as the entry is still waiting.
+    """
+    entry = get_object_or_404(WaitlistEntry, id=entry_id, user=request.user)
+
+    if entry.status != 'waiting':
+        messages.add_message(
+            request, messages.WARNING,
+            "This waitlist entry cannot be cancelled."
+        )
+        return redirect('my_bookings')
+
+    leave_waitlist(entry)
+
+    messages.add_message(
+        request, messages.SUCCESS,
+        'You have left the waitlist.'
+    )
     return redirect('my_bookings')
 
 
@@ -199,8 +379,8 @@ def edit_guests(request, booking_id):
 
     **Context**
 
-    ``bookings``
-         All bookings of the logged in user.
+    ``bookings``, ``next_cursor``, ``status_counts``, ``waitlist``
+         As in ``my_bookings``.
 
     ``editing_booking``
          The booking currently being edited.
@@ -231,33 +411,11 @@ def edit_guests(request, booking_id):
                         'Please select at least 1 guest.'
                     )
                 else:
-
-                    if user_has_overlapping_booking(
-                        request.user, booking.date, booking.time,
-                        exclude_booking_id=booking_id
-                    ):
+                    warning = change_guests(booking, guests)
+                    if warning:
                         messages.add_message(
-                            request, messages.WARNING,
-                            'You already have another booking'
-                            ' that overlaps with this time.'
-                        )
+                            request, messages.WARNING, warning)
                     else:
-                        booking.guests = guests
-                        tables = allocate_table(
-                            booking.date,
-                            booking.time,
-                            booking.guests,
-                            exclude_booking_id=booking.id
-                            )
-                    if not tables:
-                        messages.add_message(
-                            request, messages.WARNING,
-                            'There are no tables available for that number of'
-                            ' guests.'
-                        )
-                    else:
-                        booking.save()
-                        booking.tables.set(tables)
                         messages.add_message(
                             request, messages.SUCCESS,
                             'Booking updated successfully!'
@@ -270,11 +428,94 @@ def edit_guests(request, booking_id):
                     'Please enter a valid number of guests'
                     )
 
-    bookings = Booking.objects.filter(user=request.user,
-                                      date__gte=date.today()
-                                      ).order_by('date', 'time')
+    context = user_bookings(request)
+    context['editing_booking'] = booking
+    return render(request, 'bookings/my_bookings.html', context)
+
+
+def perf_report_json(request):
+    """
+    Returns, as JSON, the wall time, SQL queries and template render
+    time per URL name recorded by ``PerformanceMiddleware`` in every
+    process sharing the cache.
+
+    Only staff can read it, and only when ``BOOKING_PERF_ENDPOINT``
+    is on.
+    """
+    if not getattr(settings, 'BOOKING_PERF_ENDPOINT', False):
+        raise Http404
+    if not request.user.is_staff:
+        raise PermissionDenied
+    records = perf_log.collect()
+    return JsonResponse({
+        'requests': len(records),
+        'views': perf_report(records),
+    })
+
+
+# Async versions of the views that mostly wait on the database, served
+# under ASGI by ``bookings.async_urls``. They share their work with the
+# views above, run in a thread as Django 4.2 has no async transactions,
+# so the event loop is free while the database answers.
+
+async def _load_user(request):
+    """
+    Loads ``request.user``, which queries the database, in a thread.
+    """
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+async def _render(request, template_name, context=None):
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def availability_async(request):
+    """
+    Async version of ``availability``. The ``require_GET`` and
+    ``cache_control`` decorators of Django 4.2 only wrap sync views,
+    so their work is done here.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    response = await sync_to_async(search_availability)(request.GET)
+    patch_cache_control(response, max_age=AVAILABILITY_CACHE_SECONDS)
+    return response
+
+
+async def create_booking_async(request):
+    """
+    Async version of ``create_booking``.
+    """
+    user = await _load_user(request)
+    redirect_to, booking_form = await sync_to_async(submit_booking)(
+        request, user)
+    if redirect_to:
+        return redirect(redirect_to)
 
-    return render(request, 'bookings/my_bookings.html', {
-            'bookings': bookings,
-            'editing_booking': booking,
-        })
+    return await _render(
+        request,
+        'bookings/booking.html',
+        {
+            "booking_form": booking_form,
+        }
+        )
+
+
+async def my_bookings_async(request):
+    """
+    Async version of ``my_bookings``.
+    """
+    await _load_user(request)
+    context = await sync_to_async(user_bookings)(request)
+    return await _render(request, 'bookings/my_bookings.html', context)
+
+
+async def cancel_booking_async(request, booking_id):
+    """
+    Async version of ``cancel_booking``.
+    """
+    user = await _load_user(request)
+    await sync_to_async(cancel_user_booking)(request, user, booking_id)
+    return redirect('my_bookings')
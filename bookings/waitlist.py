@@ -0,0 +1,148 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from .availability import booking_day_lock
+from .models import Booking, WaitlistEntry
+from .tasks import enqueue
+
+
+logger = logging.getLogger(__name__)
+
+
+def join_waitlist(user, date, time, guests, duration):
+    """
+    Queues a booking request that could not be seated.
+
+    A user asking again for the same date and time keeps their place
+    in the queue, with the party size of the latest request.
+    """
+    entry, created = WaitlistEntry.objects.get_or_create(
+        user=user, date=date, time=time, status='waiting',
+        defaults={'guests': guests, 'duration': duration})
+    if not created and (entry.guests, entry.duration) != (guests, duration):
+        entry.guests, entry.duration = guests, duration
+        entry.save(update_fields=['guests', 'duration'])
+    return entry
+
+
+def leave_waitlist(entry):
+    """
+    Takes a waiting entry off the waitlist.
+    """
+    entry.status = 'cancelled'
+    entry.save(update_fields=['status'])
+
+
+def _promote(entry):
+    """
+    Books tables for a waiting entry if they are free now, through
+    ``place_booking`` like every other booking. Entries whose user has
+    an overlapping booking by now are left waiting.
+
+    Returns:
+    Booking or None: The confirmed booking, if one was made.
+    """
+    from .services.booking import place_booking
+
+    def promoted(booking):
+        entry.status = 'promoted'
+        entry.booking = booking
+        entry.save(update_fields=['status', 'booking'])
+        enqueue('send_booking_email', booking_id=booking.id, kind='promoted')
+
+    booking = Booking(
+        user=entry.user, guests=entry.guests, date=entry.date,
+        time=entry.time, duration=entry.duration, status='confirmed')
+    if place_booking(booking, on_saved=promoted):
+        return None
+    return booking
+
+
+def promote_waitlist(date, batch_size=None):
+    """
+    Confirms the waiting entries of ``date`` whose party fits on the
+    tables that are free now, first come first served.
+
+    Entries are read in batches of ``batch_size``
+    (``WAITLIST_BATCH_SIZE`` by default), each handled under the lock
+    for the date, so bookings made meanwhile only wait for one batch.
+    Entries that still do not fit keep their place in the queue.
+
+    Returns:
+    list: The bookings that were made.
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'WAITLIST_BATCH_SIZE', 50)
+    waiting = WaitlistEntry.objects.filter(
+        date=date, status='waiting'
+    ).select_related('user').order_by('created_at', 'id')
+    if not waiting.exists():
+        return []
+
+    promoted = []
+    batch = []
+    while True:
+        with booking_day_lock(date):
+            entries = waiting
+            if batch:
+                last = batch[-1]
+                entries = entries.filter(
+                    Q(created_at__gt=last.created_at) |
+                    Q(created_at=last.created_at, id__gt=last.id))
+            batch = list(entries[:batch_size])
+            for entry in batch:
+                booking = _promote(entry)
+                if booking:
+                    promoted.append(booking)
+        if len(batch) < batch_size:
+            return promoted
+
+
+class WaitlistPromoter:
+    """
+    Runs ``promote_waitlist`` on a pool of background threads, so the
+    request that freed the tables does not wait for it.
+
+    The pool has ``WAITLIST_PROMOTER_THREADS`` threads. With 0 nothing
+    runs in the background, and the waitlist is left to
+    ``manage.py promote_waitlist``.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def threads(self):
+        return getattr(settings, 'WAITLIST_PROMOTER_THREADS', 2)
+
+    def submit(self, date):
+        if not self.threads:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.threads, thread_name_prefix='waitlist')
+        return self._executor.submit(self._run, date)
+
+    def _run(self, date):
+        try:
+            return promote_waitlist(date)
+        except Exception:
+            logger.exception("Could not promote the waitlist for %s", date)
+        finally:
+            connection.close()
+
+
+waitlist_promoter = WaitlistPromoter()
+
+
+def schedule_promotion(date):
+    """
+    Promotes the waitlist of ``date`` in the background once the
+    current transaction is committed.
+    """
+    transaction.on_commit(lambda: waitlist_promoter.submit(date))
@@ -22,6 +22,37 @@ function showEditForm(bookingId) {
     }
 }
 
+/**
+ * Fills the capacity calendar with the free seats per day and hour.
+ *
+ * Fetches the capacity endpoint for the selected number of days and
+ * renders one row per date. Full days are highlighted.
+ */
+function loadCapacityCalendar() {
+    const calendar = document.getElementById("capacityCalendar");
+    if (!calendar) return;
+
+    const days = document.getElementById("capacityDays").value;
+    fetch(`${calendar.dataset.url}?days=${days}`)
+        .then(response => response.json())
+        .then(data => {
+            const header = data.hours.map(hour => `<th>${hour}:00</th>`).join("");
+            const rows = data.days.map(([day, seats]) => {
+                const full = seats.every(free => free === 0);
+                const cells = seats.map(free =>
+                    `<td class="${free === 0 ? "capacity-full" : ""}">${free}</td>`).join("");
+                return `<tr class="${full ? "capacity-full" : ""}"><th>${day}</th>${cells}</tr>`;
+            }).join("");
+            calendar.innerHTML = `<thead><tr><th></th>${header}</tr></thead><tbody>${rows}</tbody>`;
+        });
+}
+
+const capacityDays = document.getElementById("capacityDays");
+if (capacityDays) {
+    capacityDays.addEventListener("change", loadCapacityCalendar);
+    loadCapacityCalendar();
+}
+
 /**
  * Automatically hides success and info alert messages after 3.5 seconds.
  * 